@@ -0,0 +1,113 @@
+"""Caché columnar de los .txt de frecuencia ya parseados
+
+Cada DataFrame se guarda una vez por contenido (<hash>.feather, o .csv.gz si
+no está pyarrow, como la tabla de consolidado.py). El índice relaciona ruta +
+tamaño + mtime con ese hash, así que un .txt sin cambios no se vuelve a leer
+ni a parsear.
+"""
+import hashlib
+import importlib.util
+import json
+import os
+
+import pandas as pd
+
+# Cambiar al modificar leer_txt: invalida las entradas antiguas
+PARSER_VERSION = 1
+INDICE = "indice.json"
+
+EXTENSION = ".feather" if importlib.util.find_spec("pyarrow") is not None else ".csv.gz"
+
+
+def hash_archivo(path, encoding, chunk=1024 * 1024):
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"v{PARSER_VERSION}:{encoding}:".encode())
+    with open(path, "rb") as f:
+        while True:
+            datos = f.read(chunk)
+            if not datos:
+                return h.hexdigest()
+            h.update(datos)
+
+def guardar_df(df, destino_sin_ext):
+    """Guardar en Feather (o .csv.gz sin pyarrow); devuelve la ruta"""
+    df = df.reset_index(drop=True)
+    df.columns = [str(col) for col in df.columns]
+    destino = destino_sin_ext + EXTENSION
+    tmp = destino + ".tmp"
+    if EXTENSION == ".feather":
+        try:
+            df.to_feather(tmp)
+        except (TypeError, ValueError):
+            # Columnas de texto con valores mezclados: Arrow exige un tipo por columna
+            df.astype({col: "string" for col in df.columns if df[col].dtype == object}).to_feather(tmp)
+    else:
+        df.to_csv(tmp, index=False, compression="gzip")
+    os.replace(tmp, destino)
+    return destino
+
+def cargar_df(path):
+    if path.endswith(".feather"):
+        return pd.read_feather(path)
+    return pd.read_csv(path, compression="gzip")
+
+class CacheFrecuencias:
+    """Índice ruta -> (tamaño, mtime, hash, archivo de caché)"""
+    def __init__(self, cache_dir):
+        self.cache_dir = os.path.abspath(cache_dir)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.indice = {}
+        try:
+            with open(os.path.join(self.cache_dir, INDICE), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == PARSER_VERSION:
+                self.indice = data["archivos"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def vigente(self, path, encoding):
+        """Archivo de caché si el .txt no cambió (mismo tamaño y mtime); si no, None"""
+        entrada = self.indice.get(os.path.abspath(path))
+        if entrada is None or entrada["encoding"] != encoding:
+            return None
+        st = os.stat(path)
+        if entrada["size"] != st.st_size or entrada["mtime_ns"] != st.st_mtime_ns:
+            return None
+        blob = os.path.join(self.cache_dir, entrada["blob"])
+        return blob if os.path.exists(blob) else None
+
+    def registrar(self, path, encoding, size, mtime_ns, digest, blob):
+        self.indice[os.path.abspath(path)] = {
+            "size": size, "mtime_ns": mtime_ns, "hash": digest,
+            "encoding": encoding, "blob": os.path.basename(blob),
+        }
+
+    def podar(self, input_folder, vigentes):
+        """Quitar del índice los .txt borrados de input_folder y los blobs huérfanos"""
+        carpeta = os.path.abspath(input_folder) + os.sep
+        vigentes = {os.path.abspath(p) for p in vigentes}
+        for path in [p for p in self.indice if p.startswith(carpeta) and p not in vigentes]:
+            del self.indice[path]
+        usados = {entrada["blob"] for entrada in self.indice.values()}
+        for nombre in os.listdir(self.cache_dir):
+            if nombre != INDICE and nombre not in usados and not nombre.endswith(".tmp"):
+                os.remove(os.path.join(self.cache_dir, nombre))
+
+    def guardar(self):
+        """Escritura atómica del índice"""
+        destino = os.path.join(self.cache_dir, INDICE)
+        with open(destino + ".tmp", "w", encoding="utf-8") as f:
+            json.dump({"version": PARSER_VERSION, "archivos": self.indice}, f)
+        os.replace(destino + ".tmp", destino)
+
+def parsear_a_cache(args):
+    """Trabajo del pool: hash, parseo solo si el contenido es nuevo, y guardado en caché"""
+    file_path, encoding, cache_dir, leer_txt = args
+    st = os.stat(file_path)
+    digest = hash_archivo(file_path, encoding)
+    base = os.path.join(cache_dir, digest)
+    if os.path.exists(base + EXTENSION):
+        # Mismo contenido ya parseado (archivo tocado, renombrado o copiado)
+        return file_path, st.st_size, st.st_mtime_ns, digest, base + EXTENSION, "caché"
+    blob = guardar_df(leer_txt(file_path, encoding), base)
+    return file_path, st.st_size, st.st_mtime_ns, digest, blob, "parseado"
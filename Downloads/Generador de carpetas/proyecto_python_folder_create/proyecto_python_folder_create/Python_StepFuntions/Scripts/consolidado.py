@@ -0,0 +1,167 @@
+"""Consolidado de los registros de frecuencia: una tabla larga y estadísticas vectorizadas
+
+De cada DataFrame parseado (frecuencias.leer_txt o la caché) se toman la
+marca de tiempo, si la hay, y las columnas numéricas, y todo se apila en una
+sola tabla larga con tipos fijos:
+
+    archivo (category) | instante (datetime64) | variable (category) | valor (float64)
+
+Las estadísticas por archivo y globales (mínimo, máximo, media, desviación,
+percentiles y muestras fuera de banda) y el remuestreo salen de groupby
+sobre esa tabla, sin bucles por fila ni trabajo a mano hoja por hoja.
+"""
+import importlib.util
+import os
+import re
+import warnings
+
+import numpy as np
+import pandas as pd
+
+PERCENTILES = (0.01, 0.05, 0.5, 0.95, 0.99)
+BANDA = (59.8, 60.2)  # Hz: banda normal de la red de 60 Hz
+REMUESTREO = "1min"
+GLOBAL = "(todos)"
+MAX_FILAS_EXCEL = 1_048_575
+_TIEMPO = re.compile(r"fecha|hora|date|time|tiempo|instante", re.I)
+_FRECUENCIA = re.compile(r"frec|freq|hz", re.I)
+
+
+def _numerica(serie):
+    """float64; el texto con coma decimal también cuenta y lo no numérico queda NaN"""
+    if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+        return serie.to_numpy(dtype="float64", na_value=np.nan)
+    texto = serie.astype("string").str.strip().str.replace(",", ".", regex=False)
+    return pd.to_numeric(texto, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+def _instante(df, columnas):
+    """datetime64[ns] de la marca de tiempo (Fecha y Hora separadas se unen), o None"""
+    if not columnas:
+        return None
+    serie = df[columnas[0]]
+    if len(columnas) == 1 and pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.to_numpy(dtype="datetime64[ns]")
+    texto = serie.astype("string")
+    for columna in columnas[1:2]:
+        texto = texto + " " + df[columna].astype("string")
+    with warnings.catch_warnings():
+        # Sin formato reconocible pandas avisa y cae al parser lento: el resultado sigue siendo válido
+        warnings.simplefilter("ignore", UserWarning)
+        instante = pd.to_datetime(texto, errors="coerce", dayfirst=True)
+    if instante.isna().all():
+        return None
+    return instante.to_numpy(dtype="datetime64[ns]")
+
+def columnas_tipadas(df):
+    """(instante o None, {variable: ndarray float64}) de un DataFrame parseado"""
+    de_tiempo = [col for col in df.columns if _TIEMPO.search(str(col))]
+    instante = _instante(df, de_tiempo)
+    variables = {}
+    for col in df.columns:
+        if instante is not None and col in de_tiempo[:2]:
+            continue
+        valores = _numerica(df[col])
+        if not np.isnan(valores).all():
+            variables[str(col).strip()] = valores
+    return instante, variables
+
+class Consolidador:
+    """Acumula las columnas tipadas de cada archivo mientras pasan hacia el Excel"""
+    def __init__(self):
+        self.archivos = []
+        self._partes = []  # (índice de archivo, instante, variable, valores)
+
+    def agregar(self, file_path, df):
+        instante, variables = columnas_tipadas(df)
+        indice = len(self.archivos)
+        self.archivos.append(os.path.basename(file_path))
+        for variable, valores in variables.items():
+            self._partes.append((indice, instante, variable, valores))
+
+    def recorrer(self, frames):
+        """Dejar pasar (ruta, df, origen) quedándose con sus columnas"""
+        for file_path, df, origen in frames:
+            self.agregar(file_path, df)
+            yield file_path, df, origen
+
+    def tabla(self):
+        """Tabla larga de todos los archivos, sin las celdas vacías"""
+        variables = sorted({variable for _, _, variable, _ in self._partes})
+        codigo = {variable: i for i, variable in enumerate(variables)}
+        largos = np.array([len(valores) for *_, valores in self._partes], dtype=np.int64)
+        valor = np.concatenate([valores for *_, valores in self._partes]) if self._partes else np.empty(0)
+        archivo = np.repeat(np.array([i for i, *_ in self._partes], dtype=np.int32), largos)
+        variable = np.repeat(np.array([codigo[v] for _, _, v, _ in self._partes], dtype=np.int32), largos)
+        instante = np.concatenate([
+            inst if inst is not None else np.full(len(valores), np.datetime64("NaT"), dtype="datetime64[ns]")
+            for _, inst, _, valores in self._partes]) if self._partes else np.empty(0, dtype="datetime64[ns]")
+        validos = ~np.isnan(valor)
+        return pd.DataFrame({
+            "archivo": pd.Categorical.from_codes(archivo[validos], categories=self.archivos),
+            "instante": instante[validos],
+            "variable": pd.Categorical.from_codes(variable[validos], categories=variables),
+            "valor": valor[validos],
+        })
+
+def variables_de_frecuencia(tabla, nombres=None):
+    """Variables a las que se aplica la banda: las indicadas o las que parecen frecuencia"""
+    categorias = list(tabla["variable"].cat.categories)
+    if nombres:
+        return [v for v in categorias if v in nombres]
+    return [v for v in categorias if _FRECUENCIA.search(v)]
+
+def estadisticas(tabla, banda=BANDA, frecuencias=None):
+    """Resumen por archivo y variable más una fila global por variable (archivo = "(todos)")"""
+    frecuencias = variables_de_frecuencia(tabla, frecuencias)
+    en_banda = tabla["variable"].cat.categories.isin(frecuencias)[tabla["variable"].cat.codes]
+    fuera = en_banda & ((tabla["valor"].to_numpy() < banda[0]) | (tabla["valor"].to_numpy() > banda[1]))
+    datos = tabla.assign(fuera_banda=fuera)
+
+    def _resumen(claves):
+        grupos = datos.groupby(claves, observed=True)
+        resumen = grupos["valor"].agg(["count", "min", "max", "mean", "std"])
+        cuantiles = grupos["valor"].quantile(list(PERCENTILES)).unstack()
+        cuantiles.columns = [f"p{round(p * 100)}" for p in PERCENTILES]
+        resumen = resumen.join(cuantiles)
+        resumen["fuera_banda"] = grupos["fuera_banda"].sum()
+        resumen["pct_fuera_banda"] = resumen["fuera_banda"] / resumen["count"] * 100
+        if "instante" in datos:
+            resumen["desde"] = grupos["instante"].min()
+            resumen["hasta"] = grupos["instante"].max()
+        return resumen
+
+    por_archivo = _resumen(["archivo", "variable"]).reset_index()
+    total = _resumen(["variable"]).reset_index()
+    total.insert(0, "archivo", GLOBAL)
+    resumen = pd.concat([por_archivo.astype({"archivo": "object", "variable": "object"}),
+                         total.astype({"variable": "object"})], ignore_index=True)
+    # La banda no aplica a las demás variables
+    resumen.loc[~resumen["variable"].isin(frecuencias), ["fuera_banda", "pct_fuera_banda"]] = np.nan
+    return resumen
+
+def remuestrear(tabla, regla=REMUESTREO):
+    """Mínimo, máximo y media por archivo, variable e intervalo fijo (regla: "10s", "1min", "1h"...)"""
+    con_tiempo = tabla[tabla["instante"].notna()]
+    if con_tiempo.empty:
+        return None
+    intervalo = con_tiempo["instante"].dt.floor(regla).rename("intervalo")
+    grupos = con_tiempo.groupby([con_tiempo["archivo"], con_tiempo["variable"], intervalo], observed=True)
+    return grupos["valor"].agg(["count", "min", "max", "mean"]).reset_index()
+
+def ruta_tabla(output_file):
+    """Tabla junto al Excel: Parquet si hay motor disponible, si no CSV comprimido"""
+    base = os.path.splitext(output_file)[0] + "_consolidado"
+    if importlib.util.find_spec("pyarrow") is not None:
+        return base + ".parquet"
+    return base + ".csv.gz"
+
+def escribir_tabla(tabla, path):
+    """Guardar la tabla larga según la extensión (.parquet, .feather o .csv[.gz])"""
+    tmp = path + ".tmp"
+    if path.endswith(".parquet"):
+        tabla.to_parquet(tmp, index=False)
+    elif path.endswith(".feather"):
+        tabla.to_feather(tmp)
+    else:
+        tabla.to_csv(tmp, index=False, compression="gzip" if path.endswith(".gz") else None)
+    os.replace(tmp, path)
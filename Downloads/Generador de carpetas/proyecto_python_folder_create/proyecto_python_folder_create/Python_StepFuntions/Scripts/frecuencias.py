@@ -0,0 +1,229 @@
+"""Conversor de registros de frecuencia .txt a Excel
+
+Uso:
+    python frecuencias.py CARPETA_TXT SALIDA.xlsx [--jobs N] [--encoding utf-8]
+    python frecuencias.py CARPETA_TXT SALIDA.xlsx --consolidado --banda 59.8 60.2 --sin-hojas
+
+Los .txt se parsean en paralelo (pool de procesos) y cada uno se escribe en su
+propia hoja con un libro openpyxl en modo write-only, que vuelca las filas a
+disco en lugar de mantener todo el libro en memoria. Los DataFrames parseados
+quedan en una caché columnar (cache_frecuencias.py): en la siguiente ejecución
+solo se parsean los .txt nuevos o modificados.
+
+Con --consolidado todos los registros se apilan además en una tabla larga
+(SALIDA_consolidado.parquet) y el Excel recibe las hojas "Resumen" (estadísticas
+por archivo y globales) y "Remuestreo" (ver consolidado.py).
+"""
+import argparse
+import io
+import math
+import os
+import re
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from cache_frecuencias import CacheFrecuencias, cargar_df, parsear_a_cache
+from consolidado import (BANDA, MAX_FILAS_EXCEL, REMUESTREO, Consolidador, escribir_tabla, estadisticas,
+                         remuestrear, ruta_tabla)
+
+# Separador de columnas: 2 o más espacios/tabuladores (sin cruzar saltos de línea)
+_SEPARADOR = re.compile(r"[^\S\r\n]{2,}")
+# Carácter de control que no aparece en los registros: permite usar el parser C de pandas
+_SEP_C = "\x1f"
+_NOMBRE_HOJA_INVALIDO = re.compile(r"[\[\]:*?/\\]")
+MAX_HOJA = 31
+CACHE_DIR = ".frecuencias_cache"
+
+
+def leer_txt(file_path, encoding="utf-8"):
+    """Leer un .txt de columnas separadas por 2+ espacios con el parser C de pandas"""
+    with open(file_path, "r", encoding=encoding) as f:
+        texto = _SEPARADOR.sub(_SEP_C, f.read())
+    df = pd.read_csv(io.StringIO(texto), sep=_SEP_C, engine="c")
+    # Limpieza: eliminar filas vacías
+    df.dropna(how="all", inplace=True)
+    return df
+
+def listar_txt(input_folder):
+    """Archivos .txt de la carpeta, en orden alfabético"""
+    return sorted(
+        os.path.join(input_folder, name) for name in os.listdir(input_folder)
+        if name.lower().endswith(".txt")
+    )
+
+def nombre_hoja(file_path, usados):
+    """Nombre de hoja válido (máx 31 caracteres) y único dentro del libro"""
+    base = _NOMBRE_HOJA_INVALIDO.sub("_", os.path.splitext(os.path.basename(file_path))[0])[:MAX_HOJA] or "Hoja"
+    nombre, n = base, 1
+    while nombre.lower() in usados:
+        n += 1
+        sufijo = f"~{n}"
+        nombre = base[:MAX_HOJA - len(sufijo)] + sufijo
+    usados.add(nombre.lower())
+    return nombre
+
+def _celda(valor):
+    # NaN y NA (columnas "string" de la caché): celda vacía
+    if valor is pd.NA or (isinstance(valor, float) and math.isnan(valor)):
+        return None
+    return valor
+
+def escribir_hoja(wb, nombre, df):
+    """Añadir un DataFrame como hoja de un libro write-only"""
+    ws = wb.create_sheet(title=nombre)
+    ws.append([str(col) for col in df.columns])
+    for fila in df.itertuples(index=False, name=None):
+        ws.append([_celda(v) for v in fila])
+
+def _parsear(args):
+    file_path, encoding = args
+    return leer_txt(file_path, encoding)
+
+def _frames_directos(archivos, jobs, encoding):
+    """Parsear en el pool y entregar (ruta, df) en orden con como mucho 2 * jobs en memoria"""
+    ventana = max(1, 2 * jobs)
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pendientes = deque()
+        for file_path in archivos:
+            if len(pendientes) >= ventana:
+                # Entregar en orden el más antiguo antes de lanzar más trabajo
+                anterior, future = pendientes.popleft()
+                yield anterior, future.result(), "parseado"
+            pendientes.append((file_path, executor.submit(_parsear, (file_path, encoding))))
+        while pendientes:
+            anterior, future = pendientes.popleft()
+            yield anterior, future.result(), "parseado"
+
+def _frames_desde_cache(archivos, jobs, encoding, cache_dir, input_folder):
+    """Parsear solo los .txt nuevos o modificados y leer el resto de la caché"""
+    cache = CacheFrecuencias(cache_dir)
+    blobs, origen = {}, {}
+    faltan = []
+    for file_path in archivos:
+        blob = cache.vigente(file_path, encoding)
+        if blob:
+            blobs[file_path], origen[file_path] = blob, "caché"
+        else:
+            faltan.append(file_path)
+
+    if faltan:
+        trabajos = [(file_path, encoding, cache.cache_dir, leer_txt) for file_path in faltan]
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for file_path, size, mtime_ns, digest, blob, como in executor.map(parsear_a_cache, trabajos):
+                cache.registrar(file_path, encoding, size, mtime_ns, digest, blob)
+                blobs[file_path], origen[file_path] = blob, como
+    cache.podar(input_folder, archivos)
+    cache.guardar()
+
+    for file_path in archivos:
+        yield file_path, cargar_df(blobs[file_path]), origen[file_path]
+
+def exportar_excel(frames, output_file, on_file=None, hojas=True, finales=None):
+    """Etapa final: escribir cada (ruta, df) como hoja de un libro write-only.
+
+    Con hojas=False no se escriben las hojas por archivo; finales(wb), si se
+    indica, añade hojas al final una vez recorridos todos los archivos.
+    """
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    usados = set()
+    total = 0
+    for file_path, df, origen in frames:
+        if on_file:
+            on_file(os.path.basename(file_path), origen)
+        if hojas:
+            escribir_hoja(wb, nombre_hoja(file_path, usados), df)
+        total += 1
+    if finales:
+        finales(wb)
+    if not wb.worksheets:
+        wb.create_sheet(title="Sin datos")
+    wb.save(output_file)
+    return total
+
+def _hojas_consolidado(consolidador, tabla_path, banda, frecuencias, regla):
+    """finales() de exportar_excel: tabla larga a disco y hojas Resumen y Remuestreo"""
+    def finales(wb):
+        tabla = consolidador.tabla()
+        escribir_tabla(tabla, tabla_path)
+        if tabla.empty:
+            return
+        escribir_hoja(wb, "Resumen", estadisticas(tabla, banda, frecuencias))
+        remuestreo = remuestrear(tabla, regla) if regla else None
+        if remuestreo is not None and len(remuestreo) <= MAX_FILAS_EXCEL:
+            escribir_hoja(wb, "Remuestreo", remuestreo)
+    return finales
+
+def convertir(input_folder, output_file, jobs=None, encoding="utf-8", on_file=None, cache_dir=None,
+              consolidado=None, banda=BANDA, frecuencias=None, remuestreo=REMUESTREO, hojas=True):
+    """Convertir todos los .txt de input_folder a un Excel con una hoja por archivo.
+
+    Con cache_dir solo se parsean los .txt nuevos o modificados; el resto se
+    lee de la caché columnar. Con consolidado (ruta .parquet/.feather/.csv[.gz])
+    se escribe también la tabla larga y las hojas Resumen y Remuestreo.
+    """
+    archivos = listar_txt(input_folder)
+    jobs = jobs or os.cpu_count() or 1
+    if cache_dir:
+        frames = _frames_desde_cache(archivos, jobs, encoding, cache_dir, input_folder)
+    else:
+        frames = _frames_directos(archivos, jobs, encoding)
+    finales = None
+    if consolidado:
+        consolidador = Consolidador()
+        frames = consolidador.recorrer(frames)
+        finales = _hojas_consolidado(consolidador, consolidado, banda, frecuencias, remuestreo)
+    return exportar_excel(frames, output_file, on_file, hojas, finales)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convertir registros de frecuencia .txt a Excel")
+    parser.add_argument("input_folder", help="carpeta con archivos .txt")
+    parser.add_argument("output_file", help="Excel de salida (.xlsx)")
+    parser.add_argument("--jobs", "-j", type=int, help="procesos de parseo (por defecto: núcleos)")
+    parser.add_argument("--encoding", default="utf-8", help="codificación de los .txt (por defecto utf-8)")
+    parser.add_argument("--cache", help="carpeta de caché (por defecto .frecuencias_cache junto al Excel)")
+    parser.add_argument("--no-cache", action="store_true", help="parsear siempre todos los .txt")
+    parser.add_argument("--consolidado", nargs="?", const="", metavar="TABLA",
+                        help="apilar todos los registros en una tabla larga (por defecto SALIDA_consolidado.parquet, "
+                             "o .csv.gz sin pyarrow) y añadir las hojas Resumen y Remuestreo")
+    parser.add_argument("--banda", nargs=2, type=float, default=BANDA, metavar=("MIN", "MAX"),
+                        help=f"banda de frecuencia normal en Hz (por defecto {BANDA[0]} {BANDA[1]})")
+    parser.add_argument("--variable", action="append", metavar="COLUMNA",
+                        help="columna de frecuencia a la que se aplica la banda (repetible; "
+                             "por defecto las que contienen frec/freq/Hz)")
+    parser.add_argument("--remuestreo", default=REMUESTREO,
+                        help=f"intervalo del remuestreo, p. ej. 10s, 1min, 1h (por defecto {REMUESTREO}; '' = sin)")
+    parser.add_argument("--sin-hojas", action="store_true",
+                        help="no escribir una hoja por archivo (solo el consolidado)")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.input_folder):
+        print(f"No existe la carpeta: {args.input_folder}", file=sys.stderr)
+        return 2
+
+    cache_dir = None
+    if not args.no_cache:
+        cache_dir = args.cache or os.path.join(os.path.dirname(os.path.abspath(args.output_file)), CACHE_DIR)
+
+    consolidado = None
+    if args.consolidado is not None:
+        consolidado = args.consolidado or ruta_tabla(args.output_file)
+    elif args.sin_hojas:
+        print("--sin-hojas requiere --consolidado", file=sys.stderr)
+        return 2
+
+    total = convertir(args.input_folder, args.output_file, args.jobs, args.encoding,
+                      on_file=lambda name, origen: print(f"Procesando: {name} ({origen})"),
+                      cache_dir=cache_dir, consolidado=consolidado, banda=tuple(args.banda),
+                      frecuencias=args.variable, remuestreo=args.remuestreo, hojas=not args.sin_hojas)
+    print(f"\n✅ Archivo Excel generado en: {args.output_file} ({total} archivos)")
+    if consolidado:
+        print(f"✅ Tabla consolidada en: {consolidado}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
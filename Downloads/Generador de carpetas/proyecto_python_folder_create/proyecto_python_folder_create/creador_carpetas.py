@@ -1,15 +1,20 @@
+import time
+INICIO = time.perf_counter()  # referencia para medir el arranque
+
 from pathlib import Path
+import sys
 import tkinter as tk
 from tkinter import messagebox, filedialog, ttk
-import zipfile
-import os
-import threading
-from PIL import Image, ImageDraw, ImageTk
-import io
-import json
+import queue
 import winsound
 from datetime import datetime
 from dataclasses import dataclass, asdict
+from ct_inv.diario import DiarioOperaciones, FiltroDiario
+from ct_inv.estructura import crear_estructura, ruta_inversor, validar_parametros
+from ct_inv.persistencia import ConfigStore
+from ct_inv.politica import METODOS, Codec, CompressionPolicy
+# PIL, ct_inv.compresion, ct_inv.planta y ct_inv.vigilancia (zipfile, multiprocessing,
+# pools) se importan al usarse: no retrasan la aparición de la ventana
 
 # ==================== TEMAS ====================
 THEMES = {
@@ -42,6 +47,36 @@ THEMES = {
 }
 
 CONFIG_FILE = Path(__file__).parent / "config.json"
+HISTORY_FILE = Path(__file__).parent / "historial.sqlite3"
+ICON_FILE = Path(__file__).parent / "cathaleia.png"
+ICON_CACHE = Path(__file__).parent / "cathaleia_150.png"  # ya redimensionado: Tk lo carga sin PIL
+ICON_SIZE = (150, 150)
+STARTUP_BUDGET_MS = 500  # presupuesto hasta que la ventana es visible
+
+def generar_icono_cache(origen=ICON_FILE, destino=ICON_CACHE, size=ICON_SIZE):
+    """Redimensionar el logo con PIL (LANCZOS) y guardarlo como PNG para tk.PhotoImage"""
+    from PIL import Image
+    img = Image.open(origen).resize(size, Image.Resampling.LANCZOS)
+    tmp = destino.with_name(destino.name + ".tmp")
+    img.save(tmp, format="PNG")
+    tmp.replace(destino)
+
+def _ms_desde_inicio():
+    """Milisegundos desde que Windows creó el proceso (o desde INICIO en otros sistemas)"""
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            from ctypes import wintypes
+            creacion, salida, kernel, usuario = (wintypes.FILETIME() for _ in range(4))
+            if ctypes.windll.kernel32.GetProcessTimes(ctypes.windll.kernel32.GetCurrentProcess(),
+                                                      ctypes.byref(creacion), ctypes.byref(salida),
+                                                      ctypes.byref(kernel), ctypes.byref(usuario)):
+                # FILETIME: intervalos de 100 ns desde 1601-01-01
+                intervalos = (creacion.dwHighDateTime << 32) | creacion.dwLowDateTime
+                return (time.time() - (intervalos / 1e7 - 11644473600)) * 1000
+        except (AttributeError, OSError):
+            pass
+    return (time.perf_counter() - INICIO) * 1000
 
 @dataclass
 class Operation:
@@ -54,46 +89,6 @@ class Operation:
     def to_dict(self):
         return asdict(self)
 
-class CompressionWorker(threading.Thread):
-    """Thread worker para comprimir sin bloquear UI"""
-    def __init__(self, inv_dir, zip_path, compression_level, callback, error_callback):
-        super().__init__(daemon=True)
-        self.inv_dir = inv_dir
-        self.zip_path = zip_path
-        self.compression_level = compression_level
-        self.callback = callback
-        self.error_callback = error_callback
-    
-    def run(self):
-        try:
-            def _add_empty_dir(zipf, arcdir):
-                info = zipfile.ZipInfo(str(arcdir).replace("\\", "/") + "/")
-                zipf.writestr(info, b"")
-            
-            with zipfile.ZipFile(self.zip_path, "w", compression=self.compression_level) as zf:
-                total_files = sum([len(files) for _, _, files in os.walk(self.inv_dir)])
-                processed = 0
-                
-                for root, dirs, files in os.walk(self.inv_dir):
-                    root_path = Path(root)
-                    for d in dirs:
-                        dir_path = root_path / d
-                        arcdir = dir_path.relative_to(self.inv_dir.parent)
-                        _add_empty_dir(zf, arcdir)
-                    
-                    for f in files:
-                        file_path = root_path / f
-                        arcname = file_path.relative_to(self.inv_dir.parent)
-                        zf.write(file_path, arcname)
-                        processed += 1
-                        if total_files > 0:
-                            progress = (processed / total_files) * 100
-                            self.callback(progress, self.inv_dir.name)
-            
-            self.callback(100, self.inv_dir.name)
-        except Exception as e:
-            self.error_callback(str(e), self.inv_dir.name)
-
 class StyledButton(tk.Button):
     """Botón con estilo Cathaleia y animaciones"""
     def __init__(self, parent, text, command, primary=False, theme_colors=None, **kwargs):
@@ -127,8 +122,52 @@ class StyledButton(tk.Button):
         self.hover_bg = self.theme["accent_dark"] if self.primary else self.theme["button_hover"]
         self.configure(bg=self.normal_bg, fg=self.theme["text"])
 
+class ThemeRegistry:
+    """Papel de cada opción de color de los widgets en el tema.
+
+    Cada widget se registra al crearse, p. ej. add(label, bg="bg_secondary", fg="text");
+    apply() reconfigura solo los registrados, sin recorrer el árbol de widgets.
+    Los registrados sin papeles (StyledButton) se actualizan con update_theme().
+    """
+    def __init__(self, theme):
+        self.theme = theme
+        self._widgets = {}  # ruta Tk del widget -> (widget, papeles)
+    
+    def add(self, widget, **roles):
+        """Registrar widget y aplicarle ya el tema actual; devuelve el widget"""
+        if roles:
+            widget.configure(**{opcion: self.theme[clave] for opcion, clave in roles.items()})
+        self._widgets[str(widget)] = (widget, roles)
+        return widget
+    
+    def forget(self, raiz):
+        """Olvidar raiz y sus descendientes (p. ej. al cerrar un Toplevel)"""
+        ruta = str(raiz)
+        for nombre in [n for n in self._widgets if n == ruta or n.startswith(ruta + ".")]:
+            del self._widgets[nombre]
+    
+    def apply(self, theme):
+        self.theme = theme
+        for nombre, (widget, roles) in list(self._widgets.items()):
+            try:
+                if roles:
+                    widget.configure(**{opcion: theme[clave] for opcion, clave in roles.items()})
+                else:
+                    widget.update_theme(theme)
+            except tk.TclError:
+                del self._widgets[nombre]  # destruido sin pasar por forget()
+
+def _tamano(n):
+    """Bytes en la unidad más legible (KB, MB, GB)"""
+    for unidad in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unidad == "GB":
+            return f"{n:.0f} {unidad}" if unidad == "B" else f"{n:.1f} {unidad}"
+        n /= 1024
+
 class ComprensorApp:
-    def __init__(self, root):
+    FRAME_MS = 33  # ~30 fps para refrescar el progreso
+    
+    def __init__(self, root, medir_arranque=False):
         self.root = root
         self.root.title("Compresor de Carpetas CT/INV")
         self.root.geometry("1000x900")
@@ -136,56 +175,139 @@ class ComprensorApp:
         self.root.resizable(True, True)
         
         self.ruta_destino = Path.cwd()
-        self.compression_level = zipfile.ZIP_DEFLATED
+        self.compression_policy = CompressionPolicy.auto()
+        self.compression_incremental = False
+        self.compression_dedup = False
+        self.compression_catalog = True  # registrar cada ZIP en el catálogo de la planta
+        self.compression_workers = None  # None: default_workers() al comprimir
+        self.compression_pool = "thread"
+        self.metrics_log = None         # log JSON por líneas de cada compresión
+        self.metrics_prometheus = None  # archivo para el textfile collector de Prometheus
+        self.archive_destination = None  # carpeta o s3://bucket/prefijo al que se envía cada ZIP
         self.icon_image = None
+        self.medir_arranque = medir_arranque
+        self.startup_ms = {}
         self.current_theme = "dark"
-        self.operations_history = []
-        self.buttons = []
+        self.diario = DiarioOperaciones(HISTORY_FILE)
+        self.tema = ThemeRegistry(THEMES["dark"])
+        self.scheduler = None
+        self.vigilante = None
+        self.plano_future = None
+        self._error_hasta = 0.0  # hasta cuándo se mantiene un error de compresión en el rótulo
+        self.arbol = None         # ArbolPlanta de ruta_destino, se inicia en _finish_startup
+        self._arbol_version = -1  # versión del árbol dibujada en el panel Planta
+        self.config_store = ConfigStore(CONFIG_FILE)
+        # El resto de la interfaz se construye cuando la ventana ya se ve
+        self.root.bind("<Map>", self._on_first_map, add="+")
         
         self._load_config()
         self._load_icon()
         self._center_window()
         self._create_ui()
         self._bind_keyboard_shortcuts()
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
     
     def _load_config(self):
         """Cargar configuración guardada"""
         try:
-            if CONFIG_FILE.exists():
-                with open(CONFIG_FILE, 'r') as f:
-                    config = json.load(f)
-                    self.current_theme = config.get("theme", "dark")
-                    self.ruta_destino = Path(config.get("last_path", str(Path.cwd())))
-                    self.operations_history = [
-                        Operation(**op) for op in config.get("history", [])
-                    ][-10:]
+            config = self.config_store.load()
+            if config:
+                self.current_theme = config.get("theme", "dark")
+                self.ruta_destino = Path(config.get("last_path", str(Path.cwd())))
+                workers = config.get("compression_workers")
+                self.compression_workers = int(workers) if workers else None
+                self.compression_pool = config.get("compression_pool", self.compression_pool)
+                self.compression_incremental = bool(config.get("compression_incremental", False))
+                self.compression_dedup = bool(config.get("compression_dedup", False))
+                self.compression_catalog = bool(config.get("compression_catalog", True))
+                self.metrics_log = config.get("metrics_log")
+                self.metrics_prometheus = config.get("metrics_prometheus")
+                self.archive_destination = config.get("archive_destination")
+                if "compression" in config:
+                    self.compression_policy = CompressionPolicy.from_dict(config["compression"])
+                if config.get("history") and self.diario.vacio():
+                    # Migrar el historial que antes se guardaba dentro de config.json
+                    self.diario.registrar_varias(
+                        (op["timestamp"], op["tipo"], op["descripcion"], op["estado"])
+                        for op in config["history"])
         except Exception as e:
             print(f"Error cargando config: {e}")
     
     def _save_config(self):
-        """Guardar configuración"""
+        """Guardar configuración (escritura agrupada y atómica en segundo plano)"""
         try:
             config = {
                 "theme": self.current_theme,
                 "last_path": str(self.ruta_destino),
-                "history": [op.to_dict() for op in self.operations_history[-10:]]
+                "compression_workers": self.compression_workers,
+                "compression_pool": self.compression_pool,
+                "compression": self.compression_policy.to_dict(),
+                "compression_incremental": self.compression_incremental,
+                "compression_dedup": self.compression_dedup,
+                "compression_catalog": self.compression_catalog,
+                "metrics_log": self.metrics_log,
+                "metrics_prometheus": self.metrics_prometheus,
+                "archive_destination": self.archive_destination,
             }
-            with open(CONFIG_FILE, 'w') as f:
-                json.dump(config, f, indent=2)
+            self.config_store.save(config)
         except Exception as e:
             print(f"Error guardando config: {e}")
     
     def _load_icon(self):
-        """Cargar ícono desde cathaleia.png"""
+        """Cargar el ícono ya redimensionado (cathaleia_150.png) sin PIL, si está al día"""
         try:
-            icon_path = Path(__file__).parent / "cathaleia.png"
-            if icon_path.exists():
-                img = Image.open(icon_path)
-                img = img.resize((150, 150), Image.Resampling.LANCZOS)
-                self.icon_image = ImageTk.PhotoImage(img)
-        except Exception as e:
+            if ICON_CACHE.exists() and (not ICON_FILE.exists()
+                                        or ICON_CACHE.stat().st_mtime >= ICON_FILE.stat().st_mtime):
+                self.icon_image = tk.PhotoImage(file=str(ICON_CACHE))
+        except (OSError, tk.TclError) as e:
             print(f"Error al cargar ícono: {e}")
     
+    def _build_icon_cache(self):
+        """Crear la caché del ícono con PIL; sin PIL (o sin permiso de escritura) reducir el PNG con Tk"""
+        if self.icon_image is not None or not ICON_FILE.exists():
+            return
+        try:
+            try:
+                generar_icono_cache()
+                self.icon_image = tk.PhotoImage(file=str(ICON_CACHE))
+            except (ImportError, OSError):
+                original = tk.PhotoImage(file=str(ICON_FILE))
+                factor = -(-max(original.width(), original.height()) // ICON_SIZE[0])
+                self.icon_image = original.subsample(max(1, factor))
+        except (OSError, tk.TclError) as e:
+            print(f"Error al cargar ícono: {e}")
+            return
+        self.icon_label.config(image=self.icon_image)
+    
+    def _on_first_map(self, event):
+        if event.widget is not self.root or "visible" in self.startup_ms:
+            return
+        self.startup_ms["visible"] = round(_ms_desde_inicio())
+        # Temporizador y no after_idle: update_idletasks() (en _center_window) no lo ejecuta
+        # antes de que _create_ui haya terminado
+        self.root.after(1, self._finish_startup)
+    
+    def _finish_startup(self):
+        """Segunda etapa del arranque: secciones de la columna derecha e ícono"""
+        theme = THEMES[self.current_theme]
+        self._create_section(self.right_column, "Comprimir", self._build_compress_section, theme)
+        self._create_section(self.right_column, "Estado", self._build_status_section, theme)
+        self._create_section(self.right_column, "Historial", self._build_history_section, theme)
+        self._create_section(self.left_column, "Planta", self._build_plant_section, theme)
+        self._iniciar_arbol()
+        self.root.after(self.PLANTA_MS, self._poll_arbol)
+        self._build_icon_cache()
+        self.root.update_idletasks()
+        self.startup_ms["completa"] = round(_ms_desde_inicio())
+        
+        visible, completa = self.startup_ms["visible"], self.startup_ms["completa"]
+        if visible > STARTUP_BUDGET_MS:
+            print(f"Arranque lento: ventana visible en {visible} ms (presupuesto {STARTUP_BUDGET_MS} ms)")
+        if self.medir_arranque:
+            print(f"Ventana visible: {visible} ms | Interfaz completa: {completa} ms | "
+                  f"Presupuesto: {STARTUP_BUDGET_MS} ms")
+            self._on_close()
+    
     def _center_window(self):
         self.root.update_idletasks()
         x = (self.root.winfo_screenwidth() // 2) - 500
@@ -200,34 +322,12 @@ class ComprensorApp:
     def _toggle_theme(self):
         """Cambiar entre tema oscuro y claro"""
         self.current_theme = "light" if self.current_theme == "dark" else "dark"
-        theme = THEMES[self.current_theme]
-        
-        self.root.configure(bg=theme["bg"])
-        self._update_theme_recursive(self.root, theme)
+        self.tema.apply(THEMES[self.current_theme])
+        self.theme_btn.config(text="🌙 Oscuro" if self.current_theme == "dark" else "☀️ Claro")
         
         self._play_sound(440, 100)
         self._save_config()
     
-    def _update_theme_recursive(self, widget, theme):
-        """Actualizar tema recursivamente"""
-        try:
-            if isinstance(widget, StyledButton):
-                widget.update_theme(theme)
-            elif isinstance(widget, tk.Frame):
-                widget.configure(bg=theme["bg"])
-            elif isinstance(widget, tk.Label):
-                if widget.cget("bg") in [THEMES["dark"]["bg"], THEMES["light"]["bg"]]:
-                    widget.configure(bg=theme["bg"], fg=theme["text"])
-                elif widget.cget("bg") in [THEMES["dark"]["bg_secondary"], THEMES["light"]["bg_secondary"]]:
-                    widget.configure(bg=theme["bg_secondary"], fg=theme["text"])
-            elif isinstance(widget, tk.Entry):
-                widget.configure(bg=theme["input_bg"], fg=theme["text"], insertbackground=theme["accent"])
-        except:
-            pass
-        
-        for child in widget.winfo_children():
-            self._update_theme_recursive(child, theme)
-    
     def _play_sound(self, frequency=800, duration=100):
         """Reproducir sonido de notificación"""
         try:
@@ -238,212 +338,454 @@ class ComprensorApp:
     def _create_ui(self):
         """Crear interfaz estilo Cathaleia - Layout 2 columnas"""
         theme = THEMES[self.current_theme]
-        self.root.configure(bg=theme["bg"])
+        tema = self.tema
+        tema.theme = theme
+        tema.add(self.root, bg="bg")
         
-        main_frame = tk.Frame(self.root, bg=theme["bg"])
+        main_frame = tema.add(tk.Frame(self.root), bg="bg")
         main_frame.pack(fill="both", expand=True)
         
         # === HEADER ===
-        header = tk.Frame(main_frame, bg=theme["bg"])
+        header = tema.add(tk.Frame(main_frame), bg="bg")
         header.pack(fill="x", pady=(15, 15), padx=20)
         
-        header_container = tk.Frame(header, bg=theme["bg"])
+        header_container = tema.add(tk.Frame(header), bg="bg")
         header_container.pack(fill="x", pady=(0, 10))
         
-        text_frame = tk.Frame(header_container, bg=theme["bg"])
+        text_frame = tema.add(tk.Frame(header_container), bg="bg")
         text_frame.pack(side="left", fill="both", expand=True)
         
-        tk.Label(text_frame, text="COMPRESOR DE", font=('Segoe UI', 24, 'bold'),
-                bg=theme["bg"], fg=theme["text"]).pack(anchor="w")
+        tema.add(tk.Label(text_frame, text="COMPRESOR DE", font=('Segoe UI', 24, 'bold')),
+                 bg="bg", fg="text").pack(anchor="w")
         
-        title_frame = tk.Frame(text_frame, bg=theme["bg"])
+        title_frame = tema.add(tk.Frame(text_frame), bg="bg")
         title_frame.pack(anchor="w", pady=(0, 5))
-        tk.Label(title_frame, text="CARPETAS", font=('Segoe UI', 24, 'bold'),
-                bg=theme["bg"], fg=theme["text"]).pack(side="left")
-        tk.Label(title_frame, text="CT/INV", font=('Segoe UI', 24, 'bold'),
-                bg=theme["bg"], fg=theme["accent"]).pack(side="left", padx=(10, 0))
+        tema.add(tk.Label(title_frame, text="CARPETAS", font=('Segoe UI', 24, 'bold')),
+                 bg="bg", fg="text").pack(side="left")
+        tema.add(tk.Label(title_frame, text="CT/INV", font=('Segoe UI', 24, 'bold')),
+                 bg="bg", fg="accent").pack(side="left", padx=(10, 0))
         
-        if self.icon_image:
-            icon_frame = tk.Frame(header_container, bg=theme["bg"])
-            icon_frame.pack(side="right", padx=(20, 0))
-            tk.Label(icon_frame, image=self.icon_image, bg=theme["bg"]).pack()
+        icon_frame = tema.add(tk.Frame(header_container), bg="bg")
+        icon_frame.pack(side="right", padx=(20, 0))
+        # Sin caché del ícono, la imagen llega en _finish_startup
+        self.icon_label = tema.add(tk.Label(icon_frame, image=self.icon_image or ""), bg="bg")
+        self.icon_label.pack()
         
         # Controles del tema
-        controls_frame = tk.Frame(header, bg=theme["bg"])
+        controls_frame = tema.add(tk.Frame(header), bg="bg")
         controls_frame.pack(fill="x", pady=(0, 10))
         
-        tk.Label(controls_frame, text="Tema:", font=('Segoe UI', 9),
-                bg=theme["bg"], fg=theme["text_secondary"]).pack(side="left", padx=(0, 5))
+        tema.add(tk.Label(controls_frame, text="Tema:", font=('Segoe UI', 9)),
+                 bg="bg", fg="text_secondary").pack(side="left", padx=(0, 5))
         
-        theme_btn = tk.Button(controls_frame, text="🌙 Oscuro" if self.current_theme == "dark" else "☀️ Claro",
-                             command=self._toggle_theme, bg=theme["accent"], fg=theme["text"],
-                             font=('Segoe UI', 9, 'bold'), relief='flat', bd=0, padx=12, pady=6, cursor='hand2')
-        theme_btn.pack(side="left")
+        self.theme_btn = tema.add(
+            tk.Button(controls_frame, text="🌙 Oscuro" if self.current_theme == "dark" else "☀️ Claro",
+                      command=self._toggle_theme, font=('Segoe UI', 9, 'bold'), relief='flat', bd=0,
+                      padx=12, pady=6, cursor='hand2'),
+            bg="accent", fg="text")
+        self.theme_btn.pack(side="left")
         
-        tk.Label(controls_frame, text=" | Ctrl+T para cambiar | Ctrl+H para historial",
-                font=('Segoe UI', 8), bg=theme["bg"], fg=theme["text_secondary"]).pack(side="left", padx=5)
+        tema.add(tk.Label(controls_frame, text=" | Ctrl+T para cambiar | Ctrl+H para historial",
+                          font=('Segoe UI', 8)), bg="bg", fg="text_secondary").pack(side="left", padx=5)
         
-        tk.Label(header, text="Organiza y comprime tus carpetas con facilidad",
-                font=('Segoe UI', 9), bg=theme["bg"], fg=theme["text_secondary"]).pack(anchor="w")
+        tema.add(tk.Label(header, text="Organiza y comprime tus carpetas con facilidad", font=('Segoe UI', 9)),
+                 bg="bg", fg="text_secondary").pack(anchor="w")
         
-        sep = tk.Frame(main_frame, bg=theme["accent"], height=1)
+        sep = tema.add(tk.Frame(main_frame, height=1), bg="accent")
         sep.pack(fill="x", pady=(0, 15))
         
         # === CONTENEDOR DE 2 COLUMNAS ===
-        content_frame = tk.Frame(main_frame, bg=theme["bg"])
+        content_frame = tema.add(tk.Frame(main_frame), bg="bg")
         content_frame.pack(fill="both", expand=True, padx=15, pady=(0, 15))
         
-        left_column = tk.Frame(content_frame, bg=theme["bg"])
-        left_column.pack(side="left", fill="both", expand=True, padx=(0, 10))
-        
-        self._create_section(left_column, "Crear Carpetas", self._build_create_section, theme)
+        self.left_column = tema.add(tk.Frame(content_frame), bg="bg")
+        self.left_column.pack(side="left", fill="both", expand=True, padx=(0, 10))
         
-        right_column = tk.Frame(content_frame, bg=theme["bg"])
-        right_column.pack(side="right", fill="both", expand=True, padx=(10, 0))
+        self._create_section(self.left_column, "Crear Carpetas", self._build_create_section, theme)
         
-        self._create_section(right_column, "Comprimir", self._build_compress_section, theme)
-        self._create_section(right_column, "Estado", self._build_status_section, theme)
-        self._create_section(right_column, "Historial", self._build_history_section, theme)
+        # Planta, Comprimir, Estado e Historial se añaden en _finish_startup
+        self.right_column = tema.add(tk.Frame(content_frame), bg="bg")
+        self.right_column.pack(side="right", fill="both", expand=True, padx=(10, 0))
     
     def _create_section(self, parent, title, builder, theme):
         """Crear sección reutilizable"""
-        section = tk.Frame(parent, bg=theme["bg_secondary"], relief="flat")
+        section = self.tema.add(tk.Frame(parent, relief="flat"), bg="bg_secondary")
         section.pack(fill="x", padx=15, pady=8)
         
-        title_label = tk.Label(section, text=title, font=('Segoe UI', 12, 'bold'),
-                              bg=theme["bg_secondary"], fg=theme["accent"])
+        title_label = self.tema.add(tk.Label(section, text=title, font=('Segoe UI', 12, 'bold')),
+                                    bg="bg_secondary", fg="accent")
         title_label.pack(anchor="w", padx=15, pady=(12, 10))
         
-        separator = tk.Frame(section, bg=theme["accent"], height=2)
+        separator = self.tema.add(tk.Frame(section, height=2), bg="accent")
         separator.pack(fill="x", padx=15, pady=(0, 12))
         
-        content = tk.Frame(section, bg=theme["bg_secondary"])
+        content = self.tema.add(tk.Frame(section), bg="bg_secondary")
         content.pack(fill="both", expand=True, padx=15, pady=(0, 15))
         
         builder(content, theme)
     
     def _build_create_section(self, parent, theme):
         """Sección: Crear carpetas con validación mejorada"""
-        tk.Label(parent, text="Carpeta destino:", font=('Segoe UI', 10, 'bold'),
-                bg=theme["bg_secondary"], fg=theme["text"]).pack(anchor="w", pady=(0, 5))
+        tema = self.tema
+        tema.add(tk.Label(parent, text="Carpeta destino:", font=('Segoe UI', 10, 'bold')),
+                 bg="bg_secondary", fg="text").pack(anchor="w", pady=(0, 5))
         
-        self.lbl_ruta = tk.Label(parent, text=f"{self.ruta_destino}",
-                                font=('Segoe UI', 8), bg=theme["bg_secondary"],
-                                fg=theme["text_secondary"], wraplength=350, justify="left")
+        self.lbl_ruta = tema.add(tk.Label(parent, text=f"{self.ruta_destino}", font=('Segoe UI', 8),
+                                          wraplength=350, justify="left"),
+                                 bg="bg_secondary", fg="text_secondary")
         self.lbl_ruta.pack(anchor="w", pady=(0, 10), fill="x")
         
-        StyledButton(parent, "Seleccionar carpeta", self.seleccionar_carpeta, 
-                    primary=True, theme_colors=theme).pack(fill="x", pady=(0, 15))
+        tema.add(StyledButton(parent, "Seleccionar carpeta", self.seleccionar_carpeta,
+                              primary=True, theme_colors=theme)).pack(fill="x", pady=(0, 15))
         
         self._create_input_field(parent, "Número CT:", "nombre_ct", theme)
         self._create_input_field(parent, "Número Inversor (1-50):", "num_inv", theme, only_digits=True)
         self._create_input_field(parent, "Cantidad de Strings (1-100):", "entry_subcarpetas", theme, only_digits=True)
         
-        tk.Label(parent, text="Tipo de dispositivo:", font=('Segoe UI', 10, 'bold'),
-                bg=theme["bg_secondary"], fg=theme["text"]).pack(anchor="w", pady=(10, 8))
+        tema.add(tk.Label(parent, text="Tipo de dispositivo:", font=('Segoe UI', 10, 'bold')),
+                 bg="bg_secondary", fg="text").pack(anchor="w", pady=(10, 8))
         
         self.dispositivo = tk.StringVar(value="PVPM")
-        dispo_frame = tk.Frame(parent, bg=theme["bg_secondary"])
+        dispo_frame = tema.add(tk.Frame(parent), bg="bg_secondary")
         dispo_frame.pack(fill="x", pady=(0, 15))
         
-        tk.Radiobutton(dispo_frame, text="PVPM", variable=self.dispositivo, value="PVPM",
-                      bg=theme["bg_secondary"], fg=theme["text"], selectcolor=theme["accent"],
-                      font=('Segoe UI', 10)).pack(side="left", padx=(0, 20))
-        tk.Radiobutton(dispo_frame, text="METREL", variable=self.dispositivo, value="METREL",
-                      bg=theme["bg_secondary"], fg=theme["text"], selectcolor=theme["accent"],
-                      font=('Segoe UI', 10)).pack(side="left")
+        tema.add(tk.Radiobutton(dispo_frame, text="PVPM", variable=self.dispositivo, value="PVPM",
+                                font=('Segoe UI', 10)),
+                 bg="bg_secondary", fg="text", selectcolor="accent").pack(side="left", padx=(0, 20))
+        tema.add(tk.Radiobutton(dispo_frame, text="METREL", variable=self.dispositivo, value="METREL",
+                                font=('Segoe UI', 10)),
+                 bg="bg_secondary", fg="text", selectcolor="accent").pack(side="left")
         
-        StyledButton(parent, "✓ Crear carpetas", self.crear_carpetas, 
-                    primary=True, theme_colors=theme).pack(fill="x")
+        tema.add(StyledButton(parent, "✓ Crear carpetas", self.crear_carpetas,
+                              primary=True, theme_colors=theme)).pack(fill="x")
+        
+        tema.add(StyledButton(parent, "📋 Crear planta desde plano (CSV/JSON/YAML)", self.crear_desde_plano,
+                              theme_colors=theme)).pack(fill="x", pady=(8, 0))
     
     def _build_compress_section(self, parent, theme):
         """Sección: Comprimir"""
-        StyledButton(parent, "📦 Comprimir carpeta CT", self.comprimir_carpetas_ct, 
-                    primary=True, theme_colors=theme).pack(fill="x")
+        tema = self.tema
+        opts_frame = tema.add(tk.Frame(parent), bg="bg_secondary")
+        opts_frame.pack(fill="x", pady=(0, 8))
+        
+        tema.add(tk.Label(opts_frame, text="Método:", font=('Segoe UI', 10, 'bold')),
+                 bg="bg_secondary", fg="text").pack(side="left", padx=(0, 5))
+        self.metodo_var = tk.StringVar(value=self.compression_policy.defecto.metodo)
+        ttk.Combobox(opts_frame, textvariable=self.metodo_var, values=list(METODOS),
+                     state="readonly", width=9).pack(side="left", padx=(0, 15))
+        
+        tema.add(tk.Label(opts_frame, text="Nivel:", font=('Segoe UI', 10, 'bold')),
+                 bg="bg_secondary", fg="text").pack(side="left", padx=(0, 5))
+        nivel = self.compression_policy.defecto.nivel
+        self.nivel_var = tk.StringVar(value="" if nivel is None else str(nivel))
+        tema.add(tk.Spinbox(opts_frame, from_=0, to=22, textvariable=self.nivel_var, width=4,
+                            font=('Segoe UI', 10), relief="solid", bd=1),
+                 bg="input_bg", fg="text", buttonbackground="bg_secondary").pack(side="left")
+        
+        self.auto_var = tk.BooleanVar(value=self.compression_policy.almacenar_incompresibles)
+        tema.add(tk.Checkbutton(parent, text="No recomprimir archivos ya comprimidos", variable=self.auto_var,
+                                font=('Segoe UI', 9)),
+                 bg="bg_secondary", fg="text", selectcolor="accent").pack(anchor="w")
+        
+        self.incremental_var = tk.BooleanVar(value=self.compression_incremental)
+        tema.add(tk.Checkbutton(parent, text="Incremental: actualizar INV-x.zip solo con lo modificado",
+                                variable=self.incremental_var, font=('Segoe UI', 9)),
+                 bg="bg_secondary", fg="text", selectcolor="accent").pack(anchor="w")
+        
+        self.dedup_var = tk.BooleanVar(value=self.compression_dedup)
+        tema.add(tk.Checkbutton(parent, text="Comprimir una sola vez los archivos repetidos entre INV",
+                                variable=self.dedup_var, font=('Segoe UI', 9)),
+                 bg="bg_secondary", fg="text", selectcolor="accent").pack(anchor="w")
+        
+        self.catalog_var = tk.BooleanVar(value=self.compression_catalog)
+        tema.add(tk.Checkbutton(parent, text="Registrar los ZIP en el catálogo de la planta (buscar y extraer)",
+                                variable=self.catalog_var, font=('Segoe UI', 9)),
+                 bg="bg_secondary", fg="text", selectcolor="accent").pack(anchor="w", pady=(0, 10))
+        
+        self.btn_comprimir = tema.add(StyledButton(parent, "📦 Comprimir carpeta CT", self.comprimir_carpetas_ct,
+                                                   primary=True, theme_colors=theme))
+        self.btn_comprimir.pack(fill="x")
+        
+        self.btn_cancelar = tema.add(StyledButton(parent, "✖ Cancelar", self.cancelar_compresion,
+                                                  theme_colors=theme, state="disabled"))
+        self.btn_cancelar.pack(fill="x", pady=(8, 0))
+        
+        self.btn_vigilar = tema.add(StyledButton(parent, "👁 Vigilar carpeta (comprimir al llegar archivos)",
+                                                 self.alternar_vigilancia, theme_colors=theme))
+        self.btn_vigilar.pack(fill="x", pady=(8, 0))
+    
+    def _build_plant_section(self, parent, theme):
+        """Sección: Planta (índice CT/INV con archivos, tamaño y estado del ZIP)"""
+        tema = self.tema
+        self.lbl_planta = tema.add(tk.Label(parent, text="Indexando...", font=('Segoe UI', 9)),
+                                   bg="bg_secondary", fg="text_secondary")
+        self.lbl_planta.pack(anchor="w", pady=(0, 8))
+        
+        tabla_frame = tema.add(tk.Frame(parent), bg="bg_secondary")
+        tabla_frame.pack(fill="both", expand=True)
+        columnas = ("archivos", "tamano", "estado")
+        self.tabla_planta = ttk.Treeview(tabla_frame, columns=columnas, height=8)
+        self.tabla_planta.heading("#0", text="CT / INV")
+        self.tabla_planta.column("#0", width=170)
+        for col, titulo, ancho in zip(columnas, ("Archivos", "Tamaño", "Estado"), (70, 80, 90)):
+            self.tabla_planta.heading(col, text=titulo)
+            self.tabla_planta.column(col, width=ancho, anchor="e" if col != "estado" else "w", stretch=False)
+        scrollbar = ttk.Scrollbar(tabla_frame, command=self.tabla_planta.yview)
+        self.tabla_planta.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        self.tabla_planta.pack(side="left", fill="both", expand=True)
+        
+        tema.add(tk.Label(parent, text="Selecciona CT o INV para comprimir solo esas (Ctrl+clic: varias)",
+                          font=('Segoe UI', 8)),
+                 bg="bg_secondary", fg="text_secondary").pack(anchor="w", pady=(6, 0))
+    
+    PLANTA_MS = 500   # refresco del panel Planta
+    ARBOL_S = 5.0     # intervalo de actualización del índice en segundo plano
+    
+    def _iniciar_arbol(self):
+        """(Re)indexar ruta_destino en segundo plano"""
+        from ct_inv.arbol import ArbolPlanta
+        if self.arbol is not None:
+            self.arbol.detener()
+        self.arbol = ArbolPlanta(self.ruta_destino)
+        self.arbol.iniciar(self.ARBOL_S)
+        self._arbol_version = -1
+        self.tabla_planta.delete(*self.tabla_planta.get_children())
+        self.lbl_planta.config(text="Indexando...")
+    
+    def _poll_arbol(self):
+        """Redibujar el panel Planta solo cuando el índice cambió (hilo de Tk)"""
+        arbol = self.arbol
+        if arbol is None:
+            return
+        if arbol.listo.is_set() and arbol.version != self._arbol_version:
+            self._arbol_version = arbol.version
+            self._dibujar_planta(arbol.filas())
+        self.root.after(self.PLANTA_MS, self._poll_arbol)
+    
+    def _dibujar_planta(self, filas):
+        """Actualizar las filas del panel conservando selección y CT desplegadas"""
+        tabla = self.tabla_planta
+        vistos = set()
+        posicion = {}
+        total_inv = total_archivos = total_bytes = 0
+        for ct, inv, strings, archivos, bytes_, estado in filas:
+            padre = "" if inv is None else ct
+            iid = ct if inv is None else f"{ct}/{inv}"
+            texto = f"{ct if inv is None else inv} ({strings} strings)"
+            valores = (archivos, _tamano(bytes_), estado)
+            if tabla.exists(iid):
+                tabla.item(iid, text=texto, values=valores)
+            else:
+                tabla.insert(padre, "end", iid=iid, text=texto, values=valores)
+            tabla.move(iid, padre, posicion.get(padre, 0))
+            posicion[padre] = posicion.get(padre, 0) + 1
+            vistos.add(iid)
+            if inv is None:
+                total_archivos += archivos
+                total_bytes += bytes_
+            else:
+                total_inv += 1
+        for ct in tabla.get_children(""):
+            for iid in tabla.get_children(ct):
+                if iid not in vistos:
+                    tabla.delete(iid)
+            if ct not in vistos:
+                tabla.delete(ct)
+        cts = posicion.get("", 0)
+        self.lbl_planta.config(text=f"{cts} CT, {total_inv} INV, {total_archivos} archivos, "
+                                    f"{_tamano(total_bytes)}" if cts else "Sin carpetas CT-* en la carpeta destino")
+    
+    def _inv_seleccionadas(self):
+        """{ruta de CT: [rutas de INV]} según la selección del panel Planta"""
+        if self.arbol is None or not self.arbol.listo.is_set():
+            return {}
+        seleccion = {}
+        for iid in self.tabla_planta.selection():
+            ct, _, inv = iid.partition("/")
+            carpeta_ct = self.arbol.raiz / ct
+            inversores = self.arbol.inversores(ct) or []
+            if inv:
+                inversores = [d for d in inversores if d.name == inv]
+            actuales = seleccion.setdefault(carpeta_ct, [])
+            actuales.extend(d for d in inversores if d not in actuales)
+        return {ct: sorted(invs) for ct, invs in seleccion.items() if invs}
     
     def _build_status_section(self, parent, theme):
         """Sección: Estado con detalles"""
-        self.lbl_detalle = tk.Label(parent, text="Esperando acción...",
-                                   font=('Segoe UI', 9), bg=theme["bg_secondary"],
-                                   fg=theme["text_secondary"])
+        # El color del texto de estos rótulos indica el resultado: solo el fondo sigue al tema
+        self.lbl_detalle = self.tema.add(tk.Label(parent, text="Esperando acción...", font=('Segoe UI', 9),
+                                                  fg=theme["text_secondary"]),
+                                         bg="bg_secondary")
         self.lbl_detalle.pack(anchor="w", pady=(0, 8))
         
         self.progress = ttk.Progressbar(parent, mode='determinate', length=500)
         self.progress.pack(fill="x", pady=(0, 12))
         
-        self.lbl_progreso = tk.Label(parent, text="Listo para comenzar",
-                                    font=('Segoe UI', 10, 'bold'),
-                                    bg=theme["bg_secondary"], fg=theme["success"])
+        self.lbl_progreso = self.tema.add(tk.Label(parent, text="Listo para comenzar",
+                                                   font=('Segoe UI', 10, 'bold'), fg=theme["success"]),
+                                          bg="bg_secondary")
         self.lbl_progreso.pack(anchor="w")
     
     def _build_history_section(self, parent, theme):
         """Sección: Historial de operaciones"""
-        tk.Label(parent, text="Últimas operaciones:", font=('Segoe UI', 9),
-                bg=theme["bg_secondary"], fg=theme["text_secondary"]).pack(anchor="w", pady=(0, 8))
+        tema = self.tema
+        tema.add(tk.Label(parent, text="Últimas operaciones:", font=('Segoe UI', 9)),
+                 bg="bg_secondary", fg="text_secondary").pack(anchor="w", pady=(0, 8))
         
-        hist_frame = tk.Frame(parent, bg=theme["input_bg"], relief="solid", bd=1)
+        hist_frame = tema.add(tk.Frame(parent, relief="solid", bd=1), bg="input_bg")
         hist_frame.pack(fill="both", expand=True)
         
         scrollbar = ttk.Scrollbar(hist_frame)
         scrollbar.pack(side="right", fill="y")
         
-        self.history_text = tk.Text(hist_frame, height=6, bg=theme["input_bg"],
-                                   fg=theme["text"], font=('Courier New', 8),
-                                   yscrollcommand=scrollbar.set, relief="flat", bd=0)
+        self.history_text = tema.add(tk.Text(hist_frame, height=6, font=('Courier New', 8),
+                                             yscrollcommand=scrollbar.set, relief="flat", bd=0),
+                                     bg="input_bg", fg="text")
         self.history_text.pack(side="left", fill="both", expand=True, padx=5, pady=5)
         scrollbar.config(command=self.history_text.yview)
         self.history_text.config(state="disabled")
         
         self._update_history_display()
     
-    def _update_history_display(self):
-        """Actualizar display del historial"""
+    HISTORY_PANEL = 5
+    HISTORY_PAGE = 200
+
+    def _update_history_display(self, op=None):
+        """Añadir op arriba del panel (o cargar las últimas si op es None)"""
         self.history_text.config(state="normal")
-        self.history_text.delete("1.0", tk.END)
-        
-        for op in reversed(self.operations_history[-5:]):
-            self.history_text.insert(tk.END, f"[{op.timestamp}] {op.tipo}\n")
-            self.history_text.insert(tk.END, f"  {op.descripcion}\n")
-            self.history_text.insert(tk.END, f"  Estado: {op.estado}\n\n")
-        
+        if op is None:
+            self.history_text.delete("1.0", tk.END)
+            ultimas = [Operation(*fila[1:]) for fila in self.diario.ultimas(self.HISTORY_PANEL)]
+        else:
+            ultimas = [op]
+        for op in reversed(ultimas):
+            self.history_text.insert("1.0", f"[{op.timestamp}] {op.tipo}\n"
+                                            f"  {op.descripcion}\n"
+                                            f"  Estado: {op.estado}\n\n")
+        # 4 líneas por operación: descartar las que quedan por debajo del panel
+        self.history_text.delete(f"{self.HISTORY_PANEL * 4 + 1}.0", tk.END)
         self.history_text.config(state="disabled")
     
     def _show_history(self):
-        """Mostrar historial completo en ventana"""
-        history_window = tk.Toplevel(self.root)
+        """Historial completo paginado, con filtros y búsqueda sobre el diario"""
+        tema = self.tema
+        history_window = tema.add(tk.Toplevel(self.root), bg="bg")
         history_window.title("Historial Completo")
-        history_window.geometry("600x400")
+        history_window.geometry("900x500")
+        # Al cerrarla, sus widgets salen del registro del tema
+        history_window.bind("<Destroy>", lambda e: tema.forget(history_window)
+                            if e.widget is history_window else None)
         
         theme = THEMES[self.current_theme]
-        history_window.configure(bg=theme["bg"])
+        filtros = tema.add(tk.Frame(history_window), bg="bg")
+        filtros.pack(fill="x", padx=10, pady=(10, 5))
+        
+        tipo_var = tk.StringVar(value="Todos")
+        estado_var = tk.StringVar(value="Todos")
+        texto_var = tk.StringVar()
+        for etiqueta, var, valores in (("Tipo:", tipo_var, ["Todos"] + self.diario.tipos()),
+                                       ("Estado:", estado_var, ["Todos", "ÉXITO", "ERROR", "CANCELADO"])):
+            tema.add(tk.Label(filtros, text=etiqueta, font=('Segoe UI', 9)),
+                     bg="bg", fg="text").pack(side="left")
+            ttk.Combobox(filtros, textvariable=var, values=valores, state="readonly",
+                         width=12).pack(side="left", padx=(4, 12))
+        tema.add(tk.Label(filtros, text="Buscar:", font=('Segoe UI', 9)),
+                 bg="bg", fg="text").pack(side="left")
+        buscar = tema.add(tk.Entry(filtros, textvariable=texto_var, font=('Segoe UI', 9), relief="solid", bd=1),
+                          bg="input_bg", fg="text", insertbackground="accent")
+        buscar.pack(side="left", fill="x", expand=True, padx=(4, 0))
+        
+        tabla_frame = tema.add(tk.Frame(history_window), bg="bg")
+        tabla_frame.pack(fill="both", expand=True, padx=10)
+        columnas = ("timestamp", "tipo", "descripcion", "estado")
+        tabla = ttk.Treeview(tabla_frame, columns=columnas, show="headings")
+        for col, titulo, ancho in zip(columnas, ("Fecha", "Tipo", "Descripción", "Estado"), (140, 90, 420, 200)):
+            tabla.heading(col, text=titulo)
+            tabla.column(col, width=ancho, stretch=(col == "descripcion"))
+        scrollbar = ttk.Scrollbar(tabla_frame, command=tabla.yview)
+        tabla.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        tabla.pack(side="left", fill="both", expand=True)
+        
+        nav = tema.add(tk.Frame(history_window), bg="bg")
+        nav.pack(fill="x", padx=10, pady=10)
+        lbl_pagina = tema.add(tk.Label(nav, font=('Segoe UI', 9)), bg="bg", fg="text_secondary")
+        
+        # Solo se pide a SQLite la página visible (paginación por id)
+        estado = {"filtro": FiltroDiario(), "pagina": 0, "total": 0, "filas": [], "busqueda": None}
+        
+        def mostrar(filas):
+            if not filas:
+                return False
+            tabla.delete(*tabla.get_children())
+            for fila in filas:
+                tabla.insert("", "end", iid=fila[0], values=fila[1:])
+            estado["filas"] = filas
+            inicio = estado["pagina"] * self.HISTORY_PAGE
+            lbl_pagina.config(text=f"{inicio + 1}–{inicio + len(filas)} de {estado['total']}")
+            return True
+        
+        def recargar(*_):
+            estado["busqueda"] = None
+            estado["filtro"] = FiltroDiario(
+                tipo="" if tipo_var.get() == "Todos" else tipo_var.get(),
+                estado="" if estado_var.get() == "Todos" else estado_var.get(),
+                texto=texto_var.get().strip())
+            estado["pagina"] = 0
+            estado["total"] = self.diario.contar(estado["filtro"])
+            if not mostrar(self.diario.pagina(estado["filtro"], self.HISTORY_PAGE)):
+                tabla.delete(*tabla.get_children())
+                estado["filas"] = []
+                lbl_pagina.config(text="Sin operaciones")
+        
+        def siguiente():
+            if not estado["filas"]:
+                return
+            filas = self.diario.pagina(estado["filtro"], self.HISTORY_PAGE, antes_de=estado["filas"][-1][0])
+            if filas:
+                estado["pagina"] += 1
+                mostrar(filas)
         
-        text_widget = tk.Text(history_window, bg=theme["input_bg"], fg=theme["text"],
-                             font=('Courier New', 9), padx=10, pady=10)
-        text_widget.pack(fill="both", expand=True)
+        def anterior():
+            if estado["pagina"] == 0:
+                return
+            filas = self.diario.pagina(estado["filtro"], self.HISTORY_PAGE, despues_de=estado["filas"][0][0])
+            if filas:
+                estado["pagina"] -= 1
+                mostrar(filas)
+        
+        def programar_busqueda(*_):
+            # Esperar a que se deje de teclear antes de consultar
+            if estado["busqueda"] is not None:
+                history_window.after_cancel(estado["busqueda"])
+            estado["busqueda"] = history_window.after(250, recargar)
         
-        for op in reversed(self.operations_history):
-            text_widget.insert(tk.END, f"[{op.timestamp}] {op.tipo}\n")
-            text_widget.insert(tk.END, f"  {op.descripcion}\n")
-            text_widget.insert(tk.END, f"  Estado: {op.estado}\n\n")
+        tema.add(StyledButton(nav, "◀ Anterior", anterior, theme_colors=theme)).pack(side="left")
+        tema.add(StyledButton(nav, "Siguiente ▶", siguiente, theme_colors=theme)).pack(side="left", padx=(8, 0))
+        lbl_pagina.pack(side="right")
         
-        text_widget.config(state="disabled")
+        tipo_var.trace_add("write", recargar)
+        estado_var.trace_add("write", recargar)
+        texto_var.trace_add("write", programar_busqueda)
+        recargar()
+        buscar.focus_set()
     
     def _create_input_field(self, parent, label, attr_name, theme, only_digits=False):
         """Crear campo de entrada con validación"""
-        tk.Label(parent, text=label, font=('Segoe UI', 10, 'bold'),
-                bg=theme["bg_secondary"], fg=theme["text"]).pack(anchor="w", pady=(0, 4))
+        self.tema.add(tk.Label(parent, text=label, font=('Segoe UI', 10, 'bold')),
+                      bg="bg_secondary", fg="text").pack(anchor="w", pady=(0, 4))
         
-        entry_frame = tk.Frame(parent, bg=theme["bg_secondary"])
+        entry_frame = self.tema.add(tk.Frame(parent), bg="bg_secondary")
         entry_frame.pack(fill="x", pady=(0, 12))
         
-        entry = tk.Entry(parent, font=('Segoe UI', 10), 
-                        bg=theme["input_bg"], fg=theme["text"],
-                        insertbackground=theme["accent"],
-                        relief="solid", bd=1, highlightthickness=0)
+        entry = self.tema.add(tk.Entry(parent, font=('Segoe UI', 10), relief="solid", bd=1, highlightthickness=0),
+                              bg="input_bg", fg="text", insertbackground="accent")
         entry.pack(fill="x")
         
         def on_change(*args):
             content = entry.get()
+            theme = THEMES[self.current_theme]
             if only_digits and content and not content.isdigit():
                 entry.configure(fg=theme["error"])
             else:
@@ -459,17 +801,19 @@ class ComprensorApp:
             self.ruta_destino = Path(ruta_elegida)
             self.lbl_ruta.config(text=str(self.ruta_destino))
             self._save_config()
+            if self.arbol is not None:
+                self._iniciar_arbol()
     
     def _add_operation(self, tipo, descripcion, estado):
         """Agregar operación al historial"""
         now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         op = Operation(timestamp=now, tipo=tipo, descripcion=descripcion, estado=estado)
-        self.operations_history.append(op)
-        if len(self.operations_history) > 50:
-            self.operations_history = self.operations_history[-50:]
+        try:
+            self.diario.registrar(**op.to_dict())
+        except Exception as e:
+            print(f"Error guardando historial: {e}")
         
-        self._update_history_display()
-        self._save_config()
+        self._update_history_display(op)
     
     def crear_carpetas(self):
         """Crea estructura de carpetas CT/INV/String con validación mejorada"""
@@ -492,46 +836,43 @@ class ComprensorApp:
                 self._add_operation("CREATE", f"CT-{nombreCT}", "ERROR: Validación")
                 return
             
-            if not numero_name_inversor.isdigit():
-                messagebox.showerror("Error", "Inversor debe ser un número")
-                return
-            if not strings.isdigit():
-                messagebox.showerror("Error", "Strings debe ser un número")
-                return
-            
-            numero_inv_int = int(numero_name_inversor)
-            strings_int = int(strings)
-            
-            if numero_inv_int < 1 or numero_inv_int > 50:
-                messagebox.showerror("Error", "El inversor debe estar entre 1 y 50")
-                return
-            if strings_int < 1 or strings_int > 100:
-                messagebox.showerror("Error", "Los strings deben estar entre 1 y 100")
+            try:
+                _, strings_int = validar_parametros(numero_name_inversor, strings, nombreDivice)
+            except ValueError as e:
+                messagebox.showerror("Error", str(e))
                 return
             
             theme = THEMES[self.current_theme]
             self.lbl_detalle.config(text=f"Creando: CT-{nombreCT}/INV-{numero_name_inversor}-{nombreDivice}", 
                                    fg=theme["accent"])
             self.lbl_progreso.config(text="Creando carpetas...", fg=theme["accent"])
-            self.root.update()
             
             ruta = self.ruta_destino
-            for i in range(1, strings_int + 1):
-                carpeta_ct = ruta / f"CT-{nombreCT}" / f"INV-{numero_name_inversor}-{nombreDivice}" / f"String-{i}"
-                carpeta_ct.mkdir(parents=True, exist_ok=True)
-                progress = (i / strings_int) * 100
-                self.progress['value'] = progress
-                self.root.update()
+            # Las String que el índice ya conoce no se vuelven a crear
+            existentes = set()
+            if self.arbol is not None and self.arbol.listo.is_set():
+                existentes = self.arbol.strings(f"CT-{nombreCT}", f"INV-{numero_name_inversor}-{nombreDivice}") or set()
+                existentes &= {f"String-{i}" for i in range(1, strings_int + 1)}
+                if not ruta_inversor(ruta, nombreCT, numero_name_inversor, nombreDivice).is_dir():
+                    existentes = set()  # índice desfasado: la INV se borró
+            carpeta_inv = crear_estructura(ruta, nombreCT, numero_name_inversor, strings, nombreDivice,
+                                           existentes=existentes)
+            creadas = strings_int - len(existentes)
+            if self.arbol is not None and creadas:
+                self.arbol.registrar(carpeta_inv)
             
             self.progress['value'] = 100
-            self.lbl_progreso.config(text=f"✓ Se crearon {strings_int} carpetas", fg=theme["success"])
-            self.lbl_detalle.config(text=f"Completado: {strings_int} carpetas creadas", fg=theme["success"])
+            self.lbl_progreso.config(text=f"✓ Se crearon {creadas} carpetas", fg=theme["success"])
+            detalle = f"Completado: {creadas} carpetas creadas"
+            if existentes:
+                detalle += f", {len(existentes)} ya existían"
+            self.lbl_detalle.config(text=detalle, fg=theme["success"])
             
             self._play_sound(700, 150)
             self._add_operation("CREATE", f"CT-{nombreCT} ({strings_int} strings)", "ÉXITO")
             
             messagebox.showinfo("Éxito", 
-                f"Se crearon {strings_int} carpetas en:\n"
+                f"Se crearon {creadas} carpetas ({len(existentes)} ya existían) en:\n"
                 f"{ruta}/CT-{nombreCT}/INV-{numero_name_inversor}-{nombreDivice}")
         except Exception as e:
             theme = THEMES[self.current_theme]
@@ -539,80 +880,345 @@ class ComprensorApp:
             self._add_operation("CREATE", "Error", str(e))
             messagebox.showerror("Error", f"Error:\n{e}")
     
+    def crear_desde_plano(self):
+        """Crea toda una planta desde un plano CSV/JSON/YAML en segundo plano"""
+        if self.plano_future is not None and not self.plano_future.done():
+            return
+        plano = filedialog.askopenfilename(
+            title="Selecciona el plano de la planta",
+            filetypes=[("Plano de planta", "*.csv *.json *.yaml *.yml"), ("Todos", "*.*")])
+        if not plano:
+            return
+        from ct_inv.planta import leer_plano
+        try:
+            filas = leer_plano(plano)
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Plano inválido", str(e))
+            self._add_operation("CREATE", Path(plano).name, "ERROR: Plano")
+            return
+        
+        theme = THEMES[self.current_theme]
+        self.progress.config(mode="indeterminate")
+        self.progress.start(self.FRAME_MS)
+        self.lbl_progreso.config(text="Creando planta...", fg=theme["accent"])
+        self.lbl_detalle.config(text=f"Plano: {Path(plano).name} ({len(filas)} inversores)", fg=theme["accent"])
+        
+        from concurrent.futures import ThreadPoolExecutor
+        from ct_inv.planta import HILOS_POR_DEFECTO, generar_planta
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.plano_future = executor.submit(generar_planta, self.ruta_destino, filas, HILOS_POR_DEFECTO)
+        executor.shutdown(wait=False)
+        self.root.after(self.FRAME_MS, self._poll_plano, Path(plano).name)
+    
+    def _poll_plano(self, nombre_plano):
+        """Esperar el resultado de generar_planta sin bloquear la ventana"""
+        if not self.plano_future.done():
+            self.root.after(self.FRAME_MS, self._poll_plano, nombre_plano)
+            return
+        
+        theme = THEMES[self.current_theme]
+        self.progress.stop()
+        self.progress.config(mode="determinate")
+        try:
+            resumen = self.plano_future.result()
+        except Exception as e:
+            self.lbl_progreso.config(text="Error al crear carpetas", fg=theme["error"])
+            self._add_operation("CREATE", nombre_plano, str(e))
+            messagebox.showerror("Error", f"Error:\n{e}")
+            return
+        
+        self.progress['value'] = 100
+        estado = "ÉXITO" if not resumen.errores else f"ERROR: {len(resumen.errores)} carpetas"
+        color = theme["success"] if not resumen.errores else theme["warning"]
+        self.lbl_progreso.config(text=f"✓ Se crearon {resumen.creadas} carpetas", fg=color)
+        self.lbl_detalle.config(text=f"{resumen.cts} CT, {resumen.inversores} INV, {resumen.strings} strings "
+                                     f"en {resumen.segundos} s", fg=color)
+        self._play_sound(700, 150)
+        self._add_operation("CREATE", f"{nombre_plano}: {resumen.cts} CT / {resumen.inversores} INV "
+                                      f"({resumen.strings} strings)", estado)
+        
+        resumen_texto = (f"CT: {resumen.cts}\nInversores: {resumen.inversores}\nStrings: {resumen.strings}\n"
+                         f"Carpetas creadas: {resumen.creadas}\nYa existían: {resumen.existentes}")
+        if resumen.errores:
+            resumen_texto += "\n\nErrores:\n" + "\n".join(resumen.errores[:10])
+        messagebox.showinfo("Planta creada", resumen_texto)
+    
     def comprimir_carpetas_ct(self):
-        """Comprime cada INV dentro de CT seleccionada"""
+        """Comprime cada INV dentro de CT seleccionada (en segundo plano)"""
+        if self.scheduler is not None and self.scheduler.is_running():
+            return
         try:
-            carpeta_ct = filedialog.askdirectory(title="Selecciona la carpeta CT")
-            if not carpeta_ct:
-                return
-            
-            carpeta_ct_path = Path(carpeta_ct)
-            inv_dirs = [d for d in carpeta_ct_path.iterdir() if d.is_dir() and d.name.startswith("INV-")]
-            
-            if not inv_dirs:
+            self.compression_policy = self._policy_from_ui()
+            self.compression_incremental = self.incremental_var.get()
+            self.compression_dedup = self.dedup_var.get()
+            self.compression_catalog = self.catalog_var.get()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self._save_config()
+        from ct_inv.compresion import CompressionScheduler, buscar_inv, preparar_workers
+        try:
+            # Lo seleccionado en el panel Planta; si no hay selección, se elige una CT
+            seleccion = self._inv_seleccionadas()
+            if not seleccion:
+                carpeta_ct = filedialog.askdirectory(title="Selecciona la carpeta CT")
+                if not carpeta_ct:
+                    return
+                carpeta_ct_path = Path(carpeta_ct)
+                inversores = None
+                if self.arbol is not None and carpeta_ct_path.parent == self.arbol.raiz:
+                    inversores = self.arbol.inversores(carpeta_ct_path.name)
+                seleccion = {carpeta_ct_path: buscar_inv(carpeta_ct_path) if inversores is None else inversores}
+            if not any(seleccion.values()):
                 messagebox.showwarning("Aviso", "No hay carpetas INV-* para comprimir")
                 return
             
             theme = THEMES[self.current_theme]
             self.progress['value'] = 0
             self.lbl_progreso.config(text="Comprimiendo...", fg=theme["accent"])
-            self.root.update()
-            
-            creados = []
             
-            for idx, inv_dir in enumerate(inv_dirs):
-                self.lbl_detalle.config(text=f"Comprimiendo: {inv_dir.name}", fg=theme["accent"])
-                self.root.update()
-                
-                zip_name = f"{inv_dir.name}.zip"
-                zip_path = carpeta_ct_path / zip_name
-                
-                contador = 1
-                while zip_path.exists():
-                    zip_path = carpeta_ct_path / f"{inv_dir.name}_{contador}.zip"
-                    contador += 1
-                
-                def on_progress(progress, name):
-                    self.progress['value'] = progress
-                    self.lbl_detalle.config(text=f"Comprimiendo: {name} ({int(progress)}%)", fg=theme["accent"])
-                    self.root.update()
-                
-                def on_error(error, name):
-                    pass
-                
-                worker = CompressionWorker(inv_dir, zip_path, self.compression_level, on_progress, on_error)
-                worker.start()
-                worker.join()
-                
-                if zip_path.exists():
-                    creados.append(zip_path.name)
-                
-                progress_val = ((idx + 1) / len(inv_dirs)) * 100
-                self.progress['value'] = progress_val
-                self.root.update()
+            workers = []
+            for carpeta_ct_path, inversores in seleccion.items():
+                workers += preparar_workers(carpeta_ct_path, self.compression_policy, self.compression_incremental,
+                                            inversores=inversores)
+            destino = None
+            if self.archive_destination:
+                from ct_inv.envio import abrir_destino
+                destino = abrir_destino(self.archive_destination)
             
-            self.progress['value'] = 100
-            self.lbl_progreso.config(text=f"✓ {len(creados)} archivos comprimidos", fg=theme["success"])
-            self.lbl_detalle.config(text=f"Completado: {len(creados)} ZIPs creados", fg=theme["success"])
+            self.scheduler = CompressionScheduler(workers, max_workers=self.compression_workers,
+                                                  use_processes=self.compression_pool == "process",
+                                                  dedup=self.compression_dedup, catalogar=self.compression_catalog,
+                                                  destino=destino)
+            self.btn_comprimir.config(state="disabled")
+            self.btn_cancelar.config(state="normal")
+            self.scheduler.start()
+            self.root.after(self.FRAME_MS, self._poll_compression)
+        except Exception as e:
+            self._compression_failed(e)
+    
+    WATCH_MS = 250
+    
+    def alternar_vigilancia(self):
+        """Iniciar o detener la vigilancia de una CT o planta"""
+        if self.vigilante is not None:
+            self.vigilante.stop(wait=False)
+            self.btn_vigilar.config(text="Deteniendo vigilancia...", state="disabled")
+            return
+        try:
+            policy = self._policy_from_ui()
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        self.compression_catalog = self.catalog_var.get()
+        self._save_config()
+        carpeta = filedialog.askdirectory(title="Selecciona la carpeta CT o la planta a vigilar")
+        if not carpeta:
+            return
+        
+        from ct_inv.vigilancia import VigilanteCarpetas
+        self.vigilante = VigilanteCarpetas(carpeta, policy, self.compression_workers,
+                                           use_processes=self.compression_pool == "process",
+                                           catalogar=self.compression_catalog)
+        self.vigilante.start()
+        self.btn_vigilar.config(text=f"⏹ Dejar de vigilar {Path(carpeta).name}")
+        theme = THEMES[self.current_theme]
+        self.lbl_detalle.config(text=f"Vigilando {carpeta}", fg=theme["accent"])
+        self._add_operation("WATCH", str(carpeta), "INICIADO")
+        self.root.after(self.WATCH_MS, self._poll_vigilancia)
+    
+    def _poll_vigilancia(self):
+        """Mostrar las INV comprimidas por el vigilante (hilo de Tk)"""
+        vigilante = self.vigilante
+        if vigilante is None:
+            return
+        theme = THEMES[self.current_theme]
+        while True:
+            try:
+                event = vigilante.events.get_nowait()
+            except queue.Empty:
+                break
+            if event.kind == "detected":
+                self.lbl_detalle.config(text=f"Cambios en {event.name}: comprimiendo...", fg=theme["accent"])
+            elif event.kind == "done":
+                self.lbl_detalle.config(text=f"✓ {event.name} actualizado ({event.detail})", fg=theme["success"])
+                self._add_operation("WATCH", f"{event.name}: {event.detail}", "ÉXITO")
+            elif event.kind == "error":
+                self.lbl_detalle.config(text=f"✗ {event.name}: {event.detail}", fg=theme["error"])
+                self._add_operation("WATCH", event.name, f"ERROR: {event.detail}")
+            elif event.kind == "finished":
+                self.vigilante = None
+                self.btn_vigilar.config(text="👁 Vigilar carpeta (comprimir al llegar archivos)", state="normal")
+                self.lbl_detalle.config(text="Vigilancia detenida", fg=theme["text_secondary"])
+                return
+        self.root.after(self.WATCH_MS, self._poll_vigilancia)
+    
+    def _policy_from_ui(self):
+        """Política de compresión elegida en la sección Comprimir"""
+        nivel = self.nivel_var.get().strip()
+        if nivel and not nivel.isdigit():
+            raise ValueError("Nivel debe ser un número")
+        codec = Codec(self.metodo_var.get(), int(nivel) if nivel else None)
+        if self.auto_var.get():
+            policy = CompressionPolicy.auto(codec)
+            policy.por_extension.update(self.compression_policy.por_extension)
+            return policy
+        return CompressionPolicy(defecto=codec, almacenar_incompresibles=False)
+    
+    def cancelar_compresion(self):
+        """Cancelar la compresión en curso"""
+        if self.scheduler is not None and self.scheduler.is_running():
+            self.scheduler.cancel()
+            self.btn_cancelar.config(state="disabled")
+            self.lbl_progreso.config(text="Cancelando...", fg=THEMES[self.current_theme]["warning"])
+    
+    ERROR_VISIBLE_S = 3.0
+    
+    def _poll_compression(self):
+        """Vaciar la cola de eventos del planificador (hilo de Tk)"""
+        scheduler = self.scheduler
+        if scheduler is None:
+            return
+        theme = THEMES[self.current_theme]
+        latest = error = None
+        finished = False
+        inicio = time.perf_counter()
+        try:
+            while True:
+                try:
+                    event = scheduler.events.get_nowait()
+                except queue.Empty:
+                    break
+                if event.kind == "finished":
+                    finished = True
+                else:
+                    latest = event
+                    if event.kind == "error":
+                        error = event
             
-            self._play_sound(700, 200)
-            self._add_operation("COMPRESS", f"{len(creados)} archivos ZIP", "ÉXITO")
+            if latest is not None:
+                self.progress['value'] = latest.overall
+            if error is not None:
+                # El error queda a la vista unos segundos antes de volver al progreso
+                self.lbl_detalle.config(text=f"✗ {error.name}: {error.detail}", fg=theme["error"])
+                self._error_hasta = time.monotonic() + self.ERROR_VISIBLE_S
+            elif latest is not None and time.monotonic() >= self._error_hasta:
+                if latest.kind == "sent":
+                    accion = "Enviado"
+                else:
+                    accion = "Verificando" if latest.detail == "verificando" else "Comprimiendo"
+                self.lbl_detalle.config(
+                    text=f"{accion}: {latest.name} ({int(latest.progress)}%) - Total {int(latest.overall)}%",
+                    fg=theme["accent"])
             
-            messagebox.showinfo("Éxito", f"Se comprimieron {len(creados)} componentes.")
+            scheduler.metricas.registrar_ui(time.perf_counter() - inicio)
+            if finished:
+                self._finish_compression(scheduler)
+            else:
+                self.root.after(self.FRAME_MS, self._poll_compression)
         except Exception as e:
-            theme = THEMES[self.current_theme]
-            self.lbl_progreso.config(text="Error en compresión", fg=theme["error"])
-            self._add_operation("COMPRESS", "Error", str(e))
-            messagebox.showerror("Error", f"Error:\n{e}")
+            self._compression_failed(e)
+    
+    def _finish_compression(self, scheduler):
+        """Resumen al terminar la compresión"""
+        theme = THEMES[self.current_theme]
+        self.scheduler = None
+        self.btn_comprimir.config(state="normal")
+        self.btn_cancelar.config(state="disabled")
+        creados = [zip_path.name for zip_path in scheduler.completed]
+        self._export_metrics(scheduler)
+        if self.arbol is not None:
+            # El escaneo de cada worker ya está hecho: el índice se actualiza sin volver al disco
+            for worker in scheduler.workers:
+                if worker.manifest is not None:
+                    self.arbol.registrar(worker.inv_dir, worker.manifest)
+        
+        if scheduler.cancelled:
+            self.lbl_progreso.config(text=f"Cancelado: {len(creados)} archivos comprimidos", fg=theme["warning"])
+            self.lbl_detalle.config(text="Compresión cancelada: se reanudará donde quedó al volver a comprimir esta CT",
+                                    fg=theme["warning"])
+            self._add_operation("COMPRESS", f"{len(creados)} archivos ZIP", "CANCELADO")
+            return
+        
+        reutilizados = sum(w.stats["reutilizados"] for w in scheduler.workers)
+        reanudados = sum(w.stats["reanudados"] for w in scheduler.workers)
+        deduplicados = sum(w.stats["deduplicados"] for w in scheduler.workers)
+        detalle = f"Completado: {len(creados)} ZIPs creados, {len(scheduler.checksums)} verificados (SHA-256)"
+        if reutilizados:
+            detalle += f" ({reutilizados} archivos sin cambios reutilizados)"
+        if reanudados:
+            detalle += f" ({reanudados} archivos ya escritos antes de la interrupción)"
+        if deduplicados:
+            detalle += f" ({deduplicados} archivos repetidos comprimidos una sola vez)"
+        if scheduler.destino is not None:
+            detalle += f"; {len(scheduler.enviados)} enviados a {scheduler.destino}"
+        if scheduler.errores_envio:
+            errores = "\n".join(f"• {name}: {error}" for name, error in scheduler.errores_envio)
+            self._add_operation("SEND", f"{len(scheduler.errores_envio)} ZIP sin enviar", "ERROR")
+            messagebox.showwarning("Aviso", f"No se pudieron enviar al archivo central:\n{errores}")
+        
+        self.progress['value'] = 100
+        if scheduler.errors:
+            fallidos = len(scheduler.errors)
+            errores = "\n".join(f"• {name}: {error}" for name, error in scheduler.errors)
+            self.lbl_progreso.config(text=f"⚠ {len(creados)} archivos comprimidos, {fallidos} con error",
+                                     fg=theme["warning"])
+            self.lbl_detalle.config(text=detalle, fg=theme["warning"])
+            self._add_operation("COMPRESS", f"{len(creados)} archivos ZIP, {fallidos} INV con error",
+                                f"ERROR: {fallidos} con error")
+            messagebox.showwarning("Compresión con errores",
+                                   f"Se comprimieron {len(creados)} componentes; {fallidos} con error:\n{errores}")
+            return
+        
+        self.lbl_progreso.config(text=f"✓ {len(creados)} archivos comprimidos", fg=theme["success"])
+        self.lbl_detalle.config(text=detalle, fg=theme["success"])
+        
+        self._play_sound(700, 200)
+        self._add_operation("COMPRESS", f"{len(creados)} archivos ZIP", "ÉXITO")
+        
+        messagebox.showinfo("Éxito", f"Se comprimieron {len(creados)} componentes.")
     
-    def __del__(self):
-        """Guardar configuración al cerrar"""
+    def _export_metrics(self, scheduler):
+        """Escribir las métricas del lote si están configuradas en config.json"""
         try:
-            self._save_config()
-        except:
-            pass
+            if self.metrics_log:
+                scheduler.metricas.escribir_jsonl(self.metrics_log)
+            if self.metrics_prometheus:
+                scheduler.metricas.escribir_prometheus(self.metrics_prometheus)
+        except OSError as e:
+            print(f"Error exportando métricas: {e}")
+    
+    def _compression_failed(self, e):
+        theme = THEMES[self.current_theme]
+        if self.scheduler is not None:
+            self.scheduler.cancel()
+            self.scheduler = None
+        self.btn_comprimir.config(state="normal")
+        self.btn_cancelar.config(state="disabled")
+        self.lbl_progreso.config(text="Error en compresión", fg=theme["error"])
+        self._add_operation("COMPRESS", "Error", str(e))
+        messagebox.showerror("Error", f"Error:\n{e}")
+    
+    def _on_close(self):
+        """Cancelar trabajos pendientes y cerrar la ventana"""
+        if self.scheduler is not None:
+            self.scheduler.cancel()
+        if self.vigilante is not None:
+            self.vigilante.stop()
+        if self.arbol is not None:
+            self.arbol.detener()
+            self.arbol = None
+        self._save_config()
+        self.config_store.close()
+        self.diario.close()
+        self.root.destroy()
 
 if __name__ == "__main__":
+    # El ejecutable de PyInstaller relanza este script en cada proceso del pool
+    import multiprocessing
+    multiprocessing.freeze_support()
     ventana = tk.Tk()
-    app = ComprensorApp(ventana)
+    app = ComprensorApp(ventana, medir_arranque="--medir-arranque" in sys.argv)
     ventana.mainloop()
+    if app.medir_arranque:
+        sys.exit(0 if app.startup_ms.get("visible", float("inf")) <= STARTUP_BUDGET_MS else 1)
@@ -1,16 +1,20 @@
 # -*- mode: python ; coding: utf-8 -*-
 
+# El ícono se redimensiona una vez al compilar: el ejecutable lo carga con Tk
+# sin PIL, así que PIL queda fuera del paquete (menos que descomprimir al abrir)
+from PIL import Image
+Image.open('cathaleia.png').resize((150, 150), Image.Resampling.LANCZOS).save('cathaleia_150.png')
 
 a = Analysis(
     ['creador_carpetas.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('cathaleia.png', '.'), ('cathaleia_150.png', '.')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=['PIL', 'numpy', 'unittest', 'pydoc', 'doctest'],
     noarchive=False,
     optimize=0,
 )
@@ -22,11 +26,11 @@ exe = EXE(
     a.binaries,
     a.datas,
     [],
-    name='creador_carpetas',
+    name='Compresor_CT_INV',
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    upx=False,  # descomprimir las DLL con UPX en cada arranque cuesta más de lo que ahorra
     upx_exclude=[],
     runtime_tmpdir=None,
     console=False,
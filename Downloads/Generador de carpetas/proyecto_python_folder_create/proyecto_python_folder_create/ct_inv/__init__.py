@@ -0,0 +1,99 @@
+"""Núcleo sin interfaz gráfica para crear y comprimir carpetas CT/INV
+
+Los nombres se importan al primer uso (PEP 562): `import ct_inv` o
+`from ct_inv.estructura import ...` no cargan zipfile, multiprocessing ni
+los pools de compresión hasta que hacen falta, lo que acorta el arranque
+de la interfaz.
+"""
+import importlib
+from typing import TYPE_CHECKING
+
+_EXPORTS = {
+    "ArbolPlanta": "arbol",
+    "Catalogo": "catalogo",
+    "CatalogoError": "catalogo",
+    "ruta_catalogo": "catalogo",
+    "CompressionCancelled": "compresion",
+    "CompressionEvent": "compresion",
+    "CompressionScheduler": "compresion",
+    "CompressionWorker": "compresion",
+    "buscar_inv": "compresion",
+    "default_workers": "compresion",
+    "preparar_workers": "compresion",
+    "ruta_zip_libre": "compresion",
+    "Deduplicador": "dedup",
+    "DiarioOperaciones": "diario",
+    "FiltroDiario": "diario",
+    "DestinoCarpeta": "envio",
+    "DestinoS3": "envio",
+    "EnvioArchivos": "envio",
+    "EnvioError": "envio",
+    "abrir_destino": "envio",
+    "FileEntry": "escaneo",
+    "Manifest": "escaneo",
+    "escanear_inv": "escaneo",
+    "DISPOSITIVOS": "estructura",
+    "crear_estructura": "estructura",
+    "ruta_inversor": "estructura",
+    "validar_parametros": "estructura",
+    "IndiceZip": "incremental",
+    "ruta_indice": "incremental",
+    "MetricasTrabajo": "metricas",
+    "RegistroMetricas": "metricas",
+    "FilaPlanta": "planta",
+    "ResumenPlanta": "planta",
+    "generar_planta": "planta",
+    "leer_plano": "planta",
+    "METODOS": "politica",
+    "Codec": "politica",
+    "CompressionPolicy": "politica",
+    "PuntoControl": "trabajo",
+    "TrabajoCompresion": "trabajo",
+    "VerificacionError": "verificacion",
+    "ruta_sha256": "verificacion",
+    "verificar_zip": "verificacion",
+    "VigilanteCarpetas": "vigilancia",
+    "copiar_miembro_crudo": "zipcrudo",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    try:
+        modulo = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    valor = getattr(importlib.import_module(f".{modulo}", __name__), name)
+    globals()[name] = valor
+    return valor
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+if TYPE_CHECKING:
+    from .arbol import ArbolPlanta
+    from .catalogo import Catalogo, CatalogoError, ruta_catalogo
+    from .compresion import (
+        CompressionCancelled,
+        CompressionEvent,
+        CompressionScheduler,
+        CompressionWorker,
+        buscar_inv,
+        default_workers,
+        preparar_workers,
+        ruta_zip_libre,
+    )
+    from .dedup import Deduplicador
+    from .diario import DiarioOperaciones, FiltroDiario
+    from .envio import DestinoCarpeta, DestinoS3, EnvioArchivos, EnvioError, abrir_destino
+    from .escaneo import FileEntry, Manifest, escanear_inv
+    from .estructura import DISPOSITIVOS, crear_estructura, ruta_inversor, validar_parametros
+    from .incremental import IndiceZip, ruta_indice
+    from .metricas import MetricasTrabajo, RegistroMetricas
+    from .planta import FilaPlanta, ResumenPlanta, generar_planta, leer_plano
+    from .politica import METODOS, Codec, CompressionPolicy
+    from .trabajo import PuntoControl, TrabajoCompresion
+    from .verificacion import VerificacionError, ruta_sha256, verificar_zip
+    from .vigilancia import VigilanteCarpetas
+    from .zipcrudo import copiar_miembro_crudo
@@ -0,0 +1,316 @@
+"""Índice en memoria de la planta: CT -> INV -> String, con archivos, bytes y estado del ZIP
+
+Un escaneo en segundo plano llena el árbol y después se mantiene al día
+por partes: actualizar() solo vuelve a mirar la raíz, las CT y las carpetas
+de cada INV (un stat por carpeta) y reescanea las INV cuya carpeta, alguna
+String o su ZIP cambiaron. La interfaz lee los totales por INV al instante
+en lugar de recorrer el disco.
+
+Los nodos usan __slots__ y guardan solo contadores y mtimes, no la lista de
+archivos: una planta con miles de INV y cientos de miles de archivos ocupa
+unos pocos MB.
+
+Como en la vigilancia, un archivo reescrito en su sitio no cambia el mtime
+de su carpeta; escanear() (o la compresión, que escanea la INV de todos
+modos y lo comunica con registrar()) lo recoge.
+"""
+import os
+import threading
+from pathlib import Path
+
+from .escaneo import escanear_inv
+from .incremental import IndiceZip
+
+SIN_ZIP = "sin ZIP"
+COMPRIMIDO = "comprimido"
+CAMBIADO = "cambiado"
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def _subcarpetas(path, prefijo):
+    """Subcarpetas de path cuyo nombre empieza por prefijo, ordenadas"""
+    try:
+        with os.scandir(path) as it:
+            return sorted(e.name for e in it if e.name.startswith(prefijo) and e.is_dir(follow_symlinks=False))
+    except OSError:
+        return []
+
+def zip_actual(inv_dir):
+    """ZIP más reciente de la INV (INV-x.zip o INV-x_N.zip) y su stat, o (None, None)"""
+    inv_dir = Path(inv_dir)
+    mejor = (None, None)
+    try:
+        with os.scandir(inv_dir.parent) as it:
+            for e in it:
+                nombre = e.name
+                if not nombre.endswith(".zip") or not e.is_file():
+                    continue
+                base = nombre[:-4]
+                if base != inv_dir.name and not (base.startswith(inv_dir.name + "_")
+                                                 and base[len(inv_dir.name) + 1:].isdigit()):
+                    continue
+                st = e.stat()
+                if mejor[1] is None or st.st_mtime_ns > mejor[1].st_mtime_ns:
+                    mejor = (Path(e.path), st)
+    except OSError:
+        pass
+    return mejor
+
+def estado_zip(inv_dir, manifest, mtime_contenido):
+    """SIN_ZIP, COMPRIMIDO o CAMBIADO (archivos distintos a los del último ZIP)"""
+    zip_path, st = zip_actual(inv_dir)
+    if zip_path is None:
+        return SIN_ZIP
+    indice = IndiceZip.cargar(zip_path)
+    if indice is not None:
+        return COMPRIMIDO if indice.sin_cambios(manifest) else CAMBIADO
+    # ZIP no incremental (sin índice): vale si es posterior a todo el contenido
+    return COMPRIMIDO if st.st_mtime_ns >= mtime_contenido else CAMBIADO
+
+class NodoString:
+    """Carpeta String-N: archivos y bytes (incluidas sus subcarpetas)"""
+    __slots__ = ("nombre", "archivos", "bytes", "mtime_dir", "subcarpetas")
+
+    def __init__(self, nombre, mtime_dir=None):
+        self.nombre = nombre
+        self.archivos = 0
+        self.bytes = 0
+        self.mtime_dir = mtime_dir
+        self.subcarpetas = ()  # (ruta relativa, mtime) de carpetas más profundas, casi siempre vacío
+
+class NodoInv:
+    """Carpeta INV-x: sus String, totales y estado respecto al último ZIP"""
+    __slots__ = ("nombre", "strings", "archivos", "bytes", "mtime_dir", "mtime_contenido", "zip", "estado")
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.strings = {}
+        self.archivos = 0
+        self.bytes = 0
+        self.mtime_dir = None
+        self.mtime_contenido = 0  # archivo o carpeta más reciente
+        self.zip = None           # (ruta, tamaño, mtime) del ZIP al escanear
+        self.estado = SIN_ZIP
+
+class NodoCt:
+    """Carpeta CT-x y sus INV"""
+    __slots__ = ("nombre", "inversores", "mtime_dir")
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.inversores = {}
+        self.mtime_dir = None
+
+    @property
+    def archivos(self):
+        return sum(inv.archivos for inv in self.inversores.values())
+
+    @property
+    def bytes(self):
+        return sum(inv.bytes for inv in self.inversores.values())
+
+class ArbolPlanta:
+    """Árbol de raiz/CT-*/INV-*/String-* con archivos, bytes y estado del ZIP de cada INV.
+
+    iniciar() lo llena en un hilo y lo refresca cada intervalo segundos;
+    version aumenta con cada cambio, así la interfaz solo redibuja cuando
+    hace falta. Los métodos de consulta se pueden llamar desde cualquier hilo.
+    """
+    def __init__(self, raiz):
+        self.raiz = Path(raiz)
+        self.cts = {}
+        self.mtime_raiz = None
+        self.version = 0
+        self.listo = threading.Event()  # primer escaneo completo terminado
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def iniciar(self, intervalo=5.0):
+        """Escaneo completo en segundo plano y después actualizar() cada intervalo segundos"""
+        def _bucle():
+            self.escanear()
+            while not self._stop.wait(intervalo):
+                self.actualizar()
+        self._thread = threading.Thread(target=_bucle, name="ArbolPlanta", daemon=True)
+        self._thread.start()
+
+    def detener(self, wait=False):
+        self._stop.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    # --- escaneo ---
+
+    def _nodo_inv(self, inv_dir, manifest=None):
+        """NodoInv a partir del manifiesto de la INV (se escanea si no se da)"""
+        manifest = manifest or escanear_inv(inv_dir)
+        nodo = NodoInv(inv_dir.name)
+        nodo.mtime_dir = _mtime(inv_dir)
+        prefijo = len(inv_dir.name) + 1
+        contenido = nodo.mtime_dir or 0
+        for arcdir in manifest.dirs:
+            partes = arcdir[prefijo:].rstrip("/").split("/")
+            mtime = _mtime(inv_dir.joinpath(*partes))
+            contenido = max(contenido, mtime or 0)
+            if len(partes) == 1:
+                nodo.strings[partes[0]] = NodoString(partes[0], mtime)
+            elif partes[0] in nodo.strings:
+                string = nodo.strings[partes[0]]
+                string.subcarpetas += (("/".join(partes[1:]), mtime),)
+        for entry in manifest.files:
+            partes = entry.arcname[prefijo:].split("/", 1)
+            nodo.archivos += 1
+            nodo.bytes += entry.size
+            contenido = max(contenido, entry.mtime_ns)
+            if len(partes) == 2 and partes[0] in nodo.strings:
+                string = nodo.strings[partes[0]]
+                string.archivos += 1
+                string.bytes += entry.size
+        nodo.mtime_contenido = contenido
+        zip_path, st = zip_actual(inv_dir)
+        nodo.zip = (str(zip_path), st.st_size, st.st_mtime_ns) if zip_path is not None else None
+        nodo.estado = estado_zip(inv_dir, manifest, contenido)
+        return nodo
+
+    def _escanear_ct(self, carpeta_ct, anterior=None):
+        """NodoCt de carpeta_ct; con anterior, se reaprovechan las INV sin cambios"""
+        nodo = NodoCt(carpeta_ct.name)
+        nodo.mtime_dir = _mtime(carpeta_ct)
+        for nombre in _subcarpetas(carpeta_ct, "INV-"):
+            inv_dir = carpeta_ct / nombre
+            previo = anterior.inversores.get(nombre) if anterior is not None else None
+            if previo is not None and not self._inv_cambiada(inv_dir, previo):
+                nodo.inversores[nombre] = previo
+                continue
+            try:
+                nodo.inversores[nombre] = self._nodo_inv(inv_dir)
+            except OSError:
+                continue  # borrada mientras se recorría
+        return nodo
+
+    def escanear(self):
+        """Recorrer toda la planta y reemplazar el árbol"""
+        cts = {}
+        for nombre in self._nombres_ct():
+            if self._stop.is_set():
+                return
+            cts[nombre] = self._escanear_ct(self.raiz / nombre)
+        with self._lock:
+            self.cts = cts
+            self.mtime_raiz = _mtime(self.raiz)
+            self.version += 1
+        self.listo.set()
+
+    def _nombres_ct(self):
+        if self.raiz.name.startswith("CT-"):
+            return []
+        return _subcarpetas(self.raiz, "CT-")
+
+    def _inv_cambiada(self, inv_dir, nodo):
+        """True si cambió la carpeta de la INV, alguna de sus carpetas o su ZIP"""
+        if _mtime(inv_dir) != nodo.mtime_dir:
+            return True
+        for string in nodo.strings.values():
+            carpeta = inv_dir / string.nombre
+            if _mtime(carpeta) != string.mtime_dir:
+                return True
+            for relativa, mtime in string.subcarpetas:
+                if _mtime(carpeta / relativa) != mtime:
+                    return True
+        zip_path, st = zip_actual(inv_dir)
+        actual = (str(zip_path), st.st_size, st.st_mtime_ns) if zip_path is not None else None
+        return actual != nodo.zip
+
+    def actualizar(self):
+        """Refrescar solo lo que cambió desde la última pasada; devuelve True si hubo cambios"""
+        if not self.listo.is_set():
+            return False
+        with self._lock:
+            cts = dict(self.cts)
+        nuevos = {}
+        if _mtime(self.raiz) != self.mtime_raiz:
+            nombres = self._nombres_ct()
+        else:
+            nombres = list(cts)
+        cambios = set(nombres) != set(cts)
+        for nombre in nombres:
+            if self._stop.is_set():
+                return False
+            carpeta_ct = self.raiz / nombre
+            anterior = cts.get(nombre)
+            nodo = self._escanear_ct(carpeta_ct, anterior)
+            if anterior is None or self._distinto(anterior, nodo):
+                cambios = True
+            nuevos[nombre] = nodo
+        if not cambios:
+            return False
+        with self._lock:
+            self.cts = nuevos
+            self.mtime_raiz = _mtime(self.raiz)
+            self.version += 1
+        return True
+
+    @staticmethod
+    def _distinto(anterior, nodo):
+        if anterior.inversores.keys() != nodo.inversores.keys():
+            return True
+        return any(nodo.inversores[n] is not inv for n, inv in anterior.inversores.items())
+
+    # --- cambios conocidos por la propia aplicación ---
+
+    def registrar(self, inv_dir, manifest=None):
+        """Actualizar una INV ya (tras crearla o comprimirla), reutilizando su manifiesto si lo hay"""
+        inv_dir = Path(inv_dir)
+        if inv_dir.parent.parent != self.raiz:
+            return
+        try:
+            nodo = self._nodo_inv(inv_dir, manifest)
+        except OSError:
+            return
+        with self._lock:
+            ct = self.cts.get(inv_dir.parent.name)
+            if ct is None:
+                ct = self.cts[inv_dir.parent.name] = NodoCt(inv_dir.parent.name)
+            # Diccionario nuevo: actualizar() puede estar recorriendo el anterior
+            ct.inversores = {**ct.inversores, inv_dir.name: nodo}
+            ct.mtime_dir = _mtime(inv_dir.parent)
+            self.mtime_raiz = _mtime(self.raiz)
+            self.version += 1
+
+    # --- consultas ---
+
+    def inversores(self, nombre_ct):
+        """Rutas de las INV de una CT según el índice (None si la CT no está indexada)"""
+        with self._lock:
+            ct = self.cts.get(nombre_ct)
+            if ct is None:
+                return None
+            return [self.raiz / nombre_ct / nombre for nombre in sorted(ct.inversores)]
+
+    def strings(self, nombre_ct, nombre_inv):
+        """Nombres de las String existentes de una INV (None si no está indexada)"""
+        with self._lock:
+            ct = self.cts.get(nombre_ct)
+            inv = ct.inversores.get(nombre_inv) if ct is not None else None
+            return None if inv is None else set(inv.strings)
+
+    def filas(self):
+        """[(CT, INV o None, strings, archivos, bytes, estado)] en orden, para la interfaz"""
+        with self._lock:
+            filas = []
+            for nombre_ct in sorted(self.cts):
+                ct = self.cts[nombre_ct]
+                invs = [ct.inversores[n] for n in sorted(ct.inversores)]
+                estados = {inv.estado for inv in invs}
+                estado = estados.pop() if len(estados) == 1 else CAMBIADO if CAMBIADO in estados else SIN_ZIP
+                filas.append((nombre_ct, None, sum(len(inv.strings) for inv in invs), ct.archivos, ct.bytes,
+                              estado if invs else ""))
+                filas.extend((nombre_ct, inv.nombre, len(inv.strings), inv.archivos, inv.bytes, inv.estado)
+                             for inv in invs)
+            return filas
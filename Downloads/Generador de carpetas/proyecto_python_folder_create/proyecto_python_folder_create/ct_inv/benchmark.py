@@ -0,0 +1,287 @@
+"""Mediciones de rendimiento: codecs sobre una INV real y banco sintético completo
+
+El banco sintético genera un árbol CT/INV/String reproducible (misma semilla,
+mismos archivos) y mide creación de carpetas, escaneo, compresión por codec
+y verificación. El informe JSON se puede guardar y comparar con el de otra
+versión para detectar regresiones.
+"""
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from .compresion import CompressionScheduler, CompressionWorker
+from .escaneo import escanear_inv
+from .estructura import crear_estructura
+from .politica import METODOS, Codec, CompressionPolicy
+from .verificacion import verificar_zip
+
+CODECS_BENCHMARK = ["stored", "deflate:1", "deflate:6", "deflate:9", "bzip2:9", "lzma"]
+if "zstd" in METODOS:
+    CODECS_BENCHMARK += ["zstd:3", "zstd:19"]
+
+# Texto parecido a un registro de medición: lo compresible de los archivos sintéticos
+_LINEA = b"2025-11-19 10:30:45  String-%03d  V=%07.2f  I=%06.3f  P=%08.2f  T=%05.1f\r\n"
+BLOQUE_TEXTO = 4 * 1024 * 1024
+
+
+def comparar_codecs(inv_dir, codecs=None):
+    """Comprimir una INV de muestra con cada codec y medir ratio y velocidad"""
+    inv_dir = Path(inv_dir)
+    manifest = escanear_inv(inv_dir)
+    bytes_in = manifest.total_bytes
+    candidatos = [(str(c), CompressionPolicy(defecto=Codec.parse(c), almacenar_incompresibles=False))
+                  for c in (codecs or CODECS_BENCHMARK)]
+    candidatos.append(("auto", CompressionPolicy.auto()))
+
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for nombre, policy in candidatos:
+            zip_path = Path(tmp) / f"{inv_dir.name}.zip"
+            inicio = time.perf_counter()
+            CompressionWorker(inv_dir, zip_path, policy, manifest).run()
+            segundos = time.perf_counter() - inicio
+            bytes_out = zip_path.stat().st_size
+            resultados.append({
+                "codec": nombre,
+                "bytes_in": bytes_in,
+                "bytes_out": bytes_out,
+                "ratio": round(bytes_out / bytes_in, 4) if bytes_in else 1.0,
+                "segundos": round(segundos, 4),
+                "mb_s": round(bytes_in / 1e6 / segundos, 2) if segundos else 0.0,
+            })
+            os.remove(zip_path)
+    return resultados
+
+# ==================== BANCO SINTÉTICO ====================
+
+@dataclass
+class ArbolSintetico:
+    """Forma del árbol de prueba.
+
+    Los tamaños siguen una log-normal de mediana tamano_kb y dispersión
+    sigma; compresibilidad es la fracción de cada archivo que es texto de
+    registro (el resto son bytes aleatorios incompresibles).
+    """
+    cts: int = 1
+    invs: int = 4
+    strings: int = 8
+    archivos: int = 10          # por String
+    tamano_kb: float = 256.0
+    sigma: float = 0.8
+    compresibilidad: float = 0.7
+    semilla: int = 0
+    extension: str = ".txt"
+
+def _bloque_texto(rng):
+    """Registro sintético de BLOQUE_TEXTO bytes; cada archivo toma un tramo al azar"""
+    partes, n = [], 0
+    while n < BLOQUE_TEXTO:
+        linea = _LINEA % (rng.randrange(1000), rng.uniform(0, 1500), rng.uniform(0, 20),
+                          rng.uniform(0, 30000), rng.uniform(-10, 80))
+        partes.append(linea)
+        n += len(linea)
+    return b"".join(partes)
+
+def _contenido(rng, bloque, size, compresibilidad):
+    texto = int(size * compresibilidad)
+    partes = []
+    while texto > 0:
+        n = min(texto, len(bloque))
+        inicio = rng.randrange(len(bloque) - n + 1)
+        partes.append(bloque[inicio:inicio + n])
+        texto -= n
+    aleatorio = size - sum(len(p) for p in partes)
+    partes.append(rng.getrandbits(aleatorio * 8).to_bytes(aleatorio, "little") if aleatorio else b"")
+    return b"".join(partes)
+
+def generar_arbol(destino, arbol):
+    """Crear el árbol sintético; devuelve (carpetas CT, métricas de creación y de escritura)"""
+    destino = Path(destino)
+    rng = random.Random(arbol.semilla)
+    inicio = time.perf_counter()
+    carpetas_inv = []
+    for ct in range(1, arbol.cts + 1):
+        for inv in range(1, arbol.invs + 1):
+            carpetas_inv.append(crear_estructura(destino, ct, inv, arbol.strings))
+    t_crear = time.perf_counter() - inicio
+    n_carpetas = arbol.cts + len(carpetas_inv) * (1 + arbol.strings)
+
+    bloque = _bloque_texto(rng)
+    inicio = time.perf_counter()
+    bytes_escritos = archivos = 0
+    for carpeta_inv in carpetas_inv:
+        for s in range(1, arbol.strings + 1):
+            for a in range(arbol.archivos):
+                size = max(1, int(rng.lognormvariate(0, arbol.sigma) * arbol.tamano_kb * 1024))
+                with open(carpeta_inv / f"String-{s}" / f"medicion_{a:04d}{arbol.extension}", "wb") as f:
+                    f.write(_contenido(rng, bloque, size, arbol.compresibilidad))
+                bytes_escritos += size
+                archivos += 1
+    t_escribir = time.perf_counter() - inicio
+
+    cts = sorted(destino.glob("CT-*"))
+    return cts, [
+        _metrica("crear_carpetas", t_crear, archivos=n_carpetas),
+        _metrica("escribir_datos", t_escribir, bytes_in=bytes_escritos, archivos=archivos),
+    ]
+
+def pico_rss_mb():
+    """Pico de memoria residente del proceso (y de sus hijos) en MB, o None"""
+    try:
+        import resource
+        propio = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        hijos = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        # Linux da KiB; macOS, bytes
+        escala = 1 if sys.platform == "darwin" else 1024
+        return round(max(propio, hijos) * escala / 1e6, 1)
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return round(getattr(info, "peak_wset", info.rss) / 1e6, 1)
+    except ImportError:
+        pass
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class _Contadores(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        contadores = _Contadores()
+        contadores.cb = ctypes.sizeof(contadores)
+        proceso = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(proceso, ctypes.byref(contadores), contadores.cb):
+            return round(contadores.PeakWorkingSetSize / 1e6, 1)
+    return None
+
+def _metrica(etapa, segundos, bytes_in=0, archivos=0, **extra):
+    return {
+        "etapa": etapa,
+        "segundos": round(segundos, 4),
+        "archivos": archivos,
+        "bytes_in": bytes_in,
+        "mb_s": round(bytes_in / 1e6 / segundos, 2) if segundos and bytes_in else None,
+        "archivos_s": round(archivos / segundos, 1) if segundos and archivos else None,
+        # El pico del proceso solo crece: es el máximo alcanzado hasta esta etapa
+        "pico_rss_mb": pico_rss_mb(),
+        **extra,
+    }
+
+def _mejor(repeticiones, fn):
+    """Ejecutar fn varias veces y quedarse con la más rápida (menos ruido)"""
+    mejor = None
+    for _ in range(max(1, repeticiones)):
+        inicio = time.perf_counter()
+        resultado = fn()
+        segundos = time.perf_counter() - inicio
+        if mejor is None or segundos < mejor[0]:
+            mejor = (segundos, resultado)
+    return mejor
+
+def _os_walk(carpeta_ct):
+    """Recorrido con os.walk + stat por archivo (referencia del escaneo anterior)"""
+    n = total = 0
+    for raiz, _, archivos in os.walk(carpeta_ct):
+        for nombre in archivos:
+            total += os.stat(os.path.join(raiz, nombre)).st_size
+            n += 1
+    return n, total
+
+def ejecutar_benchmark(arbol=None, codecs=None, jobs=None, repeticiones=1, verificar=True,
+                       directorio=None, on_etapa=None):
+    """Generar el árbol, medir cada etapa y devolver el informe como dict"""
+    arbol = arbol or ArbolSintetico()
+    codecs = codecs or ["stored", "deflate:1", "deflate:6", "deflate:9"]
+    informe = {
+        "version": 1,
+        "fecha": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "sistema": {"python": platform.python_version(), "plataforma": platform.platform(),
+                    "cpus": os.cpu_count(), "jobs": jobs},
+        "arbol": asdict(arbol),
+        "etapas": [],
+    }
+
+    def registrar(metrica):
+        informe["etapas"].append(metrica)
+        if on_etapa:
+            on_etapa(metrica)
+
+    tmp = tempfile.mkdtemp(prefix="ct_inv_bench_", dir=directorio)
+    try:
+        cts, metricas = generar_arbol(Path(tmp) / "planta", arbol)
+        for metrica in metricas:
+            registrar(metrica)
+        carpetas_inv = [inv for ct in cts for inv in sorted(ct.glob("INV-*"))]
+
+        segundos, manifiestos = _mejor(repeticiones, lambda: [escanear_inv(inv) for inv in carpetas_inv])
+        archivos = sum(len(m.files) for m in manifiestos)
+        total = sum(m.total_bytes for m in manifiestos)
+        registrar(_metrica("escanear", segundos, archivos=archivos, metodo="scandir"))
+        segundos, _ = _mejor(repeticiones, lambda: [_os_walk(ct) for ct in cts])
+        registrar(_metrica("escanear", segundos, archivos=archivos, metodo="os.walk"))
+
+        salida = Path(tmp) / "zips"
+        for nombre in codecs:
+            policy = CompressionPolicy(defecto=Codec.parse(nombre), almacenar_incompresibles=False)
+
+            def comprimir():
+                shutil.rmtree(salida, ignore_errors=True)
+                salida.mkdir()
+                workers = [CompressionWorker(inv, salida / f"{inv.parent.name}_{inv.name}.zip", policy, m)
+                           for inv, m in zip(carpetas_inv, manifiestos)]
+                scheduler = CompressionScheduler(workers, max_workers=jobs, verify=False)
+                scheduler.run()
+                if scheduler.errors:
+                    raise RuntimeError(f"Error comprimiendo con {nombre}: {scheduler.errors[0]}")
+                return workers
+
+            segundos, workers = _mejor(repeticiones, comprimir)
+            bytes_out = sum(w.zip_path.stat().st_size for w in workers)
+            registrar(_metrica("comprimir", segundos, bytes_in=total, archivos=archivos, codec=nombre,
+                               bytes_out=bytes_out, ratio=round(bytes_out / total, 4) if total else 1.0))
+            if verificar:
+                segundos, _ = _mejor(repeticiones, lambda: [verificar_zip(w.zip_path, w.manifest, w.crcs)
+                                                           for w in workers])
+                registrar(_metrica("verificar", segundos, bytes_in=total, archivos=archivos, codec=nombre))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return informe
+
+def _clave(metrica):
+    return (metrica["etapa"], metrica.get("codec") or metrica.get("metodo") or "")
+
+def comparar_informes(anterior, actual, tolerancia=0.10, minimo=0.05):
+    """Etapas cuyo tiempo empeoró más que `tolerancia` (fracción) respecto al informe anterior.
+
+    Las etapas de menos de `minimo` segundos se ignoran: su variación es ruido.
+    """
+    previas = {_clave(m): m for m in anterior["etapas"]}
+    regresiones = []
+    for metrica in actual["etapas"]:
+        previa = previas.get(_clave(metrica))
+        if not previa or max(previa["segundos"], metrica["segundos"]) < minimo or not previa["segundos"]:
+            continue
+        cambio = metrica["segundos"] / previa["segundos"] - 1
+        if cambio > tolerancia:
+            regresiones.append({"etapa": " ".join(filter(None, _clave(metrica))),
+                                "antes_s": previa["segundos"], "ahora_s": metrica["segundos"],
+                                "cambio": round(cambio, 3)})
+    return regresiones
+
+def cargar_informe(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -0,0 +1,280 @@
+"""Catálogo de la planta: qué archivo está en qué INV-x.zip y en qué posición
+
+Un SQLite junto a las carpetas CT-* (catalogo_zip.sqlite3) guarda por cada
+ZIP su CT, tamaño, mtime y SHA-256, y por cada miembro su ruta, tamaño,
+CRC-32, método y la posición de sus datos dentro del ZIP. Buscar un archivo
+es una consulta indexada y extraerlo es un seek directo a sus bytes, sin
+abrir ni recorrer directorios centrales.
+
+Las rutas de los ZIP se guardan relativas a la carpeta del catálogo, así la
+planta se puede mover o montar con otra letra de unidad. Sin WAL: el
+catálogo suele estar en una unidad de red.
+"""
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zipfile
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+
+from .verificacion import leer_sha256
+
+CATALOGO_NOMBRE = "catalogo_zip.sqlite3"
+BLOQUE = 1024 * 1024
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS zips (
+    id        INTEGER PRIMARY KEY,
+    ruta      TEXT NOT NULL UNIQUE,
+    ct        TEXT NOT NULL,
+    tamano    INTEGER NOT NULL,
+    mtime_ns  INTEGER NOT NULL,
+    sha256    TEXT,
+    indexado  TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS miembros (
+    zip_id        INTEGER NOT NULL REFERENCES zips(id) ON DELETE CASCADE,
+    nombre        TEXT NOT NULL,
+    archivo       TEXT NOT NULL,
+    inv           TEXT NOT NULL,
+    tamano        INTEGER NOT NULL,
+    crc           INTEGER NOT NULL,
+    metodo        INTEGER NOT NULL,
+    comprimido    INTEGER NOT NULL,
+    offset_header INTEGER NOT NULL,
+    offset_datos  INTEGER NOT NULL,
+    PRIMARY KEY (zip_id, nombre)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_miembros_archivo ON miembros(archivo);
+CREATE INDEX IF NOT EXISTS ix_miembros_nombre ON miembros(nombre);
+CREATE INDEX IF NOT EXISTS ix_zips_ct ON zips(ct);
+"""
+
+
+class CatalogoError(Exception):
+    """El miembro no se pudo leer del ZIP catalogado"""
+
+def ruta_catalogo(carpeta_ct):
+    """Catálogo de la planta que contiene carpeta_ct"""
+    return Path(carpeta_ct).parent / CATALOGO_NOMBRE
+
+@dataclass
+class MiembroCatalogado:
+    """Fila de búsqueda: miembro y ZIP que lo contiene"""
+    zip: str
+    ct: str
+    inv: str
+    nombre: str
+    tamano: int
+    crc: int
+    metodo: int
+    comprimido: int
+    offset_header: int
+    offset_datos: int
+    zip_tamano: int
+    zip_mtime_ns: int
+
+def _offsets(fp, zinfo):
+    """Posición de la cabecera local y de los datos (la cabecera local trae su propio campo extra)"""
+    fp.seek(zinfo.header_offset)
+    cabecera = fp.read(zipfile.sizeFileHeader)
+    if len(cabecera) != zipfile.sizeFileHeader or cabecera[:4] != zipfile.stringFileHeader:
+        raise zipfile.BadZipFile(f"Cabecera local inválida: {zinfo.filename}")
+    largo_nombre, largo_extra = struct.unpack("<HH", cabecera[26:30])
+    return zinfo.header_offset, zinfo.header_offset + zipfile.sizeFileHeader + largo_nombre + largo_extra
+
+class Catalogo:
+    """Índice SQLite de todos los ZIP de una planta"""
+    def __init__(self, path):
+        self.path = Path(path)
+        self.raiz = self.path.parent
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(ESQUEMA)
+
+    def _relativa(self, zip_path):
+        zip_path = Path(zip_path).resolve()
+        try:
+            return zip_path.relative_to(self.raiz.resolve()).as_posix()
+        except ValueError:
+            return str(zip_path)  # fuera de la planta: ruta absoluta
+
+    def _absoluta(self, ruta):
+        return self.raiz / ruta
+
+    def indexar_zip(self, zip_path, sha256=None):
+        """Añadir o reemplazar la entrada de un ZIP; devuelve el número de miembros.
+
+        Sin sha256 se toma de INV-x.zip.sha256 si existe.
+        """
+        zip_path = Path(zip_path)
+        if sha256 is None:
+            sha256 = leer_sha256(zip_path)
+        st = os.stat(zip_path)
+        filas = []
+        with zipfile.ZipFile(zip_path) as zf:
+            for zinfo in zf.infolist():
+                if zinfo.is_dir():
+                    continue
+                offset_header, offset_datos = _offsets(zf.fp, zinfo)
+                nombre = zinfo.filename
+                filas.append((nombre, nombre.rsplit("/", 1)[-1], nombre.split("/", 1)[0], zinfo.file_size,
+                              zinfo.CRC, zinfo.compress_type, zinfo.compress_size, offset_header, offset_datos))
+        ruta = self._relativa(zip_path)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM zips WHERE ruta = ?", (ruta,))
+            zip_id = self._conn.execute(
+                "INSERT INTO zips (ruta, ct, tamano, mtime_ns, sha256, indexado) VALUES (?, ?, ?, ?, ?, ?)",
+                (ruta, zip_path.parent.name, st.st_size, st.st_mtime_ns, sha256,
+                 time.strftime("%Y-%m-%d %H:%M:%S"))).lastrowid
+            self._conn.executemany(
+                "INSERT INTO miembros (zip_id, nombre, archivo, inv, tamano, crc, metodo, comprimido, "
+                "offset_header, offset_datos) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(zip_id, *fila) for fila in filas])
+        return len(filas)
+
+    def actualizar_zip(self, zip_path, sha256=None):
+        """indexar_zip() solo si el ZIP no está catalogado con su tamaño y mtime actuales"""
+        st = os.stat(zip_path)
+        with self._lock:
+            fila = self._conn.execute("SELECT tamano, mtime_ns FROM zips WHERE ruta = ?",
+                                      (self._relativa(zip_path),)).fetchone()
+        if fila == (st.st_size, st.st_mtime_ns):
+            return False
+        self.indexar_zip(zip_path, sha256)
+        return True
+
+    def indexar_planta(self, raiz=None):
+        """Catalogar los CT-*/*.zip nuevos o modificados y olvidar los que ya no existen.
+
+        Devuelve (indexados, sin cambios, eliminados, errores).
+        """
+        raiz = Path(raiz or self.raiz)
+        with self._lock:
+            conocidos = {ruta: (tamano, mtime_ns) for ruta, tamano, mtime_ns
+                         in self._conn.execute("SELECT ruta, tamano, mtime_ns FROM zips")}
+        indexados = sin_cambios = 0
+        errores = []
+        vistos = set()
+        for carpeta_ct in sorted(d for d in raiz.iterdir() if d.is_dir() and d.name.startswith("CT-")):
+            for zip_path in sorted(carpeta_ct.glob("*.zip")):
+                ruta = self._relativa(zip_path)
+                vistos.add(ruta)
+                st = zip_path.stat()
+                if conocidos.get(ruta) == (st.st_size, st.st_mtime_ns):
+                    sin_cambios += 1
+                    continue
+                try:
+                    self.indexar_zip(zip_path)
+                    indexados += 1
+                except (OSError, zipfile.BadZipFile) as e:
+                    errores.append(f"{ruta}: {e}")
+        # Solo se olvidan los ZIP de la raíz recorrida
+        prefijo = self._relativa(raiz)
+        eliminados = [ruta for ruta in conocidos if ruta not in vistos
+                      and (prefijo == "." or ruta.startswith(prefijo + "/"))]
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM zips WHERE ruta = ?", [(ruta,) for ruta in eliminados])
+        return indexados, sin_cambios, len(eliminados), errores
+
+    def buscar(self, patron, ct=None, inv=None, limite=100):
+        """Miembros cuyo nombre de archivo es patron, o cuya ruta coincide con el glob patron.
+
+        "curva_3.csv" usa el índice por nombre de archivo; "*/String-3/*.csv"
+        recorre el índice de rutas.
+        """
+        condiciones, params = [], []
+        if any(c in patron for c in "*?[") or "/" in patron:
+            condiciones.append("m.nombre GLOB ?")
+        else:
+            condiciones.append("m.archivo = ?")
+        params.append(patron)
+        if ct:
+            condiciones.append("z.ct = ?")
+            params.append(ct)
+        if inv:
+            condiciones.append("m.inv = ?")
+            params.append(inv)
+        return self._consultar(condiciones, params, limite)
+
+    def _consultar(self, condiciones, params, limite):
+        sql = ("SELECT z.ruta, z.ct, m.inv, m.nombre, m.tamano, m.crc, m.metodo, m.comprimido, "
+               "m.offset_header, m.offset_datos, z.tamano, z.mtime_ns FROM miembros m JOIN zips z ON z.id = m.zip_id "
+               "WHERE " + " AND ".join(condiciones) + " ORDER BY z.ct, m.nombre, z.ruta LIMIT ?")
+        with self._lock:
+            filas = self._conn.execute(sql, params + [limite]).fetchall()
+        return [MiembroCatalogado(*fila) for fila in filas]
+
+    def _vigente(self, miembro):
+        """Miembro al día: si el ZIP cambió desde que se catalogó, se vuelve a indexar"""
+        zip_path = self._absoluta(miembro.zip)
+        st = os.stat(zip_path)
+        if (miembro.zip_tamano, miembro.zip_mtime_ns) == (st.st_size, st.st_mtime_ns):
+            return miembro
+        self.actualizar_zip(zip_path)
+        actual = self._consultar(["z.ruta = ?", "m.nombre = ?"], [miembro.zip, miembro.nombre], 1)
+        if not actual:
+            raise CatalogoError(f"{miembro.nombre} ya no está en {miembro.zip}")
+        return actual[0]
+
+    def leer(self, miembro):
+        """Generador con el contenido descomprimido, leído con un seek directo a los datos"""
+        miembro = self._vigente(miembro)
+        descompresor = zipfile._get_decompressor(miembro.metodo)
+        crc = escritos = 0
+        with open(self._absoluta(miembro.zip), "rb") as f:
+            f.seek(miembro.offset_header)
+            if f.read(4) != zipfile.stringFileHeader:
+                raise CatalogoError(f"{miembro.zip}: no hay cabecera local en {miembro.offset_header}")
+            f.seek(miembro.offset_datos)
+            restante = miembro.comprimido
+            while restante > 0:
+                datos = f.read(min(BLOQUE, restante))
+                if not datos:
+                    raise CatalogoError(f"{miembro.zip}: {miembro.nombre} truncado")
+                restante -= len(datos)
+                if descompresor is not None:
+                    datos = descompresor.decompress(datos)
+                crc = zlib.crc32(datos, crc)
+                escritos += len(datos)
+                yield datos
+        if descompresor is not None and hasattr(descompresor, "flush"):
+            datos = descompresor.flush()
+            crc = zlib.crc32(datos, crc)
+            escritos += len(datos)
+            yield datos
+        if crc != miembro.crc or escritos != miembro.tamano:
+            raise CatalogoError(f"{miembro.zip}: {miembro.nombre} dañado (CRC {crc:08x} != {miembro.crc:08x})")
+
+    def extraer(self, miembro, destino):
+        """Escribir el miembro en destino/CT/ruta-en-el-ZIP (atómico); devuelve la ruta.
+
+        Lanza CatalogoError si la ruta del miembro (absoluta o con "..")
+        saldría de destino.
+        """
+        raiz = Path(destino).resolve()
+        salida = (raiz / miembro.ct / miembro.nombre).resolve()
+        try:
+            dentro = salida != raiz and salida.relative_to(raiz)
+        except ValueError:
+            dentro = False
+        if not dentro:
+            raise CatalogoError(f"{miembro.zip}: {miembro.nombre} saldría de {raiz}")
+        salida.parent.mkdir(parents=True, exist_ok=True)
+        tmp = salida.with_name(salida.name + ".tmp")
+        try:
+            with open(tmp, "wb") as f:
+                for datos in self.leer(miembro):
+                    f.write(datos)
+            os.replace(tmp, salida)
+        finally:
+            tmp.unlink(missing_ok=True)
+        return salida
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
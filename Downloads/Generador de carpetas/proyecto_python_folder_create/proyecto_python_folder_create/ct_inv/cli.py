@@ -0,0 +1,436 @@
+"""Línea de comandos sin interfaz gráfica (no importa tkinter, PIL ni winsound)
+
+    python -m ct_inv crear --destino D:/planta --ct 1 --inv 3 --strings 12
+    python -m ct_inv comprimir D:/planta/CT-1 D:/planta/CT-2 --jobs 8 --level 6 --json
+    python -m ct_inv comprimir D:/planta/CT-1 D:/planta/CT-2 --dedup
+    python -m ct_inv comprimir D:/planta/CT-1 --enviar //archivo/plantas/planta-norte
+    python -m ct_inv enviar D:/planta/CT-1 --destino "s3://archivo/planta-norte?endpoint=http://minio:9000"
+    python -m ct_inv comprimir D:/planta/CT-1 --metricas-log metricas.jsonl --prometheus ct_inv.prom
+    python -m ct_inv codecs D:/planta/CT-1/INV-1-PVPM
+    python -m ct_inv planta plano.csv --destino D:/planta --jobs 16
+    python -m ct_inv historial --tipo COMPRESS --estado ERROR --buscar CT-3
+    python -m ct_inv vigilar D:/planta --espera 3
+    python -m ct_inv catalogo buscar curva_String-3.csv --planta D:/planta --ct CT-3
+    python -m ct_inv benchmark --invs 8 --salida base.json
+"""
+import argparse
+import json
+import queue
+import sys
+import threading
+from dataclasses import asdict
+from pathlib import Path
+
+from .compresion import CompressionScheduler, preparar_workers, default_workers
+from .diario import DiarioOperaciones, FiltroDiario
+from .envio import SIMULTANEOS
+from .estructura import DISPOSITIVOS, crear_estructura
+from .planta import HILOS_POR_DEFECTO, generar_planta, leer_plano
+from .politica import METODOS, STORED, Codec, CompressionPolicy
+
+# Mismo diario que usa la interfaz gráfica
+DIARIO_POR_DEFECTO = Path(__file__).resolve().parent.parent / "historial.sqlite3"
+
+def _emit(args, data, text):
+    if args.json:
+        print(json.dumps(data, ensure_ascii=False, indent=2))
+    else:
+        print(text)
+
+def cmd_crear(args):
+    carpeta_inv = crear_estructura(args.destino, args.ct, args.inv, args.strings, args.dispositivo)
+    _emit(args, {"ruta": str(carpeta_inv), "strings": int(args.strings)},
+          f"✓ Se crearon {args.strings} carpetas en {carpeta_inv}")
+    return 0
+
+def cmd_planta(args):
+    resumen = generar_planta(args.destino, leer_plano(args.plano), args.jobs)
+    _emit(args, asdict(resumen),
+          f"✓ {resumen.cts} CT, {resumen.inversores} INV, {resumen.strings} strings: "
+          f"{resumen.creadas} carpetas creadas, {resumen.existentes} ya existían ({resumen.segundos} s)"
+          + "".join(f"\n✗ {error}" for error in resumen.errores))
+    return 1 if resumen.errores else 0
+
+def _policy(args):
+    codec = Codec(args.method, args.level)
+    if args.no_auto:
+        policy = CompressionPolicy(defecto=codec, almacenar_incompresibles=False)
+    else:
+        policy = CompressionPolicy.auto(codec)
+    for ext in args.store_ext:
+        policy.por_extension["." + ext.lower().lstrip(".")] = STORED
+    return policy
+
+def cmd_comprimir(args):
+    policy = _policy(args)
+    por_ct = []
+    for carpeta_ct in args.ct:
+        carpeta_ct = Path(carpeta_ct)
+        if not carpeta_ct.is_dir():
+            print(f"No existe la carpeta CT: {carpeta_ct}", file=sys.stderr)
+            return 2
+        por_ct.append((carpeta_ct, preparar_workers(carpeta_ct, policy, args.incremental)))
+
+    workers = [worker for _, ct_workers in por_ct for worker in ct_workers]
+    if not workers:
+        print("No hay carpetas INV-* para comprimir", file=sys.stderr)
+        return 1
+
+    scheduler = CompressionScheduler(workers, max_workers=args.jobs, use_processes=args.processes,
+                                     verify=not args.no_verify, detalle=args.detalle, perfil=args.perfil,
+                                     dedup=args.dedup, hilos_inv=args.hilos_inv,
+                                     catalogar=not args.no_catalogo, destino=_destino(args),
+                                     envios_simultaneos=args.envios)
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        scheduler.cancel()
+        return 130
+    finally:
+        if args.metricas_log:
+            scheduler.metricas.escribir_jsonl(args.metricas_log, detalle=args.detalle)
+        if args.prometheus:
+            scheduler.metricas.escribir_prometheus(args.prometheus)
+
+    resultado = {}
+    for carpeta_ct, ct_workers in por_ct:
+        resultado[str(carpeta_ct)] = {
+            "zips": [{"zip": str(w.zip_path), **w.stats, "sha256": scheduler.checksums.get(w.zip_path)}
+                     for w in ct_workers if w.zip_path in scheduler.completed],
+            "errors": [{"inv": w.inv_dir.name, "error": w.error} for w in ct_workers if w.error],
+            "enviados": [scheduler.enviados[w.zip_path] for w in ct_workers if w.zip_path in scheduler.enviados],
+        }
+        if not args.json:
+            for worker in ct_workers:
+                marca = "✗" if worker.error else "✓"
+                reanudados = f", {worker.stats['reanudados']} reanudados" if worker.stats["reanudados"] else ""
+                if worker.stats["deduplicados"]:
+                    reanudados += f", {worker.stats['deduplicados']} repetidos"
+                print(f"{marca} {carpeta_ct.name}/{worker.inv_dir.name}: {worker.error or worker.zip_path}"
+                      f" ({worker.stats['comprimidos']} comprimidos, {worker.stats['reutilizados']} reutilizados"
+                      f"{reanudados})")
+                if worker.zip_path in scheduler.enviados:
+                    print(f"  → {scheduler.enviados[worker.zip_path]}")
+
+    total = len(scheduler.completed)
+    texto = f"✓ {total} archivos comprimidos, {len(scheduler.errors)} con error"
+    if args.enviar:
+        resultado["errores_envio"] = [{"inv": inv, "error": error} for inv, error in scheduler.errores_envio]
+        texto += f"; {len(scheduler.enviados)} enviados" + "".join(
+            f"\n✗ envío de {inv}: {error}" for inv, error in scheduler.errores_envio)
+    _emit(args, resultado, texto)
+    return 1 if scheduler.errors or scheduler.errores_envio else 0
+
+def _destino(args):
+    if not args.enviar:
+        return None
+    from .envio import abrir_destino
+    return abrir_destino(args.enviar)
+
+def cmd_enviar(args):
+    from .envio import EnvioArchivos, EnvioError, abrir_destino
+    from .verificacion import leer_sha256
+    zips = []
+    for carpeta_ct in map(Path, args.ct):
+        if not carpeta_ct.is_dir():
+            print(f"No existe la carpeta CT: {carpeta_ct}", file=sys.stderr)
+            return 2
+        zips += sorted(carpeta_ct.glob("INV-*.zip"))
+    if not zips:
+        print("No hay archivos INV-*.zip para enviar", file=sys.stderr)
+        return 1
+
+    envio = EnvioArchivos(abrir_destino(args.destino), args.envios)
+    cancelar = threading.Event()
+    futures = {envio.enviar(zip_path, leer_sha256(zip_path), cancelar): zip_path for zip_path in zips}
+    enviados, errores = [], []
+    try:
+        for future, zip_path in futures.items():
+            try:
+                bytes_enviados, segundos = future.result()
+            except (EnvioError, OSError) as e:
+                errores.append({"zip": str(zip_path), "error": str(e)})
+                continue
+            enviados.append({"zip": str(zip_path), "destino": envio.destino.uri(envio.clave(zip_path)),
+                             "bytes": bytes_enviados, "segundos": round(segundos, 3)})
+    except KeyboardInterrupt:
+        cancelar.set()
+        return 130
+    finally:
+        envio.close(cancelar=cancelar.is_set())
+    _emit(args, {"enviados": enviados, "errores": errores},
+          "\n".join(f"✓ {e['destino']}" + ("" if e["bytes"] else " (ya estaba)") for e in enviados)
+          + "".join(f"\n✗ {e['zip']}: {e['error']}" for e in errores)
+          + f"\n{len(enviados)} enviados, {len(errores)} con error")
+    return 1 if errores else 0
+
+def cmd_codecs(args):
+    from .benchmark import comparar_codecs
+    resultados = comparar_codecs(args.inv, args.codecs.split(",") if args.codecs else None)
+    lineas = [f"{'codec':<10} {'ratio':>7} {'MB/s':>9} {'segundos':>9}"]
+    lineas += [f"{r['codec']:<10} {r['ratio']:>7.3f} {r['mb_s']:>9.2f} {r['segundos']:>9.3f}" for r in resultados]
+    _emit(args, resultados, "\n".join(lineas))
+    return 0
+
+def cmd_historial(args):
+    filtro = FiltroDiario(tipo=args.tipo, estado=args.estado, texto=args.buscar,
+                          desde=args.desde, hasta=args.hasta)
+    diario = DiarioOperaciones(args.diario)
+    try:
+        total = diario.contar(filtro)
+        filas = diario.pagina(filtro, args.limite)
+    finally:
+        diario.close()
+    campos = ("id", "timestamp", "tipo", "descripcion", "estado")
+    lineas = [f"[{ts}] {tipo:<9} {estado:<20} {desc}" for _, ts, tipo, desc, estado in filas]
+    lineas.append(f"{len(filas)} de {total} operaciones")
+    _emit(args, {"total": total, "operaciones": [dict(zip(campos, fila)) for fila in filas]}, "\n".join(lineas))
+    return 0
+
+def cmd_benchmark(args):
+    from . import benchmark
+    arbol = benchmark.ArbolSintetico(cts=args.cts, invs=args.invs, strings=args.strings, archivos=args.archivos,
+                                     tamano_kb=args.tamano_kb, sigma=args.sigma,
+                                     compresibilidad=args.compresibilidad, semilla=args.semilla)
+
+    def mostrar(m):
+        if args.json:
+            return
+        variante = m.get("codec") or m.get("metodo") or ""
+        mb_s = f"{m['mb_s']:>9.2f}" if m["mb_s"] else f"{'-':>9}"
+        archivos_s = f"{m['archivos_s']:>11.1f}" if m["archivos_s"] else f"{'-':>11}"
+        print(f"{m['etapa']:<15} {variante:<10} {m['segundos']:>9.3f} {mb_s} {archivos_s} {m['pico_rss_mb'] or '-':>8}",
+              flush=True)
+
+    if not args.json:
+        print(f"{'etapa':<15} {'variante':<10} {'segundos':>9} {'MB/s':>9} {'archivos/s':>11} {'RSS MB':>8}")
+    informe = benchmark.ejecutar_benchmark(arbol, args.codecs.split(",") if args.codecs else None, args.jobs,
+                                           args.repeticiones, not args.no_verify, args.directorio, mostrar)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(informe, f, ensure_ascii=False, indent=2)
+
+    regresiones = []
+    if args.comparar:
+        regresiones = benchmark.comparar_informes(benchmark.cargar_informe(args.comparar), informe,
+                                                  args.tolerancia / 100)
+        informe["regresiones"] = regresiones
+    if args.json:
+        print(json.dumps(informe, ensure_ascii=False, indent=2))
+    else:
+        for r in regresiones:
+            print(f"✗ Regresión en {r['etapa']}: {r['antes_s']} s -> {r['ahora_s']} s (+{r['cambio']:.0%})")
+        if args.comparar and not regresiones:
+            print(f"✓ Sin regresiones respecto a {args.comparar} (tolerancia {args.tolerancia:g} %)")
+    return 1 if regresiones else 0
+
+def cmd_vigilar(args):
+    from . import vigilancia
+    if not Path(args.raiz).is_dir():
+        print(f"No existe la carpeta: {args.raiz}", file=sys.stderr)
+        return 2
+    vigilante = vigilancia.VigilanteCarpetas(args.raiz, _policy(args), args.jobs, args.espera,
+                                             barrido=args.barrido, use_processes=args.processes,
+                                             verify=not args.no_verify, catalogar=not args.no_catalogo)
+    modo = "notificaciones de watchdog" if vigilancia.Observer is not None else "sondeo de mtimes"
+    print(f"Vigilando {args.raiz} ({modo}); Ctrl+C para salir", file=sys.stderr)
+    marcas = {"detected": "…", "done": "✓", "error": "✗"}
+    vigilante.start()
+    try:
+        while vigilante.is_running():
+            try:
+                evento = vigilante.events.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if evento.kind == "finished":
+                break
+            if args.json:
+                print(json.dumps({"evento": evento.kind, "inv": evento.name, "detalle": evento.detail},
+                                 ensure_ascii=False), flush=True)
+            else:
+                print(f"{marcas[evento.kind]} {evento.name}: {evento.detail}", flush=True)
+    except KeyboardInterrupt:
+        vigilante.stop()
+    return 1 if vigilante.errors else 0
+
+def cmd_catalogo(args):
+    from .catalogo import CATALOGO_NOMBRE, Catalogo, CatalogoError
+    planta = Path(args.planta)
+    if not planta.is_dir():
+        print(f"No existe la carpeta de la planta: {planta}", file=sys.stderr)
+        return 2
+    catalogo = Catalogo(planta / CATALOGO_NOMBRE)
+    try:
+        if args.accion == "indexar":
+            indexados, sin_cambios, eliminados, errores = catalogo.indexar_planta()
+            _emit(args, {"indexados": indexados, "sin_cambios": sin_cambios, "eliminados": eliminados,
+                         "errores": errores},
+                  f"✓ {indexados} ZIP catalogados, {sin_cambios} sin cambios, {eliminados} eliminados"
+                  + "".join(f"\n✗ {error}" for error in errores))
+            return 1 if errores else 0
+
+        miembros = catalogo.buscar(args.patron, args.ct, args.inv, args.limite)
+        if args.accion == "buscar":
+            _emit(args, [asdict(m) for m in miembros],
+                  "\n".join(f"{m.zip}  {m.nombre}  ({m.tamano} bytes)" for m in miembros)
+                  + f"\n{len(miembros)} archivos")
+            return 0 if miembros else 1
+
+        extraidos, errores = [], []
+        for miembro in miembros:
+            try:
+                extraidos.append(str(catalogo.extraer(miembro, args.destino)))
+            except (CatalogoError, OSError) as e:
+                errores.append(f"{miembro.zip}: {miembro.nombre}: {e}")
+        _emit(args, {"extraidos": extraidos, "errores": errores},
+              "\n".join(f"✓ {ruta}" for ruta in extraidos) + "".join(f"\n✗ {error}" for error in errores)
+              + f"\n{len(extraidos)} archivos extraídos")
+        return 1 if errores or not miembros else 0
+    finally:
+        catalogo.close()
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="ct_inv", description="Crear y comprimir carpetas CT/INV")
+    comun = argparse.ArgumentParser(add_help=False)
+    comun.add_argument("--json", action="store_true", help="salida en JSON")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    # Opciones de codec comunes a comprimir y vigilar
+    codec = argparse.ArgumentParser(add_help=False)
+    codec.add_argument("--jobs", "-j", type=int, default=default_workers(),
+                       help="INV comprimidas a la vez (por defecto: núcleos, máx. 8)")
+    codec.add_argument("--method", "-m", default="deflate", choices=list(METODOS),
+                       help="método de compresión (por defecto deflate)")
+    codec.add_argument("--level", "-l", type=int,
+                       help="nivel del método (deflate 0-9, bzip2 1-9; por defecto el de la librería)")
+    codec.add_argument("--store-ext", action="append", default=[], metavar="EXT",
+                       help="extensión adicional que se guarda sin comprimir (repetible)")
+    codec.add_argument("--no-auto", action="store_true",
+                       help="comprimir todo con el mismo método, sin detectar archivos ya comprimidos")
+    codec.add_argument("--processes", action="store_true",
+                       help="usar procesos en lugar de hilos")
+    codec.add_argument("--no-verify", action="store_true",
+                       help="no verificar los ZIP ni escribir INV-x.zip.sha256")
+    codec.add_argument("--no-catalogo", action="store_true",
+                       help="no registrar los ZIP en el catálogo de la planta (catalogo_zip.sqlite3)")
+
+    crear = sub.add_parser("crear", parents=[comun], help="crear CT-x/INV-y-DISPOSITIVO/String-1..N")
+    crear.add_argument("--destino", default=".", help="carpeta destino (por defecto la actual)")
+    crear.add_argument("--ct", required=True, help="número CT")
+    crear.add_argument("--inv", required=True, help="número inversor (1-50)")
+    crear.add_argument("--strings", required=True, help="cantidad de strings (1-100)")
+    crear.add_argument("--dispositivo", default="PVPM", choices=DISPOSITIVOS)
+    crear.set_defaults(func=cmd_crear)
+
+    planta = sub.add_parser("planta", parents=[comun], help="crear toda una planta desde un plano CSV/JSON/YAML")
+    planta.add_argument("plano", help="archivo .csv, .json o .yaml con ct, inv, dispositivo, strings")
+    planta.add_argument("--destino", default=".", help="carpeta destino (por defecto la actual)")
+    planta.add_argument("--jobs", "-j", type=int, default=HILOS_POR_DEFECTO,
+                        help=f"hilos para crear las carpetas String (por defecto {HILOS_POR_DEFECTO})")
+    planta.set_defaults(func=cmd_planta)
+
+    comprimir = sub.add_parser("comprimir", parents=[comun, codec], help="comprimir cada INV-* de una o varias CT")
+    comprimir.add_argument("ct", nargs="+", help="carpetas CT")
+    comprimir.add_argument("--incremental", "-i", action="store_true",
+                           help="actualizar INV-x.zip recomprimiendo solo los archivos que cambiaron")
+    comprimir.add_argument("--hilos-inv", type=int, metavar="N",
+                           help="archivos de una misma INV comprimidos a la vez (por defecto, según el "
+                                "tamaño de la INV en el lote; 1 = uno tras otro)")
+    comprimir.add_argument("--dedup", action="store_true",
+                           help="comprimir una sola vez los archivos idénticos entre INV y CT del lote")
+    comprimir.add_argument("--metricas-log", metavar="ARCHIVO",
+                           help="añadir las métricas por INV y del lote a este log JSON por líneas")
+    comprimir.add_argument("--prometheus", metavar="ARCHIVO",
+                           help="escribir las métricas en formato de texto de Prometheus (textfile collector)")
+    comprimir.add_argument("--detalle", action="store_true",
+                           help="incluir en el log una línea por archivo con sus tiempos")
+    comprimir.add_argument("--perfil", metavar="CARPETA",
+                           help="volcar un perfil de cProfile por INV (CT-x_INV-y.prof) en esta carpeta")
+    comprimir.add_argument("--enviar", metavar="DESTINO",
+                           help="enviar cada ZIP en cuanto termina a una carpeta (local o de red) o a "
+                                "s3://bucket/prefijo; credenciales y endpoint de S3 en AWS_ACCESS_KEY_ID, "
+                                "AWS_SECRET_ACCESS_KEY y AWS_ENDPOINT_URL (o ?endpoint=)")
+    comprimir.add_argument("--envios", type=int, default=SIMULTANEOS, metavar="N",
+                           help=f"ZIP enviándose a la vez (por defecto {SIMULTANEOS})")
+    comprimir.set_defaults(func=cmd_comprimir)
+
+    enviar = sub.add_parser("enviar", parents=[comun], help="enviar los INV-*.zip ya creados al archivo central")
+    enviar.add_argument("ct", nargs="+", help="carpetas CT")
+    enviar.add_argument("--destino", required=True, metavar="DESTINO", help="carpeta o s3://bucket/prefijo")
+    enviar.add_argument("--envios", type=int, default=SIMULTANEOS, metavar="N",
+                        help=f"ZIP enviándose a la vez (por defecto {SIMULTANEOS})")
+    enviar.set_defaults(func=cmd_enviar)
+
+    vigilar = sub.add_parser("vigilar", parents=[comun, codec],
+                             help="recomprimir automáticamente cada INV al llegar archivos nuevos")
+    vigilar.add_argument("raiz", help="carpeta CT-* o planta con varias CT-*")
+    vigilar.add_argument("--espera", type=float, default=2.0,
+                         help="segundos sin cambios antes de comprimir una INV (por defecto 2)")
+    vigilar.add_argument("--barrido", type=float, default=30.0,
+                         help="segundos entre revisiones completas de todas las INV (por defecto 30)")
+    vigilar.set_defaults(func=cmd_vigilar)
+
+    catalogo = sub.add_parser("catalogo", parents=[comun],
+                              help="buscar y extraer archivos de los ZIP de una planta sin abrirlos uno a uno")
+    acciones = catalogo.add_subparsers(dest="accion", required=True)
+    indexar = acciones.add_parser("indexar", parents=[comun],
+                                  help="catalogar los CT-*/*.zip nuevos o modificados de la planta")
+    buscar = acciones.add_parser("buscar", parents=[comun], help="listar los archivos que coinciden")
+    extraer = acciones.add_parser("extraer", parents=[comun],
+                                  help="extraer los archivos que coinciden a DESTINO/CT-x/INV-y/...")
+    for accion in (indexar, buscar, extraer):
+        accion.add_argument("--planta", default=".", help="carpeta con las CT-* (por defecto la actual)")
+    for accion in (buscar, extraer):
+        accion.add_argument("patron", help="nombre de archivo exacto, o glob sobre la ruta (\"*/String-3/*.csv\")")
+        accion.add_argument("--ct", help="solo esta CT (p. ej. CT-3)")
+        accion.add_argument("--inv", help="solo esta INV (p. ej. INV-2-PVPM)")
+        accion.add_argument("--limite", type=int, default=100, help="máximo de archivos (por defecto 100)")
+    extraer.add_argument("--destino", default=".", help="carpeta de salida (por defecto la actual)")
+    catalogo.set_defaults(func=cmd_catalogo)
+
+    bench = sub.add_parser("benchmark", parents=[comun],
+                           help="medir creación, escaneo, compresión y verificación sobre un árbol sintético")
+    bench.add_argument("--cts", type=int, default=1, help="carpetas CT (por defecto 1)")
+    bench.add_argument("--invs", type=int, default=4, help="INV por CT (por defecto 4)")
+    bench.add_argument("--strings", type=int, default=8, help="String por INV (por defecto 8)")
+    bench.add_argument("--archivos", type=int, default=10, help="archivos por String (por defecto 10)")
+    bench.add_argument("--tamano-kb", type=float, default=256.0, help="mediana del tamaño de archivo en KB")
+    bench.add_argument("--sigma", type=float, default=0.8, help="dispersión log-normal de tamaños (0 = todos iguales)")
+    bench.add_argument("--compresibilidad", type=float, default=0.7,
+                       help="fracción de texto compresible en cada archivo, 0-1 (por defecto 0.7)")
+    bench.add_argument("--semilla", type=int, default=0, help="semilla del generador (mismo árbol en cada versión)")
+    bench.add_argument("--codecs", help="lista separada por comas (por defecto stored,deflate:1,deflate:6,deflate:9)")
+    bench.add_argument("--jobs", "-j", type=int, default=default_workers(), help="INV comprimidas a la vez")
+    bench.add_argument("--repeticiones", type=int, default=1, help="repetir cada etapa y quedarse con la mejor")
+    bench.add_argument("--no-verify", action="store_true", help="no medir la verificación")
+    bench.add_argument("--directorio", help="dónde crear el árbol temporal (por defecto el temporal del sistema)")
+    bench.add_argument("--salida", help="guardar el informe JSON en este archivo")
+    bench.add_argument("--comparar", metavar="INFORME", help="informe JSON anterior con el que comparar")
+    bench.add_argument("--tolerancia", type=float, default=10.0,
+                       help="porcentaje de empeoramiento que cuenta como regresión (por defecto 10)")
+    bench.set_defaults(func=cmd_benchmark)
+
+    codecs = sub.add_parser("codecs", parents=[comun], help="comparar ratio y velocidad de cada codec en una INV")
+    codecs.add_argument("inv", help="carpeta INV de muestra")
+    codecs.add_argument("--codecs", help="lista separada por comas, p. ej. deflate:1,deflate:9,lzma")
+    codecs.set_defaults(func=cmd_codecs)
+
+    historial = sub.add_parser("historial", parents=[comun], help="consultar el diario de operaciones")
+    historial.add_argument("--diario", default=str(DIARIO_POR_DEFECTO), help="archivo historial.sqlite3")
+    historial.add_argument("--tipo", default="", help="CREATE, COMPRESS, ...")
+    historial.add_argument("--estado", default="", help="prefijo del estado (ÉXITO, ERROR, CANCELADO)")
+    historial.add_argument("--buscar", default="", help="texto en descripción o estado")
+    historial.add_argument("--desde", default="", help="fecha AAAA-MM-DD")
+    historial.add_argument("--hasta", default="", help="fecha AAAA-MM-DD (incluida)")
+    historial.add_argument("--limite", type=int, default=50, help="operaciones a mostrar (por defecto 50)")
+    historial.set_defaults(func=cmd_historial)
+    return parser
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    try:
+        return args.func(args)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
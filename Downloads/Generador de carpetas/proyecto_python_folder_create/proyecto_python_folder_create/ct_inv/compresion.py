@@ -0,0 +1,671 @@
+"""Compresión de carpetas INV-* en archivos ZIP"""
+from pathlib import Path
+import zipfile
+import os
+import threading
+import multiprocessing
+import queue
+import sqlite3
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import ExitStack, nullcontext
+from dataclasses import dataclass
+
+from .catalogo import Catalogo, ruta_catalogo
+from .dedup import Deduplicador, copiar_blob
+from .envio import SIMULTANEOS, EnvioArchivos, EnvioCancelado
+from .escaneo import escanear_inv
+from .flujo import BLOQUE, EscrituraDiferida, LectorBloques, necesita_zip64
+from .incremental import IndiceZip, ruta_indice
+from .metricas import EscrituraCronometrada, MetricasTrabajo, RegistroMetricas
+from .paralelo import CompresionParalela
+from .politica import CompressionPolicy
+from .trabajo import PuntoControl, TrabajoCompresion, abrir_partial_reanudado
+from .verificacion import VerificacionError, verificar_zip
+from .zipcrudo import copiar_miembro_crudo, escribir_miembro_crudo
+
+
+@dataclass
+class CompressionEvent:
+    """Evento del planificador hacia la UI"""
+    kind: str  # "progress" | "done" | "sent" | "error" | "finished"
+    name: str = ""
+    progress: float = 0.0
+    overall: float = 0.0
+    detail: str = ""
+
+class CompressionCancelled(Exception):
+    """La compresión fue cancelada por el usuario"""
+
+def buscar_inv(carpeta_ct):
+    """Carpetas INV-* dentro de una CT"""
+    carpeta_ct = Path(carpeta_ct)
+    return sorted(d for d in carpeta_ct.iterdir() if d.is_dir() and d.name.startswith("INV-"))
+
+def ruta_zip_libre(carpeta_ct, inv_dir):
+    """Ruta INV-x.zip que no pisa un ZIP existente (INV-x_1.zip, INV-x_2.zip...)"""
+    zip_path = Path(carpeta_ct) / f"{inv_dir.name}.zip"
+    contador = 1
+    while zip_path.exists():
+        zip_path = Path(carpeta_ct) / f"{inv_dir.name}_{contador}.zip"
+        contador += 1
+    return zip_path
+
+class CompressionWorker:
+    """Comprime una carpeta INV en un ZIP (ejecutable en hilo o en proceso).
+
+    Tras run(), crcs guarda el CRC-32 del origen de cada archivo escrito o
+    reutilizado (None si el ZIP no se reescribió) y reutilizados los
+    miembros copiados del ZIP anterior, para verificar_zip().
+    """
+    PARTIAL_SUFFIX = ".partial"
+
+    def __init__(self, inv_dir, zip_path, policy=None, manifest=None, incremental=False):
+        self.inv_dir = Path(inv_dir)
+        self.zip_path = Path(zip_path)
+        self.policy = policy or CompressionPolicy.auto()
+        self.manifest = manifest
+        self.incremental = incremental
+        self.error = None
+        self.stats = {"comprimidos": 0, "reutilizados": 0, "reanudados": 0, "deduplicados": 0}
+        self.crcs = None
+        self.reutilizados = set()
+        self.trabajo = None  # TrabajoCompresion del lote (solo en el proceso principal)
+        self.metricas = MetricasTrabajo(f"{self.inv_dir.parent.name}/{self.inv_dir.name}", str(self.zip_path))
+        self.detalle = False
+        self.perfil = None
+        self.blobs = {}
+        self.hilos = 1
+
+    def __getstate__(self):
+        # El diario del lote tiene un lock y lo actualiza el planificador: no viaja al proceso hijo
+        state = self.__dict__.copy()
+        state["trabajo"] = None
+        return state
+
+    @property
+    def partial_path(self):
+        return self.zip_path.with_name(self.zip_path.name + self.PARTIAL_SUFFIX)
+
+    def scan(self):
+        """Escanear la INV una sola vez y guardar el manifiesto"""
+        if self.manifest is None:
+            inicio = time.perf_counter()
+            self.manifest = escanear_inv(self.inv_dir)
+            self.metricas.fases["scan"] += time.perf_counter() - inicio
+        return self.manifest
+
+    def _indice_anterior(self):
+        if not self.incremental or not self.zip_path.exists():
+            return None
+        indice = IndiceZip.cargar(self.zip_path)
+        if indice is None or indice.policy != self.policy.to_dict():
+            return None
+        return indice
+
+    def archivos_a_comprimir(self):
+        """Entradas del manifiesto que el ZIP anterior no tiene ya con el mismo tamaño y mtime"""
+        indice = self._indice_anterior()
+        if indice is None:
+            return list(self.scan().files)
+        return [entry for entry in self.scan().files
+                if indice.files.get(entry.arcname, [None, None])[:2] != [entry.size, entry.mtime_ns]]
+
+    def run(self, on_progress=None, cancel_event=None):
+        """Comprimir y notificar on_progress(bytes procesados, bytes totales, nombre)"""
+        perfil = None
+        if self.perfil:
+            import cProfile
+            perfil = cProfile.Profile()
+            perfil.enable()
+        inicio = time.perf_counter()
+        try:
+            return self._run(on_progress, cancel_event)
+        finally:
+            self.metricas.segundos += time.perf_counter() - inicio
+            if perfil is not None:
+                perfil.disable()
+                Path(self.perfil).mkdir(parents=True, exist_ok=True)
+                perfil.dump_stats(Path(self.perfil) / f"{self.inv_dir.parent.name}_{self.inv_dir.name}.prof")
+
+    def _avisar(self, on_progress, processed, total_bytes):
+        if on_progress:
+            inicio = time.perf_counter()
+            on_progress(processed, total_bytes, self.inv_dir.name)
+            self.metricas.fases["callback"] += time.perf_counter() - inicio
+
+    def _salida(self, fp):
+        """Escritura en segundo plano, cronometrada (la fase "write" es el tiempo que la compresión espera)"""
+        return EscrituraCronometrada(EscrituraDiferida(fp), self.metricas)
+
+    def _escribir_archivo(self, zf, entry, codec, avance=None, cancel_event=None):
+        """Equivale a zf.write() en streaming, midiendo stat, apertura, lectura, compresión y escritura.
+
+        avance(bytes leídos del archivo) se llama tras cada bloque de un archivo grande.
+        """
+        fases = self.metricas.fases
+        t0 = time.perf_counter()
+        zinfo = zipfile.ZipInfo.from_file(entry.path, entry.arcname, strict_timestamps=zf._strict_timestamps)
+        zinfo.compress_type = codec.compress_type
+        zinfo._compresslevel = codec.nivel
+        t1 = time.perf_counter()
+        lectura = compresion = 0.0
+        escritura_previa = fases["write"]
+        leidos = crc = 0
+        with open(entry.path, "rb") as src:
+            t2 = time.perf_counter()
+            with LectorBloques(src, zinfo.file_size) as lector, \
+                    zf.open(zinfo, "w", force_zip64=necesita_zip64(zinfo.file_size)) as dest:
+                bloques = iter(lector)
+                while True:
+                    a = time.perf_counter()
+                    datos = next(bloques, None)
+                    b = time.perf_counter()
+                    lectura += b - a
+                    if datos is None:
+                        break
+                    dest.write(datos)
+                    crc = zlib.crc32(datos, crc)
+                    leidos += len(datos)
+                    datos = None  # el lector reutiliza el buffer
+                    compresion += time.perf_counter() - b
+                    if cancel_event is not None and leidos < zinfo.file_size and cancel_event.is_set():
+                        # El miembro a medias no llega al punto de control: se repite al reanudar
+                        raise CompressionCancelled(self.inv_dir.name)
+                    if avance is not None:
+                        avance(leidos)
+                cierre = time.perf_counter()
+            # close() vacía el compresor y reescribe la cabecera local
+            compresion += time.perf_counter() - cierre
+        self._crcs_origen[entry.arcname] = crc
+        # EscrituraCronometrada ya sumó a "write" lo escrito en disco durante la compresión
+        escritura = fases["write"] - escritura_previa
+        fases["stat"] += t1 - t0
+        fases["open"] += t2 - t1
+        fases["read"] += lectura
+        fases["compress"] += compresion - escritura
+        if self.detalle:
+            self.metricas.archivos_detalle.append({
+                "archivo": entry.arcname, "codec": codec.metodo,
+                "bytes_in": zinfo.file_size, "bytes_out": zinfo.compress_size,
+                "stat": round(t1 - t0, 6), "open": round(t2 - t1, 6), "read": round(lectura, 6),
+                "compress": round(compresion - escritura, 6), "write": round(escritura, 6),
+            })
+        return zinfo
+
+    def _escribir_comprimido(self, zf, miembro):
+        """Escribir un miembro que ct_inv.paralelo ya comprimió, sumando sus tiempos"""
+        fases = self.metricas.fases
+        for fase, segundos in miembro.tiempos.items():
+            fases[fase] += segundos
+        inicio, escritura_previa = time.perf_counter(), fases["write"]
+        with miembro.datos as datos:
+            datos.seek(0)
+            zinfo = escribir_miembro_crudo(zf, miembro.zinfo, iter(lambda: datos.read(BLOQUE), b""))
+        escritura = fases["write"] - escritura_previa
+        fases["copy"] += time.perf_counter() - inicio - escritura
+        if self.detalle:
+            self.metricas.archivos_detalle.append({
+                "archivo": zinfo.filename, "codec": miembro.codec.metodo,
+                "bytes_in": zinfo.file_size, "bytes_out": zinfo.compress_size,
+                **{fase: round(segundos, 6) for fase, segundos in miembro.tiempos.items()},
+                "write": round(escritura, 6),
+            })
+        return zinfo
+
+    def _run(self, on_progress, cancel_event):
+        manifest = self.scan()
+        total_bytes = manifest.total_bytes
+
+        indice = self._indice_anterior()
+        if indice is not None and indice.sin_cambios(manifest):
+            self.stats["reutilizados"] = len(manifest.files)
+            self._avisar(on_progress, total_bytes, total_bytes)
+            return self.zip_path
+
+        self._crcs_origen = {}
+        self.reutilizados = set()
+        partial = self.partial_path
+        punto = PuntoControl(partial, self.policy)
+        esperados = [(arcdir, None, None) for arcdir in manifest.dirs]
+        esperados += [(entry.arcname, entry.size, entry.mtime_ns) for entry in manifest.files]
+        registros = punto.recuperar(esperados)
+        if registros:
+            punto.reescribir(registros)
+            fp, zf = abrir_partial_reanudado(partial, registros, self.policy.defecto.compress_type,
+                                             envolver=self._salida)
+        else:
+            fp = self._salida(open(partial, "wb"))
+            zf = zipfile.ZipFile(fp, "w", compression=self.policy.defecto.compress_type, allowZip64=True)
+        hechos = len(registros or ())
+        hechos_dirs = min(hechos, len(manifest.dirs))
+        hechos_files = hechos - hechos_dirs
+        self.stats["reanudados"] = hechos_files
+        processed = sum(entry.size for entry in manifest.files[:hechos_files])
+        punto.iniciar(reanudado=bool(registros))
+        fases = self.metricas.fases
+
+        try:
+            with fp, zf, (zipfile.ZipFile(self.zip_path) if indice is not None else nullcontext()) as anterior, \
+                    ExitStack() as pila:
+                try:
+                    for arcdir in manifest.dirs[hechos_dirs:]:
+                        zf.writestr(zipfile.ZipInfo(arcdir), b"")
+                        punto.anotar(zf)
+
+                    pendientes = manifest.files[hechos_files:]
+                    previos = [indice.miembro_reutilizable(entry, anterior) if indice is not None else None
+                               for entry in pendientes]
+                    paralelo = None
+                    if self.hilos > 1:
+                        a_comprimir = [entry for entry, previo in zip(pendientes, previos)
+                                       if previo is None and entry.sha256 not in self.blobs]
+                        if len(a_comprimir) > 1:
+                            # Progreso por bloque también de los archivos que se comprimen por delante
+                            adelanto = None
+                            if on_progress:
+                                adelanto = lambda adelantado: self._avisar(
+                                    on_progress, min(total_bytes, processed + adelantado), total_bytes)
+                            paralelo = pila.enter_context(CompresionParalela(
+                                a_comprimir, self.policy, self.hilos, zf._strict_timestamps, cancel_event, adelanto))
+
+                    for entry, zinfo in zip(pendientes, previos):
+                        if cancel_event is not None and cancel_event.is_set():
+                            raise CompressionCancelled(self.inv_dir.name)
+                        avance = None
+                        if entry.size > BLOQUE and on_progress:
+                            base = processed
+                            avance = lambda leidos: self._avisar(on_progress, base + leidos, total_bytes)
+                        if zinfo is not None:
+                            inicio, escritura_previa = time.perf_counter(), fases["write"]
+                            copiar_miembro_crudo(anterior, zinfo, zf)
+                            fases["copy"] += time.perf_counter() - inicio - (fases["write"] - escritura_previa)
+                            # CRC del índice: el del origen, comprobado al verificar el ZIP anterior
+                            self._crcs_origen[entry.arcname] = indice.files[entry.arcname][2]
+                            self.reutilizados.add(entry.arcname)
+                            self.stats["reutilizados"] += 1
+                        elif entry.sha256 in self.blobs:
+                            inicio, escritura_previa = time.perf_counter(), fases["write"]
+                            # None si el archivo cambió tras calcular su hash: se comprime abajo
+                            zinfo = copiar_blob(zf, entry, self.blobs[entry.sha256])
+                            fases["copy"] += time.perf_counter() - inicio - (fases["write"] - escritura_previa)
+                            if zinfo is not None:
+                                self.stats["deduplicados"] += 1
+                        elif paralelo is not None:
+                            miembro = paralelo.siguiente()
+                            if miembro is None:
+                                raise CompressionCancelled(self.inv_dir.name)
+                            if miembro.datos is not None:
+                                zinfo = self._escribir_comprimido(zf, miembro)
+                                # comprimir_miembro calculó el CRC al leer el origen
+                                self._crcs_origen[entry.arcname] = miembro.zinfo.CRC
+                            else:
+                                # STORED: sin nada que adelantar, se copia desde el origen
+                                fases["probe"] += miembro.tiempos["probe"]
+                                zinfo = self._escribir_archivo(zf, entry, miembro.codec, avance, cancel_event)
+                            self.stats["comprimidos"] += 1
+                        if zinfo is None:
+                            inicio = time.perf_counter()
+                            codec = self.policy.codec_para(entry.path, entry.size)
+                            fases["probe"] += time.perf_counter() - inicio
+                            zinfo = self._escribir_archivo(zf, entry, codec, avance, cancel_event)
+                            self.stats["comprimidos"] += 1
+                        self.metricas.bytes_in += zinfo.file_size
+                        self.metricas.bytes_out += zinfo.compress_size
+                        self.metricas.archivos += 1
+                        punto.anotar(zf, entry.size, entry.mtime_ns)
+                        processed += entry.size
+                        if paralelo is not None:
+                            paralelo.escrito(entry)
+                        self._avisar(on_progress, processed, total_bytes)
+                except BaseException:
+                    # Cancelado o error: confirmar lo ya escrito y dejar el .partial para reanudar
+                    punto.confirmar(fp)
+                    raise
+                self.crcs = self._crcs_origen
+        finally:
+            punto.cerrar()
+
+        # Solo un ZIP completo llega a tener el nombre final
+        os.replace(partial, self.zip_path)
+        punto.borrar()
+        if self.incremental:
+            with zipfile.ZipFile(self.zip_path) as zf:
+                IndiceZip.desde_zip(manifest, zf, self.policy).guardar(self.zip_path)
+
+        return self.zip_path
+
+def _run_worker(index, worker, progress_queue, cancel_event):
+    """Punto de entrada del pool: reenvía el progreso por la cola"""
+    def on_progress(processed, total, name):
+        progress_queue.put((index, processed, total))
+    zip_path = worker.run(on_progress, cancel_event)
+    # En modo procesos el worker es una copia: devolver también sus resultados
+    return zip_path, worker.stats, worker.crcs, worker.reutilizados, worker.metricas
+
+def _verificar(zip_path, manifest, crcs, cancel_event, reutilizados, metricas):
+    """verificar_zip() sumando su duración a la fase "verify" de la INV"""
+    inicio = time.perf_counter()
+    try:
+        return verificar_zip(zip_path, manifest, crcs, cancel_event, reutilizados)
+    finally:
+        metricas.fases["verify"] += time.perf_counter() - inicio
+
+def default_workers():
+    """Número de workers por defecto: núcleos disponibles, máximo 8"""
+    return max(1, min(8, os.cpu_count() or 1))
+
+def hilos_por_inv(peso, total):
+    """Hilos para los archivos de una INV: su parte de los núcleos según su tamaño en el lote"""
+    nucleos = os.cpu_count() or 1
+    return max(1, min(nucleos, round(nucleos * peso / (total or 1))))
+
+class CompressionScheduler:
+    """Planificador que comprime varias INV a la vez en un pool acotado.
+
+    Se ejecuta en un hilo propio y publica CompressionEvent en self.events;
+    nunca toca widgets de Tk. Con verify=True cada ZIP terminado pasa a un
+    pool de verificación mientras se comprimen las INV siguientes, y solo
+    cuenta como completado (evento "done") si la verificación es correcta.
+
+    Las métricas de cada INV terminada (o fallida) se reúnen en
+    self.metricas; on_metricas(MetricasTrabajo), si se indica, se llama
+    desde el hilo del planificador cada vez que una INV termina.
+
+    hilos_inv fija cuántos archivos de una misma INV se comprimen a la vez;
+    por defecto cada INV recibe una parte de los núcleos proporcional a su
+    tamaño, así una INV que ocupa casi todo el lote no se queda en un núcleo.
+
+    Con dedup=True, antes de repartir las INV se buscan archivos idénticos
+    en todo el lote (ct_inv.dedup) y cada contenido repetido se comprime
+    una sola vez.
+
+    Con catalogar=True cada ZIP completado se registra en el catálogo de
+    su planta (ct_inv.catalogo), junto a las carpetas CT-*.
+
+    Con destino (ct_inv.envio) cada ZIP completado se envía al archivo
+    central en cuanto termina, con hasta envios_simultaneos envíos a la vez
+    mientras las demás INV siguen comprimiéndose; cada envío correcto
+    publica un evento "sent". Un envío fallido no invalida el ZIP: se anota
+    en self.errores_envio y no en self.errors.
+    """
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, workers, max_workers=None, use_processes=False, verify=True,
+                 on_metricas=None, detalle=False, perfil=None, dedup=False, hilos_inv=None,
+                 catalogar=False, destino=None, envios_simultaneos=SIMULTANEOS):
+        self.workers = list(workers)
+        self.max_workers = max(1, min(max_workers or default_workers(), len(self.workers) or 1))
+        self.use_processes = use_processes
+        self.verify = verify
+        self.dedup = dedup
+        self.hilos_inv = hilos_inv
+        self.catalogar = catalogar
+        self._catalogos = {}  # ruta del catálogo -> Catalogo
+        self.destino = destino
+        self.envios_simultaneos = envios_simultaneos
+        self.enviados = {}  # zip_path -> ubicación en el destino
+        self.errores_envio = []
+        self.events = queue.Queue()
+        self.completed = []
+        self.errors = []
+        self.checksums = {}  # zip_path -> SHA-256
+        self.metricas = RegistroMetricas()
+        self.on_metricas = on_metricas
+        for worker in self.workers:
+            worker.detalle = detalle
+            worker.perfil = perfil
+        self._cancel_requested = threading.Event()
+        self._thread = None
+
+    @property
+    def cancelled(self):
+        return self._cancel_requested.is_set()
+
+    def start(self):
+        """Lanzar la compresión en segundo plano"""
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        """Solicitar cancelación; las INV a medio escribir conservan su .partial y su punto de control.
+
+        La siguiente ejecución sobre la misma CT las reanuda desde el último archivo confirmado.
+        """
+        self._cancel_requested.set()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def run(self):
+        """Ejecutar todos los workers (bloqueante) publicando eventos"""
+        fractions = [0.0] * len(self.workers)
+        weights = [1] * len(self.workers)
+        envio = EnvioArchivos(self.destino, self.envios_simultaneos) if self.destino is not None else None
+        enviando = {}  # future -> índice del worker
+
+        def _report(kind, index, fraction, detail=""):
+            fractions[index] = fraction
+            overall = sum(f * w for f, w in zip(fractions, weights)) / (sum(weights) or 1) * 100
+            name = self.workers[index].inv_dir.name
+            self.events.put(CompressionEvent(kind, name, fraction * 100, overall, detail))
+
+        def _metricas(worker, estado):
+            worker.metricas.estado = estado
+            self.metricas.agregar(worker.metricas)
+            if self.on_metricas is not None:
+                self.on_metricas(worker.metricas)
+
+        def _fallo(index, mensaje):
+            worker = self.workers[index]
+            worker.error = mensaje
+            self.errors.append((worker.inv_dir.name, mensaje))
+            if worker.trabajo is not None:
+                worker.trabajo.marcar(worker.inv_dir.name, "error")
+            _metricas(worker, "error")
+            _report("error", index, 1.0, mensaje)
+
+        def _completado(index, digest=None):
+            worker = self.workers[index]
+            self.completed.append(worker.zip_path)
+            if digest is not None:
+                self.checksums[worker.zip_path] = digest
+            if worker.trabajo is not None:
+                worker.trabajo.marcar(worker.inv_dir.name, "hecho", digest)
+            _metricas(worker, "ok")
+            detalle = str(worker.zip_path)
+            if self.catalogar:
+                try:
+                    self._catalogo(worker.zip_path).actualizar_zip(worker.zip_path, digest)
+                except (sqlite3.Error, OSError, zipfile.BadZipFile) as e:
+                    # El ZIP es bueno: `ct_inv catalogo indexar` lo recogerá más tarde
+                    detalle += f" (sin catalogar: {e})"
+            _report("done", index, 1.0, detalle)
+            if envio is not None:
+                enviando[envio.enviar(worker.zip_path, digest, self._cancel_requested)] = index
+
+        def _enviado(future):
+            index = enviando.pop(future)
+            worker = self.workers[index]
+            try:
+                enviados, segundos = future.result()
+            except EnvioCancelado:
+                return
+            except Exception as e:
+                self.errores_envio.append((worker.inv_dir.name, str(e)))
+                _report("error", index, 1.0, f"Envío: {e}")
+                return
+            self.enviados[worker.zip_path] = envio.destino.uri(envio.clave(worker.zip_path))
+            detalle = self.enviados[worker.zip_path]
+            if enviados:
+                detalle += f" ({enviados / 1e6:.1f} MB en {segundos:.1f} s)"
+            else:
+                detalle += " (ya estaba)"
+            _report("sent", index, 1.0, detalle)
+
+        # Escaneo previo: el progreso global se pondera por bytes y el
+        # manifiesto queda en este proceso para etapas posteriores
+        runnable = []
+        for index, worker in enumerate(self.workers):
+            if self.cancelled:
+                break
+            try:
+                weights[index] = max(1, worker.scan().total_bytes)
+                runnable.append(index)
+            except OSError as e:
+                _fallo(index, str(e))
+        total = sum(weights[index] for index in runnable)
+        for index in runnable:
+            self.workers[index].hilos = self.hilos_inv or hilos_por_inv(weights[index], total)
+
+        if self.use_processes:
+            manager = multiprocessing.Manager()
+            progress_queue = manager.Queue()
+            cancel_event = manager.Event()
+            executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        else:
+            manager = None
+            progress_queue = queue.Queue()
+            cancel_event = threading.Event()
+            executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        # Verificación en hilos de este proceso: zlib y hashlib liberan el GIL
+        verifier = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="verificar")
+
+        if self.cancelled:
+            cancel_event.set()
+
+        deduplicador = Deduplicador() if self.dedup else None
+        pending = set()
+        try:
+            if deduplicador is not None and runnable and not self.cancelled:
+                # Hash en hilos de este proceso: atiende a cancel() sin esperar al bucle
+                deduplicador.preparar([self.workers[i] for i in runnable], verifier, executor,
+                                      self._cancel_requested)
+            futures = {executor.submit(_run_worker, i, self.workers[i], progress_queue, cancel_event): i
+                       for i in runnable}
+            verifying = {}
+            pending = set(futures)
+            while pending:
+                if self.cancelled and not cancel_event.is_set():
+                    cancel_event.set()
+                    for future in pending:
+                        future.cancel()
+                done, pending = wait(pending, timeout=self.POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                self._drain(progress_queue, _report)
+                for future in done:
+                    if future.cancelled():
+                        enviando.pop(future, None)
+                        continue
+                    if future in enviando:
+                        _enviado(future)
+                        continue
+                    if future in verifying:
+                        index = verifying.pop(future)
+                        worker = self.workers[index]
+                        try:
+                            digest = future.result()
+                        except (VerificacionError, OSError) as e:
+                            # Sin índice, la próxima pasada incremental reconstruye el ZIP
+                            ruta_indice(worker.zip_path).unlink(missing_ok=True)
+                            _fallo(index, f"Verificación: {e}")
+                            continue
+                        if digest is not None:
+                            _completado(index, digest)
+                        continue
+
+                    index = futures[future]
+                    worker = self.workers[index]
+                    try:
+                        zip_path, worker.stats, worker.crcs, worker.reutilizados, worker.metricas = future.result()
+                    except CompressionCancelled:
+                        continue
+                    except Exception as e:
+                        _fallo(index, str(e))
+                        continue
+                    if self.verify and worker.crcs is not None:
+                        # Verificar ya, en paralelo con las INV que siguen comprimiéndose
+                        _report("progress", index, 1.0, "verificando")
+                        check = verifier.submit(_verificar, zip_path, worker.manifest, worker.crcs,
+                                                cancel_event, worker.reutilizados, worker.metricas)
+                        verifying[check] = index
+                        pending.add(check)
+                    else:
+                        _completado(index)
+                # Los envíos lanzados por _completado se esperan en el mismo bucle
+                pending.update(enviando)
+        except KeyboardInterrupt:
+            # Ctrl+C con run() en el hilo principal: que el finally no espere a las INV en cola
+            self._cancel_requested.set()
+            cancel_event.set()
+            for future in pending:
+                future.cancel()
+            raise
+        finally:
+            executor.shutdown(wait=True)
+            verifier.shutdown(wait=True)
+            if envio is not None:
+                envio.close(cancelar=self.cancelled)
+            if deduplicador is not None:
+                deduplicador.limpiar()
+            for catalogo in self._catalogos.values():
+                catalogo.close()
+            self._catalogos.clear()
+            if manager:
+                manager.shutdown()
+            # Un lote terminado sin errores ya no necesita diario para reanudarse
+            for trabajo in {id(w.trabajo): w.trabajo for w in self.workers if w.trabajo is not None}.values():
+                if trabajo.completo():
+                    trabajo.borrar()
+            self.events.put(CompressionEvent("finished", overall=100.0))
+
+        return self.completed
+
+    def _catalogo(self, zip_path):
+        path = ruta_catalogo(Path(zip_path).parent)
+        if path not in self._catalogos:
+            self._catalogos[path] = Catalogo(path)
+        return self._catalogos[path]
+
+    @staticmethod
+    def _drain(progress_queue, report):
+        latest = {}
+        while True:
+            try:
+                index, processed, total = progress_queue.get_nowait()
+            except queue.Empty:
+                break
+            latest[index] = processed / total if total else 1.0
+        for index, fraction in latest.items():
+            report("progress", index, fraction)
+
+def preparar_workers(carpeta_ct, policy=None, incremental=False, inversores=None):
+    """Un CompressionWorker por cada INV-* de la CT (o por cada una de inversores).
+
+    En modo incremental se actualiza siempre INV-x.zip; si no, se crea un
+    ZIP nuevo sin pisar los existentes. Si la CT tiene un lote interrumpido
+    con la misma política, se reanuda: mismos nombres de ZIP y sin repetir
+    las INV que ya terminaron.
+    """
+    policy = policy or CompressionPolicy.auto()
+    trabajo = TrabajoCompresion.cargar(carpeta_ct)
+    if trabajo is None or trabajo.completo() or not trabajo.compatible(policy, incremental):
+        trabajo = TrabajoCompresion(carpeta_ct, policy.to_dict(), incremental)
+
+    workers = []
+    for inv_dir in buscar_inv(carpeta_ct) if inversores is None else inversores:
+        if trabajo.hecho(inv_dir.name):
+            continue
+        zip_path = trabajo.zip_de(inv_dir.name)
+        if zip_path is None:
+            if incremental:
+                zip_path = Path(carpeta_ct) / f"{inv_dir.name}.zip"
+            else:
+                zip_path = ruta_zip_libre(carpeta_ct, inv_dir)
+            trabajo.inversores[inv_dir.name] = {"zip": zip_path.name, "estado": "pendiente", "sha256": None}
+        worker = CompressionWorker(inv_dir, zip_path, policy, incremental=incremental)
+        worker.trabajo = trabajo
+        workers.append(worker)
+    if workers:
+        trabajo.guardar()
+    return workers
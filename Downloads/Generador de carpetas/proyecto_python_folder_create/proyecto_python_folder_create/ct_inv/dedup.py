@@ -0,0 +1,138 @@
+"""Archivos idénticos entre las INV de un lote: se comprimen una sola vez
+
+Los equipos PVPM y METREL repiten en cada String los mismos archivos de
+calibración, cabeceras y plantillas. Tras el escaneo se calcula el SHA-256
+de los archivos cuyo tamaño coincide con el de otro del lote; cada
+contenido repetido se comprime una vez en un almacén temporal de blobs y
+los CompressionWorker lo copian en crudo (sin recomprimir) en cada miembro.
+
+Cada INV-x.zip sigue siendo un ZIP normal y autónomo: se ahorra CPU, no
+tamaño de salida.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from collections import defaultdict
+from pathlib import Path
+
+from .flujo import BLOQUE, necesita_zip64
+from .verificacion import sha256_archivo
+from .zipcrudo import escribir_miembro_crudo, leer_miembro_crudo
+
+MINIMO = 1024  # por debajo, copiar en crudo no ahorra nada frente a comprimir
+BLOB = "blob"  # nombre del único miembro de cada blob
+
+
+def comprimir_blob(path, destino, codec, sha256):
+    """Trabajo del pool: comprimir path en el ZIP destino, que solo tiene el miembro BLOB.
+
+    El hash se recalcula sobre los mismos bytes que se comprimen: si ya no
+    es sha256 (el archivo cambió tras calcularlo) se borra el blob y se
+    devuelve None. Si no, devuelve los segundos empleados.
+    """
+    inicio = time.perf_counter()
+    h = hashlib.sha256()
+    zinfo = zipfile.ZipInfo.from_file(path, BLOB)
+    zinfo.compress_type = codec.compress_type
+    zinfo._compresslevel = codec.nivel
+    with open(path, "rb") as src, zipfile.ZipFile(destino, "w", allowZip64=True) as zf, \
+            zf.open(zinfo, "w", force_zip64=necesita_zip64(zinfo.file_size)) as dest:
+        for datos in iter(lambda: src.read(BLOQUE), b""):
+            h.update(datos)
+            dest.write(datos)
+    if h.hexdigest() != sha256:
+        os.unlink(destino)
+        return None
+    return time.perf_counter() - inicio
+
+def copiar_blob(destino, entry, blob_path):
+    """Escribir en destino el miembro entry.arcname con los bytes ya comprimidos del blob.
+
+    Devuelve el ZipInfo escrito, o None si el archivo cambió desde que se
+    calculó su hash (entonces hay que comprimirlo normalmente).
+    """
+    st = os.stat(entry.path)
+    if st.st_size != entry.size or st.st_mtime_ns != entry.mtime_ns:
+        return None
+    zinfo = zipfile.ZipInfo.from_file(entry.path, entry.arcname, strict_timestamps=destino._strict_timestamps)
+    with zipfile.ZipFile(blob_path) as blob:
+        origen = blob.getinfo(BLOB)
+        zinfo.compress_type = origen.compress_type
+        zinfo.CRC = origen.CRC
+        zinfo.compress_size = origen.compress_size
+        zinfo.flag_bits = origen.flag_bits
+        zinfo.extract_version = origen.extract_version
+        zinfo.create_version = max(zinfo.create_version, origen.create_version)
+        return escribir_miembro_crudo(destino, zinfo, leer_miembro_crudo(blob, origen))
+
+class Deduplicador:
+    """Almacén temporal de blobs de un lote de compresión.
+
+    preparar() anota el hash en las entradas de los manifiestos y deja en
+    cada worker el diccionario blobs (SHA-256 -> ruta del blob); limpiar()
+    borra el almacén cuando ya no queda ningún worker en marcha.
+    """
+    def __init__(self, minimo=MINIMO):
+        self.minimo = minimo
+        self.directorio = None
+        self.repetidos = 0  # archivos que se copiarán desde un blob
+
+    def limpiar(self):
+        if self.directorio is not None:
+            shutil.rmtree(self.directorio, ignore_errors=True)
+            self.directorio = None
+
+    def candidatos(self, workers):
+        """(worker, entry) de los archivos a comprimir cuyo tamaño se repite en el lote"""
+        por_tamano = defaultdict(list)
+        for worker in workers:
+            for entry in worker.archivos_a_comprimir():
+                if entry.size >= self.minimo:
+                    por_tamano[entry.size].append((worker, entry))
+        return [par for grupo in por_tamano.values() if len(grupo) > 1 for par in grupo]
+
+    def preparar(self, workers, hilos, executor, cancel_event):
+        """Hash de los candidatos (en hilos) y compresión de un blob por contenido repetido (en executor)"""
+        candidatos = self.candidatos(workers)
+
+        def _hash(par):
+            inicio = time.perf_counter()
+            try:
+                par[1].sha256 = sha256_archivo(par[1].path, cancel_event)
+            except OSError:
+                par[1].sha256 = None  # se comprimirá normalmente y fallará allí si sigue sin leerse
+            return par, time.perf_counter() - inicio
+
+        por_hash = defaultdict(list)
+        for (worker, entry), segundos in hilos.map(_hash, candidatos):
+            worker.metricas.fases["hash"] += segundos
+            if entry.sha256 is not None:
+                por_hash[entry.sha256].append((worker, entry))
+        if cancel_event.is_set():
+            return
+
+        self.directorio = Path(tempfile.mkdtemp(prefix="ct_inv_blobs_"))
+        pendientes = {}
+        for digest, grupo in por_hash.items():
+            if len(grupo) < 2:
+                continue
+            worker, entry = grupo[0]
+            destino = self.directorio / f"{digest}.zip"
+            codec = worker.policy.codec_para(entry.path, entry.size)
+            future = executor.submit(comprimir_blob, entry.path, destino, codec, digest)
+            pendientes[future] = (worker, grupo, destino)
+
+        for future, (primero, grupo, destino) in pendientes.items():
+            try:
+                segundos = future.result()
+            except OSError:
+                continue  # sin blob: cada copia se comprime por su cuenta
+            if segundos is None:
+                continue  # el archivo cambió tras calcular el hash: igual, cada copia por su cuenta
+            primero.metricas.fases["compress"] += segundos
+            for worker, entry in grupo:
+                worker.blobs[entry.sha256] = str(destino)
+            self.repetidos += len(grupo)
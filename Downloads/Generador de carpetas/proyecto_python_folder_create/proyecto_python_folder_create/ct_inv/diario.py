@@ -0,0 +1,134 @@
+"""Diario de operaciones: SQLite de solo inserción con índices por fecha, tipo y estado
+
+Las consultas se paginan por clave (id), así que pedir una página cuesta lo
+mismo con 100 que con 100 000 registros.
+"""
+import sqlite3
+import threading
+from dataclasses import dataclass
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS operaciones (
+    id          INTEGER PRIMARY KEY,
+    timestamp   TEXT NOT NULL,
+    tipo        TEXT NOT NULL,
+    descripcion TEXT NOT NULL,
+    estado      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_operaciones_timestamp ON operaciones(timestamp);
+CREATE INDEX IF NOT EXISTS ix_operaciones_tipo ON operaciones(tipo, id);
+CREATE INDEX IF NOT EXISTS ix_operaciones_estado ON operaciones(estado, id);
+"""
+
+
+@dataclass
+class FiltroDiario:
+    """Criterios de búsqueda; los campos vacíos no filtran.
+
+    estado se compara por prefijo ("ERROR" incluye "ERROR: Validación") y
+    texto busca en descripción y estado. desde/hasta son prefijos de fecha
+    "AAAA-MM-DD[ HH:MM:SS]", ambos incluidos.
+    """
+    tipo: str = ""
+    estado: str = ""
+    texto: str = ""
+    desde: str = ""
+    hasta: str = ""
+
+    def where(self):
+        condiciones, params = [], []
+        if self.tipo:
+            condiciones.append("tipo = ?")
+            params.append(self.tipo)
+        if self.estado:
+            # GLOB distingue mayúsculas y puede usar el índice por estado
+            condiciones.append("estado GLOB ?")
+            params.append(_glob_escape(self.estado) + "*")
+        if self.texto:
+            condiciones.append("(descripcion LIKE ? ESCAPE '\\' OR estado LIKE ? ESCAPE '\\')")
+            patron = "%" + _like_escape(self.texto) + "%"
+            params += [patron, patron]
+        if self.desde:
+            condiciones.append("timestamp >= ?")
+            params.append(self.desde)
+        if self.hasta:
+            # "2025-11-19" incluye todo ese día
+            condiciones.append("timestamp < ?")
+            params.append(self.hasta + "\uffff")
+        return condiciones, params
+
+def _like_escape(texto):
+    return texto.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _glob_escape(texto):
+    return "".join(f"[{c}]" if c in "*?[" else c for c in texto)
+
+class DiarioOperaciones:
+    """Registro permanente de operaciones (solo se insertan filas)"""
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(ESQUEMA)
+
+    def registrar(self, timestamp, tipo, descripcion, estado):
+        """Añadir una operación; devuelve su id"""
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT INTO operaciones (timestamp, tipo, descripcion, estado) VALUES (?, ?, ?, ?)",
+                (timestamp, tipo, descripcion, estado))
+            return cur.lastrowid
+
+    def registrar_varias(self, filas):
+        """Insertar en una sola transacción (timestamp, tipo, descripcion, estado) ..."""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO operaciones (timestamp, tipo, descripcion, estado) VALUES (?, ?, ?, ?)", filas)
+
+    def vacio(self):
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM operaciones LIMIT 1").fetchone() is None
+
+    def contar(self, filtro=None):
+        condiciones, params = (filtro or FiltroDiario()).where()
+        sql = "SELECT COUNT(*) FROM operaciones"
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()[0]
+
+    def pagina(self, filtro=None, limite=100, antes_de=None, despues_de=None):
+        """Página de filas (id, timestamp, tipo, descripcion, estado), de la más reciente a la más antigua.
+
+        antes_de=id de la última fila mostrada -> página siguiente;
+        despues_de=id de la primera fila mostrada -> página anterior.
+        """
+        condiciones, params = (filtro or FiltroDiario()).where()
+        orden = "DESC"
+        if antes_de is not None:
+            condiciones.append("id < ?")
+            params.append(antes_de)
+        elif despues_de is not None:
+            condiciones.append("id > ?")
+            params.append(despues_de)
+            orden = "ASC"
+        sql = "SELECT id, timestamp, tipo, descripcion, estado FROM operaciones"
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        sql += f" ORDER BY id {orden} LIMIT ?"
+        with self._lock:
+            filas = self._conn.execute(sql, params + [limite]).fetchall()
+        return filas[::-1] if orden == "ASC" else filas
+
+    def ultimas(self, n=5):
+        return self.pagina(limite=n)
+
+    def tipos(self):
+        with self._lock:
+            return [fila[0] for fila in self._conn.execute("SELECT DISTINCT tipo FROM operaciones ORDER BY tipo")]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,339 @@
+"""Envío de los ZIP terminados al archivo central
+
+Cada INV-x.zip (y su INV-x.zip.sha256) sale hacia el destino en cuanto se
+completa, mientras se siguen comprimiendo las INV restantes. Destinos:
+
+- DestinoCarpeta: carpeta local o unidad montada. Copia por bloques con
+  lectura adelantada a un .tmp y rename atómico.
+- DestinoS3: cualquier servicio compatible con S3 (AWS, MinIO, Ceph...).
+  Solo usa http.client: PUT directo hasta PARTE bytes y multipart por
+  encima, con Content-MD5 en cada parte, firma SigV4 y una conexión
+  persistente por hilo. El endpoint es configurable, así que en pruebas se
+  puede apuntar a un MinIO local.
+
+Las claves siguen la estructura de la planta: CT-1/INV-1.zip. Un archivo
+que ya está en el destino con el mismo tamaño (y mtime o SHA-256) no se
+vuelve a enviar. Los fallos de red y las respuestas 5xx/429 se reintentan
+con espera exponencial; en multipart solo se repite la parte que falló.
+"""
+import base64
+import hashlib
+import hmac
+import http.client
+import os
+import threading
+import time
+import urllib.parse
+import urllib.request
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .flujo import LectorBloques
+from .verificacion import SHA256_SUFIJO, leer_sha256, ruta_sha256
+
+PARTE = 16 * 1024 * 1024  # tamaño de parte multipart (S3 exige al menos 5 MiB salvo en la última)
+SIMULTANEOS = 4           # archivos enviándose a la vez
+REINTENTOS = 4
+ESPERA = 1.0              # segundos antes del primer reintento; se duplica en cada uno
+TIMEOUT = 60
+
+
+class EnvioError(Exception):
+    """El archivo no se pudo enviar al destino"""
+
+class EnvioCancelado(EnvioError):
+    """El envío se interrumpió por una cancelación"""
+
+class _Transitorio(EnvioError):
+    """Fallo que puede salir bien al repetirlo (5xx, 429)"""
+
+_ERRORES_RED = (ConnectionError, TimeoutError, http.client.HTTPException, _Transitorio)
+
+def reintentar(operacion, reintentos=REINTENTOS, cancel_event=None, transitorios=_ERRORES_RED):
+    """operacion() repitiéndola ante errores transitorios, con espera exponencial"""
+    espera = ESPERA
+    for intento in range(reintentos + 1):
+        if cancel_event is not None and cancel_event.is_set():
+            raise EnvioCancelado("envío cancelado")
+        try:
+            return operacion()
+        except transitorios as e:
+            if intento == reintentos:
+                raise EnvioError(f"{e} (tras {intento + 1} intentos)") from e
+        if cancel_event is not None:
+            cancel_event.wait(espera)
+        else:
+            time.sleep(espera)
+        espera *= 2
+
+def _cancelado(cancel_event):
+    if cancel_event is not None and cancel_event.is_set():
+        raise EnvioCancelado("envío cancelado")
+
+class DestinoCarpeta:
+    """Carpeta local o unidad de red montada"""
+    def __init__(self, raiz, reintentos=REINTENTOS):
+        self.raiz = Path(raiz)
+        self.reintentos = reintentos
+
+    def __str__(self):
+        return str(self.raiz)
+
+    def uri(self, clave):
+        return str(self.raiz / clave)
+
+    def enviar(self, origen, clave, sha256=None, cancel_event=None):
+        """Copiar origen a raiz/clave; devuelve los bytes copiados (0 si ya estaba igual)"""
+        destino = self.raiz / clave
+        st = os.stat(origen)
+        try:
+            actual = destino.stat()
+            if (actual.st_size, actual.st_mtime_ns) == (st.st_size, st.st_mtime_ns):
+                return 0
+        except FileNotFoundError:
+            pass
+        # En una unidad de red cualquier error de E/S puede ser un corte momentáneo
+        reintentar(lambda: self._copiar(origen, destino, st, cancel_event), self.reintentos, cancel_event,
+                   (OSError,))
+        return st.st_size
+
+    def _copiar(self, origen, destino, st, cancel_event):
+        destino.parent.mkdir(parents=True, exist_ok=True)
+        tmp = destino.with_name(f"{destino.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+        try:
+            with open(origen, "rb") as src, open(tmp, "wb") as dst:
+                with LectorBloques(src, st.st_size) as lector:
+                    for datos in lector:
+                        _cancelado(cancel_event)
+                        dst.write(datos)
+            # Mismo mtime que el origen: así se reconoce en el próximo envío
+            os.utime(tmp, ns=(st.st_atime_ns, st.st_mtime_ns))
+            os.replace(tmp, destino)
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    def close(self):
+        pass
+
+def _texto(xml, etiqueta):
+    """Texto del primer elemento etiqueta de una respuesta XML de S3 (con o sin espacio de nombres)"""
+    try:
+        raiz = ET.fromstring(xml)
+    except ET.ParseError:
+        return None
+    for elem in raiz.iter():
+        if elem.tag.rsplit("}", 1)[-1] == etiqueta:
+            return elem.text
+    return None
+
+def _hex_sha256(datos):
+    return hashlib.sha256(datos).hexdigest()
+
+def _firma(clave, mensaje):
+    return hmac.new(clave, mensaje.encode("utf-8"), hashlib.sha256).digest()
+
+def firma_v4(metodo, ruta, consulta, cabeceras, hash_cuerpo, access_key, secret_key, region, servicio="s3"):
+    """(petición canónica, cabecera Authorization) de AWS Signature Version 4.
+
+    ruta y consulta ya codificadas; cabeceras debe traer host y x-amz-date
+    y se firman todas.
+    """
+    valores = {k.lower(): " ".join(str(v).split()) for k, v in cabeceras.items()}
+    amz_fecha = valores["x-amz-date"]
+    firmadas = sorted(valores)
+    canonica = "\n".join([
+        metodo, ruta, consulta,
+        "".join(f"{k}:{valores[k]}\n" for k in firmadas),
+        ";".join(firmadas), hash_cuerpo])
+    alcance = f"{amz_fecha[:8]}/{region}/{servicio}/aws4_request"
+    texto = "\n".join(["AWS4-HMAC-SHA256", amz_fecha, alcance, _hex_sha256(canonica.encode("utf-8"))])
+    clave = ("AWS4" + secret_key).encode("utf-8")
+    for parte in (amz_fecha[:8], region, servicio, "aws4_request"):
+        clave = _firma(clave, parte)
+    firma = hmac.new(clave, texto.encode("utf-8"), hashlib.sha256).hexdigest()
+    return canonica, (f"AWS4-HMAC-SHA256 Credential={access_key}/{alcance}, "
+                      f"SignedHeaders={';'.join(firmadas)}, Signature={firma}")
+
+class DestinoS3:
+    """Bucket de un servicio compatible con S3 (direccionamiento por ruta: endpoint/bucket/clave).
+
+    Sin endpoint se usan AWS_ENDPOINT_URL_S3 o AWS_ENDPOINT_URL, y si no
+    hay ninguno, AWS en la región indicada. Las credenciales salen de
+    AWS_ACCESS_KEY_ID y AWS_SECRET_ACCESS_KEY; sin ellas las peticiones van
+    sin firmar (bucket público o almacén local de pruebas).
+    """
+    def __init__(self, bucket, prefijo="", endpoint=None, region=None, access_key=None, secret_key=None,
+                 parte=PARTE, reintentos=REINTENTOS, timeout=TIMEOUT):
+        self.bucket = bucket
+        self.prefijo = prefijo.strip("/") + "/" if prefijo.strip("/") else ""
+        self.region = region or os.environ.get("AWS_REGION") or os.environ.get("AWS_DEFAULT_REGION") or "us-east-1"
+        endpoint = (endpoint or os.environ.get("AWS_ENDPOINT_URL_S3") or os.environ.get("AWS_ENDPOINT_URL")
+                    or f"https://s3.{self.region}.amazonaws.com")
+        url = urllib.parse.urlsplit(endpoint)
+        self.https = url.scheme == "https"
+        self.host = url.netloc
+        self.access_key = access_key or os.environ.get("AWS_ACCESS_KEY_ID")
+        self.secret_key = secret_key or os.environ.get("AWS_SECRET_ACCESS_KEY")
+        self.parte = max(parte, 5 * 1024 * 1024)
+        self.reintentos = reintentos
+        self.timeout = timeout
+        self._local = threading.local()
+        self._conexiones = []
+        self._lock = threading.Lock()
+
+    def __str__(self):
+        return f"s3://{self.bucket}/{self.prefijo}"
+
+    def uri(self, clave):
+        return f"s3://{self.bucket}/{self.prefijo}{clave}"
+
+    def _conexion(self):
+        """Conexión persistente de este hilo (keep-alive entre peticiones y partes)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            clase = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            conn = clase(self.host, timeout=self.timeout)
+            self._local.conn = conn
+            with self._lock:
+                self._conexiones.append(conn)
+        return conn
+
+    def _firmar(self, metodo, ruta, consulta, cabeceras, hash_cuerpo):
+        """Cabecera Authorization de AWS Signature Version 4"""
+        amz_fecha = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+        cabeceras["x-amz-date"] = amz_fecha
+        cabeceras["x-amz-content-sha256"] = hash_cuerpo
+        if not self.access_key:
+            return
+        # http.client añade Host al enviar: se firma con el mismo valor
+        _, cabeceras["Authorization"] = firma_v4(metodo, ruta, consulta, {**cabeceras, "host": self.host},
+                                                 hash_cuerpo, self.access_key, self.secret_key, self.region)
+
+    def _peticion(self, metodo, clave, consulta=None, cuerpo=b"", cabeceras=None, esperado=(200,)):
+        """Una petición firmada; devuelve (respuesta, cuerpo de la respuesta)"""
+        ruta = "/" + urllib.parse.quote(f"{self.bucket}/{self.prefijo}{clave}", safe="/-_.~")
+        consulta = "&".join(f"{urllib.parse.quote(k, safe='-_.~')}={urllib.parse.quote(v, safe='-_.~')}"
+                            for k, v in sorted((consulta or {}).items()))
+        cabeceras = dict(cabeceras or {})
+        if cuerpo:
+            cabeceras["Content-MD5"] = base64.b64encode(hashlib.md5(cuerpo).digest()).decode("ascii")
+        self._firmar(metodo, ruta, consulta, cabeceras, _hex_sha256(cuerpo))
+        conn = self._conexion()
+        try:
+            conn.request(metodo, ruta + ("?" + consulta if consulta else ""), body=cuerpo, headers=cabeceras)
+            respuesta = conn.getresponse()
+            datos = respuesta.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()  # la siguiente petición abre otra
+            raise
+        if respuesta.status in esperado:
+            return respuesta, datos
+        detalle = _texto(datos, "Message") or _texto(datos, "Code") or respuesta.reason
+        error = f"{metodo} {self.uri(clave)}: HTTP {respuesta.status} {detalle}"
+        if respuesta.status >= 500 or respuesta.status == 429:
+            raise _Transitorio(error)
+        raise EnvioError(error)
+
+    def _pedir(self, cancel_event, *args, **kwargs):
+        return reintentar(lambda: self._peticion(*args, **kwargs), self.reintentos, cancel_event)
+
+    def enviar(self, origen, clave, sha256=None, cancel_event=None):
+        """Subir origen como clave; devuelve los bytes subidos (0 si ya estaba con el mismo SHA-256)"""
+        tamano = os.path.getsize(origen)
+        if sha256 is not None:
+            respuesta, _ = self._pedir(cancel_event, "HEAD", clave, esperado=(200, 404))
+            if (respuesta.status == 200 and respuesta.getheader("Content-Length") == str(tamano)
+                    and respuesta.getheader("x-amz-meta-sha256") == sha256):
+                return 0
+        metadatos = {"x-amz-meta-sha256": sha256} if sha256 else {}
+        if tamano <= self.parte:
+            with open(origen, "rb") as f:
+                datos = f.read()
+            self._pedir(cancel_event, "PUT", clave, cuerpo=datos, cabeceras=metadatos)
+            return len(datos)
+        return self._multipart(origen, clave, tamano, metadatos, cancel_event)
+
+    def _multipart(self, origen, clave, tamano, metadatos, cancel_event):
+        _, xml = self._pedir(cancel_event, "POST", clave, {"uploads": ""}, cabeceras=metadatos)
+        upload_id = _texto(xml, "UploadId")
+        if not upload_id:
+            raise EnvioError(f"{self.uri(clave)}: el servidor no devolvió UploadId")
+        partes = []
+        enviados = 0
+        try:
+            with open(origen, "rb") as f:
+                # La parte siguiente se lee mientras sube la actual; sin mmap todas miden self.parte
+                with LectorBloques(f, tamano, bloque=self.parte, profundidad=1, usar_mmap=False) as lector:
+                    for numero, datos in enumerate(lector, 1):
+                        _cancelado(cancel_event)
+                        respuesta, _ = self._pedir(cancel_event, "PUT", clave,
+                                                   {"partNumber": str(numero), "uploadId": upload_id}, datos)
+                        partes.append((numero, respuesta.getheader("ETag")))
+                        enviados += len(datos)
+            cuerpo = ("<CompleteMultipartUpload>"
+                      + "".join(f"<Part><PartNumber>{n}</PartNumber><ETag>{etag}</ETag></Part>" for n, etag in partes)
+                      + "</CompleteMultipartUpload>").encode("utf-8")
+            _, xml = self._pedir(cancel_event, "POST", clave, {"uploadId": upload_id}, cuerpo)
+            # S3 puede responder 200 y describir el error en el cuerpo
+            if _texto(xml, "Code"):
+                raise EnvioError(f"{self.uri(clave)}: {_texto(xml, 'Message') or _texto(xml, 'Code')}")
+        except BaseException:
+            try:
+                self._peticion("DELETE", clave, {"uploadId": upload_id}, esperado=(200, 204, 404))
+            except (OSError, http.client.HTTPException, EnvioError):
+                pass  # el servidor caduca las subidas abandonadas
+            raise
+        return enviados
+
+    def close(self):
+        with self._lock:
+            for conn in self._conexiones:
+                conn.close()
+            self._conexiones.clear()
+
+def abrir_destino(uri):
+    """Destino a partir de una ruta, file://... o s3://bucket/prefijo[?endpoint=http://host:9000]"""
+    url = urllib.parse.urlsplit(str(uri))
+    if url.scheme == "s3":
+        opciones = dict(urllib.parse.parse_qsl(url.query))
+        return DestinoS3(url.netloc, url.path, endpoint=opciones.get("endpoint"), region=opciones.get("region"))
+    if url.scheme == "file":
+        return DestinoCarpeta(urllib.request.url2pathname(url.path))
+    return DestinoCarpeta(uri)
+
+class EnvioArchivos:
+    """Etapa de salida: envía cada ZIP terminado en un pool de simultaneos hilos.
+
+    enviar() devuelve un Future con (bytes enviados, segundos). El SHA-256
+    de la verificación se usa para no repetir envíos y el INV-x.zip.sha256
+    viaja junto al ZIP; sin SHA-256 de esta pasada (INV sin cambios en modo
+    incremental) se toma del INV-x.zip.sha256 si es posterior al ZIP.
+    """
+    def __init__(self, destino, simultaneos=SIMULTANEOS):
+        self.destino = destino
+        self._pool = ThreadPoolExecutor(max_workers=max(1, simultaneos), thread_name_prefix="envio")
+
+    @staticmethod
+    def clave(zip_path):
+        """CT-x/INV-y.zip"""
+        zip_path = Path(zip_path)
+        return f"{zip_path.parent.name}/{zip_path.name}"
+
+    def enviar(self, zip_path, sha256=None, cancel_event=None):
+        return self._pool.submit(self._enviar, Path(zip_path), sha256, cancel_event)
+
+    def _enviar(self, zip_path, sha256, cancel_event):
+        inicio = time.perf_counter()
+        clave = self.clave(zip_path)
+        if sha256 is None:
+            # leer_sha256 descarta un .sha256 anterior al ZIP: ya no le corresponde
+            sha256 = leer_sha256(zip_path)
+        enviados = self.destino.enviar(zip_path, clave, sha256, cancel_event)
+        if sha256 is not None:
+            self.destino.enviar(ruta_sha256(zip_path), clave + SHA256_SUFIJO, None, cancel_event)
+        return enviados, time.perf_counter() - inicio
+
+    def close(self, cancelar=False):
+        self._pool.shutdown(wait=True, cancel_futures=cancelar)
+        self.destino.close()
@@ -0,0 +1,56 @@
+"""Escaneo de una carpeta INV en una sola pasada con os.scandir"""
+import os
+from dataclasses import dataclass, field, asdict
+
+
+@dataclass
+class FileEntry:
+    """Archivo del manifiesto: ruta en disco, nombre dentro del ZIP y metadatos"""
+    path: str
+    arcname: str
+    size: int
+    mtime_ns: int
+    sha256: str = None  # solo si se buscaron repetidos (ct_inv.dedup)
+
+@dataclass
+class Manifest:
+    """Resultado del escaneo de una INV, reutilizable por etapas posteriores"""
+    root: str
+    files: list = field(default_factory=list)
+    dirs: list = field(default_factory=list)
+
+    @property
+    def total_bytes(self):
+        return sum(entry.size for entry in self.files)
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(root=data["root"], files=[FileEntry(**f) for f in data.get("files", [])],
+                   dirs=list(data.get("dirs", [])))
+
+def escanear_inv(inv_dir):
+    """Recorrer inv_dir una sola vez; los arcnames empiezan por el nombre de la INV"""
+    inv_dir = os.fspath(inv_dir)
+    manifest = Manifest(root=inv_dir)
+    pendientes = [(inv_dir, os.path.basename(os.path.normpath(inv_dir)) + "/")]
+
+    while pendientes:
+        carpeta, prefijo = pendientes.pop()
+        with os.scandir(carpeta) as it:
+            entries = sorted(it, key=lambda e: e.name)
+        subdirs = []
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                arcdir = prefijo + entry.name + "/"
+                manifest.dirs.append(arcdir)
+                subdirs.append((entry.path, arcdir))
+            elif entry.is_file():
+                st = entry.stat()
+                manifest.files.append(FileEntry(entry.path, prefijo + entry.name, st.st_size, st.st_mtime_ns))
+        # Orden de recorrido estable (alfabético en profundidad)
+        pendientes.extend(reversed(subdirs))
+
+    return manifest
@@ -0,0 +1,55 @@
+"""Creación de la estructura CT/INV/String"""
+from pathlib import Path
+
+DISPOSITIVOS = ("PVPM", "METREL")
+MAX_INVERSOR = 50
+MAX_STRINGS = 100
+
+
+def validar_parametros(numero_inv, strings, dispositivo="PVPM"):
+    """Validar inversor (1-50), strings (1-100) y dispositivo; devuelve los enteros"""
+    numero_inv, strings = str(numero_inv).strip(), str(strings).strip()
+    if not numero_inv.isdigit():
+        raise ValueError("Inversor debe ser un número")
+    if not strings.isdigit():
+        raise ValueError("Strings debe ser un número")
+
+    numero_inv_int = int(numero_inv)
+    strings_int = int(strings)
+
+    if numero_inv_int < 1 or numero_inv_int > MAX_INVERSOR:
+        raise ValueError(f"El inversor debe estar entre 1 y {MAX_INVERSOR}")
+    if strings_int < 1 or strings_int > MAX_STRINGS:
+        raise ValueError(f"Los strings deben estar entre 1 y {MAX_STRINGS}")
+    if dispositivo not in DISPOSITIVOS:
+        raise ValueError(f"Dispositivo debe ser uno de: {', '.join(DISPOSITIVOS)}")
+    return numero_inv_int, strings_int
+
+def ruta_inversor(ruta, nombre_ct, numero_inv, dispositivo):
+    """Ruta CT-x/INV-y-DISPOSITIVO"""
+    return Path(ruta) / f"CT-{nombre_ct}" / f"INV-{numero_inv}-{dispositivo}"
+
+def crear_estructura(ruta, nombre_ct, numero_inv, strings, dispositivo="PVPM", on_progress=None, existentes=None):
+    """Crear CT-x/INV-y-DISPOSITIVO/String-1..N; on_progress(creados, total)
+
+    existentes: nombres de String que ya se sabe que existen (p. ej. del
+    ArbolPlanta); solo se omite su mkdir, y no si la INV no existía.
+    """
+    if not str(nombre_ct).strip():
+        raise ValueError("Número CT no puede estar vacío")
+    _, strings_int = validar_parametros(numero_inv, strings, dispositivo)
+
+    carpeta_inv = ruta_inversor(ruta, str(nombre_ct).strip(), str(numero_inv).strip(), dispositivo)
+    existentes = existentes or ()
+    # Siempre: el índice puede estar desfasado si la INV se borró después de escanearla
+    try:
+        carpeta_inv.mkdir(parents=True)
+        existentes = ()  # INV nueva: no hay String que omitir
+    except FileExistsError:
+        pass
+    for i in range(1, strings_int + 1):
+        if f"String-{i}" not in existentes:
+            (carpeta_inv / f"String-{i}").mkdir(exist_ok=True)
+        if on_progress:
+            on_progress(i, strings_int)
+    return carpeta_inv
@@ -0,0 +1,250 @@
+"""Lectura y escritura en streaming para INV muy grandes, con memoria acotada
+
+- LectorBloques: bloques grandes de tamaño fijo. Los archivos medianos se leen
+  en un hilo que va por delante (readinto sobre un juego fijo de buffers y
+  cola acotada); los muy grandes se proyectan en memoria (mmap) por ventanas
+  de VENTANA bytes y se recorren con memoryview, sin copias.
+- EscrituraDiferida: write() encola y un hilo escribe en disco con un tope de
+  bytes pendientes, así la compresión no espera a una unidad de red lenta y la
+  memoria no crece sin límite.
+
+Con ambos, lectura, compresión y escritura se solapan. Memoria por INV:
+(PROFUNDIDAD + 1) * BLOQUE o una VENTANA para leer y EN_VUELO para escribir.
+"""
+import collections
+import mmap
+import os
+import queue
+import threading
+
+BLOQUE = 4 * 1024 * 1024
+PROFUNDIDAD = 3                  # bloques leídos por delante
+MMAP_UMBRAL = 256 * 1024 * 1024  # desde este tamaño se usa mmap
+VENTANA = 64 * 1024 * 1024       # tramo proyectado a la vez (múltiplo de mmap.ALLOCATIONGRANULARITY)
+EN_VUELO = 16 * 1024 * 1024      # bytes pendientes de escribir como máximo
+ZIP64_UMBRAL = 1024 ** 3
+
+
+def necesita_zip64(size):
+    """ZIP64 desde la cabecera local para miembros desde 1 GiB.
+
+    zipfile solo lo activa si el tamaño supera 4 GiB / 1.05; con margen, un
+    archivo que crece mientras se lee no falla al pasar de 4 GiB.
+    """
+    return size >= ZIP64_UMBRAL
+
+class LectorBloques:
+    """Bloques de un archivo abierto en binario; usar con `with`.
+
+    Los bloques son memoryview sobre buffers que se reutilizan: hay que
+    consumirlos (comprimir o copiar) antes de pedir el siguiente.
+    """
+    def __init__(self, f, size, bloque=BLOQUE, profundidad=PROFUNDIDAD, usar_mmap=None):
+        self.f = f
+        self.size = size
+        self.bloque = bloque
+        self.profundidad = profundidad
+        self.usar_mmap = size >= MMAP_UMBRAL if usar_mmap is None else usar_mmap
+        self._mm = None
+        self._hilo = None
+        self._parar = threading.Event()
+        self._libres = queue.Queue()
+        self._llenos = queue.Queue()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __iter__(self):
+        if self.size <= self.bloque:
+            return self._directo()
+        if self.usar_mmap:
+            try:
+                return self._proyectado(os.fstat(self.f.fileno()).st_size)
+            except (OSError, ValueError):
+                pass  # sin soporte de mmap: lectura con buffers
+        return self._adelantado()
+
+    def _directo(self):
+        while True:
+            datos = self.f.read(self.bloque)
+            if not datos:
+                return
+            yield datos
+
+    def _proyectado(self, total):
+        # Una ventana cada vez: la memoria residente no crece con el tamaño del archivo
+        self._mm = mmap.mmap(self.f.fileno(), min(VENTANA, total), access=mmap.ACCESS_READ)
+        return self._ventanas(total)
+
+    def _ventanas(self, total):
+        posicion = 0
+        while True:
+            if hasattr(self._mm, "madvise"):
+                self._mm.madvise(mmap.MADV_SEQUENTIAL)
+            vista = memoryview(self._mm)
+            for inicio in range(0, len(vista), self.bloque):
+                yield vista[inicio:inicio + self.bloque]
+            posicion += len(vista)
+            vista.release()
+            self._cerrar_mapa()
+            if posicion >= total:
+                return
+            self._mm = mmap.mmap(self.f.fileno(), min(VENTANA, total - posicion),
+                                 access=mmap.ACCESS_READ, offset=posicion)
+
+    def _adelantado(self):
+        for _ in range(self.profundidad + 1):
+            self._libres.put(bytearray(self.bloque))
+        self._hilo = threading.Thread(target=self._leer, name="LectorBloques", daemon=True)
+        self._hilo.start()
+        anterior = None
+        while True:
+            buf, n, error = self._llenos.get()
+            if anterior is not None:
+                self._libres.put(anterior)  # el consumidor ya terminó con el bloque previo
+            if error is not None:
+                raise error
+            if n == 0:
+                return
+            anterior = buf
+            yield memoryview(buf)[:n]
+
+    def _leer(self):
+        try:
+            while not self._parar.is_set():
+                buf = self._libres.get()
+                if buf is None:
+                    return
+                n = self.f.readinto(buf)
+                self._llenos.put((buf, n, None))
+                if not n:
+                    return
+        except BaseException as e:
+            self._llenos.put((None, 0, e))
+
+    def close(self):
+        if self._hilo is not None:
+            self._parar.set()
+            self._libres.put(None)
+            self._hilo.join()
+            self._hilo = None
+        self._cerrar_mapa()
+
+    def _cerrar_mapa(self):
+        if self._mm is not None:
+            try:
+                self._mm.close()
+            except BufferError:
+                pass  # queda un bloque vivo: el mapa se libera con él
+            self._mm = None
+
+class EscrituraDiferida:
+    """Archivo de salida escrito por un hilo, con como mucho en_vuelo bytes pendientes.
+
+    tell() se lleva en memoria; seek() a otra posición, flush(), truncate() y
+    close() esperan a que se vacíe la cola. Un error del hilo escritor se
+    relanza en la siguiente llamada.
+    """
+    def __init__(self, fp, en_vuelo=EN_VUELO):
+        self._fp = fp
+        self._en_vuelo = en_vuelo
+        self._pendientes = collections.deque()
+        self._bytes = 0
+        self._error = None
+        self._cerrado = False
+        self._cond = threading.Condition()
+        self._pos = fp.tell()
+        self._hilo = threading.Thread(target=self._escribir, name="EscrituraDiferida", daemon=True)
+        self._hilo.start()
+
+    def _escribir(self):
+        while True:
+            with self._cond:
+                while not self._pendientes and not self._cerrado:
+                    self._cond.wait()
+                if not self._pendientes:
+                    return
+                datos = self._pendientes[0]
+            try:
+                if self._error is None:
+                    self._fp.write(datos)
+            except BaseException as e:
+                self._error = e
+            with self._cond:
+                self._pendientes.popleft()
+                self._bytes -= len(datos)
+                self._cond.notify_all()
+
+    def _comprobar(self):
+        if self._error is not None:
+            raise self._error
+
+    def _vaciar(self):
+        with self._cond:
+            while self._pendientes:
+                self._cond.wait()
+        self._comprobar()
+
+    def write(self, datos):
+        self._comprobar()
+        if not isinstance(datos, bytes):
+            datos = bytes(datos)  # memoryview de un buffer que el lector reutilizará
+        n = len(datos)
+        if not n:
+            return 0
+        with self._cond:
+            # Un bloque mayor que el tope entra en cuanto la cola se vacía
+            while self._bytes and self._bytes + n > self._en_vuelo and self._error is None:
+                self._cond.wait()
+            self._pendientes.append(datos)
+            self._bytes += n
+            self._cond.notify_all()
+        self._pos += n
+        return n
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, pos, whence=0):
+        if whence == 0 and pos == self._pos:
+            return pos  # zipfile vuelve a start_dir antes de cada miembro: no hace falta esperar
+        self._vaciar()
+        self._fp.seek(pos, whence)
+        self._pos = self._fp.tell()
+        return self._pos
+
+    def seekable(self):
+        return self._fp.seekable()
+
+    def flush(self):
+        self._vaciar()
+        self._fp.flush()
+
+    def fileno(self):
+        return self._fp.fileno()
+
+    def truncate(self, size=None):
+        self._vaciar()
+        return self._fp.truncate(size)
+
+    def close(self):
+        if self._cerrado:
+            return
+        with self._cond:
+            self._cerrado = True
+            self._cond.notify_all()
+        self._hilo.join()
+        self._fp.close()
+        self._comprobar()
+
+    def __getattr__(self, nombre):
+        return getattr(self._fp, nombre)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
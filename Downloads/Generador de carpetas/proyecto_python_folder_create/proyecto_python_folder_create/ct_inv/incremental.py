@@ -0,0 +1,88 @@
+"""Índice por ZIP para recomprimir solo los archivos que cambiaron
+
+INV-x.zip.manifest.json guarda tamaño, mtime y CRC-32 de cada archivo del
+último ZIP. En modo incremental el CompressionWorker copia del ZIP anterior,
+sin recomprimir (ct_inv.zipcrudo), los miembros cuyo archivo no cambió, y
+la verificación los da por buenos con el CRC del índice.
+"""
+import json
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .persistencia import escribir_json_atomico
+
+INDICE_SUFIJO = ".manifest.json"
+INDICE_VERSION = 1
+
+
+def ruta_indice(zip_path):
+    """INV-x.zip -> INV-x.zip.manifest.json"""
+    zip_path = Path(zip_path)
+    return zip_path.with_name(zip_path.name + INDICE_SUFIJO)
+
+def crc32_archivo(path, chunk=1024 * 1024):
+    crc = 0
+    with open(path, "rb") as f:
+        while True:
+            datos = f.read(chunk)
+            if not datos:
+                return crc
+            crc = zlib.crc32(datos, crc)
+
+@dataclass
+class IndiceZip:
+    """Tamaño, mtime y CRC-32 de cada archivo del último ZIP generado"""
+    policy: dict = field(default_factory=dict)
+    files: dict = field(default_factory=dict)  # arcname -> [size, mtime_ns, crc]
+    dirs: list = field(default_factory=list)
+
+    @classmethod
+    def cargar(cls, zip_path):
+        """Índice del ZIP, o None si no existe o está dañado"""
+        try:
+            with open(ruta_indice(zip_path), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != INDICE_VERSION:
+                return None
+            return cls(policy=data["policy"], files=data["files"], dirs=data["dirs"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def guardar(self, zip_path):
+        """Escritura atómica junto al ZIP"""
+        escribir_json_atomico(ruta_indice(zip_path), {"version": INDICE_VERSION, "policy": self.policy,
+                                                      "files": self.files, "dirs": self.dirs})
+
+    @classmethod
+    def desde_zip(cls, manifest, zf, policy):
+        """Construir el índice a partir del manifiesto escaneado y los CRC del ZIP escrito"""
+        files = {}
+        for entry in manifest.files:
+            zinfo = zf.NameToInfo.get(entry.arcname)
+            if zinfo is not None:
+                files[entry.arcname] = [entry.size, entry.mtime_ns, zinfo.CRC]
+        return cls(policy=policy.to_dict(), files=files, dirs=list(manifest.dirs))
+
+    def sin_cambios(self, manifest):
+        """True si el árbol tiene exactamente los mismos archivos, tamaños y mtimes"""
+        if self.dirs != manifest.dirs or len(self.files) != len(manifest.files):
+            return False
+        for entry in manifest.files:
+            previo = self.files.get(entry.arcname)
+            if previo is None or previo[0] != entry.size or previo[1] != entry.mtime_ns:
+                return False
+        return True
+
+    def miembro_reutilizable(self, entry, zip_anterior):
+        """ZipInfo del ZIP anterior si el archivo no cambió; None si hay que recomprimir"""
+        previo = self.files.get(entry.arcname)
+        if previo is None or previo[0] != entry.size:
+            return None
+        zinfo = zip_anterior.NameToInfo.get(entry.arcname)
+        if zinfo is None or zinfo.CRC != previo[2] or zinfo.file_size != entry.size:
+            return None
+        if previo[1] == entry.mtime_ns:
+            return zinfo
+        # mtime distinto pero mismo tamaño: comprobar contenido por CRC
+        return zinfo if crc32_archivo(entry.path) == previo[2] else None
@@ -0,0 +1,168 @@
+"""Métricas de los trabajos de compresión: tiempos por fase, bytes y exportación
+
+Cada CompressionWorker acumula en un MetricasTrabajo el tiempo de cada fase
+(escaneo, hash de archivos repetidos, stat, sondeo de compresibilidad, apertura, lectura, compresión,
+escritura, copia cruda, callbacks de progreso y verificación). El
+planificador las reúne en un RegistroMetricas, que se exporta como log JSON
+por líneas o como archivo de texto de Prometheus (textfile collector). Con
+detalle se guarda además un registro por archivo, y con perfil un volcado de
+cProfile por INV.
+"""
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+
+FASES = ("scan", "hash", "stat", "probe", "open", "read", "compress", "write", "copy", "callback", "verify")
+
+
+def _fases():
+    return dict.fromkeys(FASES, 0.0)
+
+@dataclass
+class MetricasTrabajo:
+    """Tiempos (segundos) y volúmenes de una INV"""
+    inv: str = ""
+    zip: str = ""
+    estado: str = "ok"
+    segundos: float = 0.0
+    fases: dict = field(default_factory=_fases)
+    bytes_in: int = 0
+    bytes_out: int = 0
+    archivos: int = 0
+    archivos_detalle: list = field(default_factory=list)
+
+    @property
+    def ratio(self):
+        return self.bytes_out / self.bytes_in if self.bytes_in else 1.0
+
+    def to_dict(self, detalle=True):
+        data = asdict(self)
+        data["ratio"] = round(self.ratio, 4)
+        data["fases"] = {fase: round(s, 6) for fase, s in self.fases.items()}
+        if not detalle:
+            data.pop("archivos_detalle")
+        return data
+
+class EscrituraCronometrada:
+    """Envuelve el archivo de salida del ZIP y suma el tiempo de write() en la fase "write".
+
+    El resto de atributos (tell, seek, flush, fileno...) pasan tal cual.
+    """
+    def __init__(self, fp, metricas):
+        self._fp = fp
+        self._metricas = metricas
+
+    def write(self, datos):
+        inicio = time.perf_counter()
+        n = self._fp.write(datos)
+        self._metricas.fases["write"] += time.perf_counter() - inicio
+        return n
+
+    def __getattr__(self, nombre):
+        return getattr(self._fp, nombre)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._fp.close()
+
+class RegistroMetricas:
+    """Métricas de todos los trabajos de un lote, más el tiempo gastado en la interfaz"""
+    def __init__(self):
+        self.trabajos = []
+        self.ui_segundos = 0.0
+        self.ui_llamadas = 0
+        self.inicio = time.time()
+
+    def agregar(self, metricas):
+        self.trabajos.append(metricas)
+
+    def registrar_ui(self, segundos):
+        """Tiempo de un refresco de la interfaz (p. ej. _poll_compression)"""
+        self.ui_segundos += segundos
+        self.ui_llamadas += 1
+
+    def totales(self):
+        fases = _fases()
+        for trabajo in self.trabajos:
+            for fase, segundos in trabajo.fases.items():
+                fases[fase] += segundos
+        bytes_in = sum(t.bytes_in for t in self.trabajos)
+        bytes_out = sum(t.bytes_out for t in self.trabajos)
+        return {
+            "trabajos": len(self.trabajos),
+            "errores": sum(1 for t in self.trabajos if t.estado != "ok"),
+            "archivos": sum(t.archivos for t in self.trabajos),
+            "bytes_in": bytes_in,
+            "bytes_out": bytes_out,
+            "ratio": round(bytes_out / bytes_in, 4) if bytes_in else 1.0,
+            "fases": {fase: round(s, 6) for fase, s in fases.items()},
+            "ui_segundos": round(self.ui_segundos, 6),
+            "ui_llamadas": self.ui_llamadas,
+        }
+
+    def escribir_jsonl(self, path, detalle=False):
+        """Añadir al log estructurado una línea por INV (y por archivo si detalle) y una de resumen"""
+        marca = time.strftime("%Y-%m-%dT%H:%M:%S")
+        with open(path, "a", encoding="utf-8") as f:
+            for trabajo in self.trabajos:
+                f.write(json.dumps({"ts": marca, "tipo": "inv", **trabajo.to_dict(detalle=False)},
+                                   ensure_ascii=False) + "\n")
+                if detalle:
+                    for archivo in trabajo.archivos_detalle:
+                        f.write(json.dumps({"ts": marca, "tipo": "archivo", "inv": trabajo.inv, **archivo},
+                                           ensure_ascii=False) + "\n")
+            f.write(json.dumps({"ts": marca, "tipo": "lote", **self.totales()}, ensure_ascii=False) + "\n")
+
+    def prometheus(self):
+        """Texto en formato de exposición de Prometheus.
+
+        El archivo se reescribe en cada lote: todo son gauges con los valores del último lote.
+        """
+        totales = self.totales()
+        lineas = [
+            "# HELP ct_inv_ultimo_lote_fase_segundos Tiempo por fase de compresión en el último lote.",
+            "# TYPE ct_inv_ultimo_lote_fase_segundos gauge",
+        ]
+        lineas += [f'ct_inv_ultimo_lote_fase_segundos{{fase="{fase}"}} {s}' for fase, s in totales["fases"].items()]
+        lineas += [
+            "# HELP ct_inv_ultimo_lote_bytes Bytes leídos del origen y escritos en los ZIP en el último lote.",
+            "# TYPE ct_inv_ultimo_lote_bytes gauge",
+            f'ct_inv_ultimo_lote_bytes{{sentido="entrada"}} {totales["bytes_in"]}',
+            f'ct_inv_ultimo_lote_bytes{{sentido="salida"}} {totales["bytes_out"]}',
+            "# HELP ct_inv_ultimo_lote_archivos Archivos añadidos a los ZIP en el último lote.",
+            "# TYPE ct_inv_ultimo_lote_archivos gauge",
+            f"ct_inv_ultimo_lote_archivos {totales['archivos']}",
+            "# HELP ct_inv_ultimo_lote_trabajos INV procesadas en el último lote, por estado.",
+            "# TYPE ct_inv_ultimo_lote_trabajos gauge",
+            f'ct_inv_ultimo_lote_trabajos{{estado="ok"}} {totales["trabajos"] - totales["errores"]}',
+            f'ct_inv_ultimo_lote_trabajos{{estado="error"}} {totales["errores"]}',
+            "# HELP ct_inv_ratio Tamaño comprimido / tamaño original del último lote.",
+            "# TYPE ct_inv_ratio gauge",
+            f"ct_inv_ratio {totales['ratio']}",
+            "# HELP ct_inv_ultimo_lote_ui_segundos Tiempo en callbacks de la interfaz en el último lote.",
+            "# TYPE ct_inv_ultimo_lote_ui_segundos gauge",
+            f"ct_inv_ultimo_lote_ui_segundos {totales['ui_segundos']}",
+            "# HELP ct_inv_inv_segundos Duración de cada INV del último lote.",
+            "# TYPE ct_inv_inv_segundos gauge",
+        ]
+        for trabajo in self.trabajos:
+            etiqueta = trabajo.inv.replace("\\", "\\\\").replace('"', '\\"')
+            lineas.append(f'ct_inv_inv_segundos{{inv="{etiqueta}"}} {round(trabajo.segundos, 6)}')
+        lineas += [
+            "# HELP ct_inv_ultimo_lote_timestamp_segundos Momento (Unix) en que terminó el último lote.",
+            "# TYPE ct_inv_ultimo_lote_timestamp_segundos gauge",
+            f"ct_inv_ultimo_lote_timestamp_segundos {int(time.time())}",
+        ]
+        return "\n".join(lineas) + "\n"
+
+    def escribir_prometheus(self, path):
+        """Escritura atómica: el recolector nunca lee un archivo a medias"""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
@@ -0,0 +1,168 @@
+"""Compresión en paralelo de los archivos de una misma INV
+
+Una INV muy grande deja un lote en un solo núcleo si sus archivos se
+comprimen uno tras otro. Aquí cada archivo se comprime en un pool de hilos
+(zlib, bz2 y lzma liberan el GIL) a un archivo temporal, guardando su CRC y
+sus tamaños; el CompressionWorker escribe después los miembros ya
+comprimidos en el orden del manifiesto con zipcrudo.escribir_miembro_crudo,
+así que el ZIP es el mismo que en secuencia.
+
+Como mucho hay VENTANA_POR_HILO * hilos archivos comprimidos a la espera de
+escribirse; cada uno ocupa hasta SPOOL bytes en memoria y el resto va al
+directorio temporal del sistema.
+"""
+import collections
+import tempfile
+import threading
+import time
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from .flujo import LectorBloques
+
+SPOOL = 4 * 1024 * 1024
+VENTANA_POR_HILO = 2
+_MASK_COMPRESS_OPTION_1 = 0x02  # LZMA con marca de fin de flujo, como zipfile
+
+
+@dataclass
+class MiembroComprimido:
+    """Resultado de comprimir un archivo: ZipInfo con CRC y tamaños, y los bytes comprimidos.
+
+    datos es None si el códec es STORED: no hay nada que adelantar y el
+    archivo se escribe directamente desde el origen.
+    """
+    entry: object
+    codec: object
+    zinfo: zipfile.ZipInfo = None
+    datos: object = None
+    tiempos: dict = field(default_factory=dict)
+
+def comprimir_miembro(entry, policy, strict_timestamps, parar, avance=None):
+    """Trabajo del pool: elegir códec y comprimir entry a un temporal (None si parar() se cumple).
+
+    avance(arcname, bytes leídos del archivo) se llama tras cada bloque.
+    """
+    t0 = time.perf_counter()
+    codec = policy.codec_para(entry.path, entry.size)
+    t1 = time.perf_counter()
+    miembro = MiembroComprimido(entry, codec, tiempos={"probe": t1 - t0})
+    compresor = zipfile._get_compressor(codec.compress_type, codec.nivel)
+    if compresor is None:
+        return miembro
+
+    zinfo = zipfile.ZipInfo.from_file(entry.path, entry.arcname, strict_timestamps=strict_timestamps)
+    zinfo.compress_type = codec.compress_type
+    if codec.compress_type == zipfile.ZIP_LZMA:
+        zinfo.flag_bits |= _MASK_COMPRESS_OPTION_1
+    t2 = time.perf_counter()
+    salida = tempfile.SpooledTemporaryFile(max_size=SPOOL)
+    crc = leidos = 0
+    lectura = 0.0
+    try:
+        with open(entry.path, "rb") as src:
+            t3 = time.perf_counter()
+            # Un bloque por delante basta: hay un hilo por archivo
+            with LectorBloques(src, zinfo.file_size, profundidad=1) as lector:
+                bloques = iter(lector)
+                while True:
+                    a = time.perf_counter()
+                    datos = next(bloques, None)
+                    lectura += time.perf_counter() - a
+                    if datos is None:
+                        break
+                    if parar():
+                        salida.close()
+                        return None
+                    crc = zlib.crc32(datos, crc)
+                    leidos += len(datos)
+                    salida.write(compresor.compress(datos))
+                    datos = None  # el lector reutiliza el buffer
+                    if avance is not None:
+                        avance(entry.arcname, leidos)
+        salida.write(compresor.flush())
+    except BaseException:
+        salida.close()
+        raise
+    t4 = time.perf_counter()
+    zinfo.CRC = crc
+    zinfo.file_size = leidos
+    zinfo.compress_size = salida.tell()
+    miembro.zinfo = zinfo
+    miembro.datos = salida
+    miembro.tiempos.update({"stat": t2 - t1, "open": t3 - t2, "read": lectura, "compress": t4 - t3 - lectura})
+    return miembro
+
+class CompresionParalela:
+    """Comprime entries en un pool de hilos y entrega los resultados en el mismo orden; usar con `with`.
+
+    parar (el cancel_event del worker) corta los archivos en curso en el
+    siguiente bloque. avance(adelantado), si se indica, se llama desde los
+    hilos del pool tras cada bloque leído, con los bytes leídos de los
+    archivos que aún no se han escrito en el ZIP (ver escrito()).
+    """
+    def __init__(self, entries, policy, hilos, strict_timestamps=True, parar=None, avance=None):
+        self._entries = iter(entries)
+        self.policy = policy
+        self.hilos = hilos
+        self.strict_timestamps = strict_timestamps
+        self.parar = parar
+        self.avance = avance
+        self._cerrado = threading.Event()
+        self._leidos = {}  # arcname -> bytes leídos, hasta que se entrega
+        self._lock = threading.Lock()
+        self._en_curso = collections.deque()
+        self._pool = None
+
+    def __enter__(self):
+        self._pool = ThreadPoolExecutor(max_workers=self.hilos, thread_name_prefix="miembros")
+        for _ in range(self.hilos * VENTANA_POR_HILO):
+            if not self._lanzar():
+                break
+        return self
+
+    def _lanzar(self):
+        entry = next(self._entries, None)
+        if entry is None:
+            return False
+        self._en_curso.append(self._pool.submit(comprimir_miembro, entry, self.policy, self.strict_timestamps,
+                                                self._debe_parar, self._avanzar))
+        return True
+
+    def _debe_parar(self):
+        return self._cerrado.is_set() or (self.parar is not None and self.parar.is_set())
+
+    def _avanzar(self, arcname, leidos):
+        with self._lock:
+            self._leidos[arcname] = leidos
+            adelantado = sum(self._leidos.values())
+        if self.avance is not None:
+            self.avance(adelantado)
+
+    def escrito(self, entry):
+        """entry ya está en el ZIP: sus bytes dejan de contar como adelantados"""
+        with self._lock:
+            self._leidos.pop(entry.arcname, None)
+
+    def siguiente(self):
+        """MiembroComprimido del siguiente archivo (espera a que termine) y lanzar otro; None si se canceló"""
+        miembro = self._en_curso.popleft().result()
+        if miembro is not None:
+            self._lanzar()
+        return miembro
+
+    def __exit__(self, *exc):
+        # Cancelado o error: los archivos en curso se abandonan en el siguiente bloque
+        self._cerrado.set()
+        for future in self._en_curso:
+            future.cancel()
+        self._pool.shutdown(wait=True)
+        for future in self._en_curso:
+            if future.cancelled() or future.exception() is not None:
+                continue
+            miembro = future.result()
+            if miembro is not None and miembro.datos is not None:
+                miembro.datos.close()
+        self._en_curso.clear()
@@ -0,0 +1,97 @@
+"""Persistencia de archivos JSON: escritura atómica y agrupada en segundo plano"""
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+
+def escribir_json_atomico(path, data, indent=None):
+    """Escribir en un temporal del mismo directorio y renombrar: nunca queda un JSON a medias"""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+class ConfigStore:
+    """config.json con escrituras agrupadas (debounce) en un hilo de fondo.
+
+    save() solo guarda la última instantánea y vuelve enseguida; el hilo la
+    escribe cuando pasan `delay` segundos sin cambios (o como mucho cada
+    `max_delay`). close() escribe lo pendiente; también se registra en atexit.
+    """
+    def __init__(self, path, delay=0.5, max_delay=3.0, indent=2):
+        self.path = Path(path)
+        self.delay = delay
+        self.max_delay = max_delay
+        self.indent = indent
+        self._pending = None
+        self._first_change = None
+        self._last_change = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._loop, name="ConfigStore", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def load(self):
+        """Config guardada, o {} si no existe o está dañada"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def save(self, snapshot):
+        """Programar la escritura de `snapshot` (no bloquea)"""
+        with self._cond:
+            if self._closed:
+                return
+            now = time.monotonic()
+            if self._pending is None:
+                self._first_change = now
+            self._pending = snapshot
+            self._last_change = now
+            self._cond.notify()
+
+    def flush(self):
+        """Escribir ya lo pendiente (bloqueante)"""
+        self._write_pending()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self.flush()
+
+    def _write_pending(self):
+        # Tomar la instantánea y escribirla bajo el mismo lock: una anterior nunca pisa a otra más nueva
+        with self._write_lock:
+            with self._cond:
+                snapshot, self._pending = self._pending, None
+            if snapshot is None:
+                return
+            try:
+                escribir_json_atomico(self.path, snapshot, self.indent)
+            except OSError as e:
+                print(f"Error guardando config: {e}")
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                now = time.monotonic()
+                espera = min(self._last_change + self.delay, self._first_change + self.max_delay) - now
+                if espera > 0:
+                    self._cond.wait(espera)
+                    continue
+            self._write_pending()
@@ -0,0 +1,152 @@
+"""Generación masiva de la estructura de una planta a partir de un plano
+
+Formatos admitidos (una fila por inversor):
+
+    CSV   ct,inv,dispositivo,strings
+    JSON  [{"ct": "1", "inv": 1, "dispositivo": "PVPM", "strings": 12}, ...]
+          o {"cts": [{"ct": "1", "inversores": [{"inv": 1, "strings": 12}, ...]}]}
+    YAML  la misma estructura que JSON (requiere PyYAML)
+"""
+import csv
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .estructura import ruta_inversor, validar_parametros
+
+HILOS_POR_DEFECTO = 8
+
+
+@dataclass
+class FilaPlanta:
+    """Un inversor del plano"""
+    ct: str
+    inv: str
+    dispositivo: str
+    strings: int
+
+@dataclass
+class ResumenPlanta:
+    """Resultado de generar_planta"""
+    cts: int = 0
+    inversores: int = 0
+    strings: int = 0
+    creadas: int = 0
+    existentes: int = 0
+    segundos: float = 0.0
+    errores: list = field(default_factory=list)
+
+def _filas_desde_datos(datos):
+    if isinstance(datos, dict) and "cts" in datos:
+        for ct in datos["cts"]:
+            for inv in ct.get("inversores", []):
+                yield {"dispositivo": ct.get("dispositivo", "PVPM"), **inv, "ct": ct["ct"]}
+    elif isinstance(datos, list):
+        yield from datos
+    else:
+        raise ValueError("El plano debe ser una lista de inversores o un objeto con 'cts'")
+
+def leer_plano(path):
+    """Leer y validar un plano CSV/JSON/YAML; devuelve una lista de FilaPlanta"""
+    path = Path(path)
+    ext = path.suffix.lower()
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        if ext == ".csv":
+            crudas = list(csv.DictReader(f))
+        elif ext == ".json":
+            crudas = list(_filas_desde_datos(json.load(f)))
+        elif ext in (".yaml", ".yml"):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("Para planos YAML instala PyYAML: pip install pyyaml") from None
+            crudas = list(_filas_desde_datos(yaml.safe_load(f)))
+        else:
+            raise ValueError(f"Formato de plano no soportado: {ext} (usa .csv, .json o .yaml)")
+
+    filas, errores = [], []
+    for numero, cruda in enumerate(crudas, start=1):
+        cruda = {str(k).strip().lower(): v for k, v in cruda.items() if k is not None}
+        ct = str(cruda.get("ct", "")).strip()
+        inv = str(cruda.get("inv", "")).strip()
+        dispositivo = str(cruda.get("dispositivo") or "PVPM").strip().upper()
+        try:
+            if not ct:
+                raise ValueError("Número CT no puede estar vacío")
+            _, strings = validar_parametros(inv, cruda.get("strings", ""), dispositivo)
+            filas.append(FilaPlanta(ct, inv, dispositivo, strings))
+        except ValueError as e:
+            errores.append(f"• Fila {numero}: {e}")
+
+    if errores:
+        extra = f"\n... y {len(errores) - 10} más" if len(errores) > 10 else ""
+        raise ValueError("Plano inválido:\n" + "\n".join(errores[:10]) + extra)
+    return filas
+
+def _crear(path):
+    """mkdir sin parents: el padre ya existe. True si se creó"""
+    try:
+        os.mkdir(path)
+        return True
+    except FileExistsError:
+        return False
+
+def generar_planta(ruta, filas, max_workers=1):
+    """Crear todo el árbol CT/INV/String en una pasada.
+
+    Cada carpeta CT e INV se crea una sola vez; las String-N (hojas
+    independientes) pueden repartirse en un pool de hilos para destinos
+    SMB lentos.
+    """
+    inicio = time.perf_counter()
+    resumen = ResumenPlanta()
+    ruta = Path(ruta)
+    ruta.mkdir(parents=True, exist_ok=True)
+
+    padres = {}
+    hojas = []
+    for fila in filas:
+        carpeta_inv = ruta_inversor(ruta, fila.ct, fila.inv, fila.dispositivo)
+        padres.setdefault(carpeta_inv.parent, None)
+        padres.setdefault(carpeta_inv, None)
+        hojas.extend(carpeta_inv / f"String-{i}" for i in range(1, fila.strings + 1))
+        resumen.inversores += 1
+    resumen.cts = len({fila.ct for fila in filas})
+    resumen.strings = len(hojas)
+
+    def _contar(path):
+        try:
+            return _crear(path)
+        except OSError as e:
+            resumen.errores.append(f"{path}: {e}")
+            return None
+
+    # Padres en orden (CT antes que sus INV), una sola vez cada uno
+    fallidos = set()
+    for carpeta in padres:
+        if carpeta.parent in fallidos:
+            fallidos.add(carpeta)  # su CT no existe: el error ya está anotado
+            continue
+        creada = _contar(carpeta)
+        if creada is None:
+            fallidos.add(carpeta)
+        elif creada:
+            resumen.creadas += 1
+        else:
+            resumen.existentes += 1
+    # Las String de una INV que no se pudo crear no se intentan
+    hojas = [hoja for hoja in hojas if hoja.parent not in fallidos]
+
+    if max_workers > 1 and len(hojas) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            resultados = list(executor.map(_contar, hojas))
+    else:
+        resultados = [_contar(hoja) for hoja in hojas]
+    resumen.creadas += resultados.count(True)
+    resumen.existentes += resultados.count(False)
+
+    resumen.segundos = round(time.perf_counter() - inicio, 3)
+    return resumen
@@ -0,0 +1,117 @@
+"""Políticas de compresión: método y nivel por trabajo y por extensión"""
+import os
+import zipfile
+import zlib
+from dataclasses import dataclass, field
+
+METODOS = {
+    "stored": zipfile.ZIP_STORED,
+    "deflate": zipfile.ZIP_DEFLATED,
+    "bzip2": zipfile.ZIP_BZIP2,
+    "lzma": zipfile.ZIP_LZMA,
+}
+# zstd solo existe en zipfile a partir de Python 3.14
+if hasattr(zipfile, "ZIP_ZSTANDARD"):
+    METODOS["zstd"] = zipfile.ZIP_ZSTANDARD
+
+NIVELES = {
+    "deflate": range(0, 10),
+    "bzip2": range(1, 10),
+    "zstd": range(1, 23),
+}
+
+# Formatos que ya vienen comprimidos (imágenes, contenedores, ofimática)
+EXTENSIONES_COMPRIMIDAS = (
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".tif", ".tiff",
+    ".zip", ".7z", ".rar", ".gz", ".bz2", ".xz", ".zst",
+    ".xlsx", ".docx", ".pptx", ".pdf", ".mp4", ".avi",
+)
+
+PROBE_BYTES = 64 * 1024
+
+
+@dataclass
+class Codec:
+    """Método de compresión ZIP y nivel opcional"""
+    metodo: str = "deflate"
+    nivel: int = None
+
+    def __post_init__(self):
+        if self.metodo not in METODOS:
+            raise ValueError(f"Método desconocido: {self.metodo} (disponibles: {', '.join(METODOS)})")
+        if self.nivel is not None:
+            self.nivel = int(self.nivel)
+            niveles = NIVELES.get(self.metodo)
+            if niveles is None:
+                raise ValueError(f"{self.metodo} no admite nivel de compresión")
+            if self.nivel not in niveles:
+                raise ValueError(f"Nivel {self.nivel} no válido para {self.metodo} "
+                                 f"({niveles.start}-{niveles.stop - 1})")
+
+    @property
+    def compress_type(self):
+        return METODOS[self.metodo]
+
+    @classmethod
+    def parse(cls, texto):
+        """'deflate', 'deflate:6', 'bzip2:9'..."""
+        metodo, _, nivel = str(texto).strip().lower().partition(":")
+        return cls(metodo, int(nivel) if nivel else None)
+
+    def __str__(self):
+        return self.metodo if self.nivel is None else f"{self.metodo}:{self.nivel}"
+
+STORED = Codec("stored")
+
+def es_incompresible(path, umbral=0.95, probe_bytes=PROBE_BYTES):
+    """Probar el primer bloque con zlib rápido; True si apenas se reduce"""
+    with open(path, "rb") as f:
+        bloque = f.read(probe_bytes)
+    if len(bloque) < 1024:
+        return False
+    return len(zlib.compress(bloque, 1)) / len(bloque) > umbral
+
+@dataclass
+class CompressionPolicy:
+    """Elige el codec de cada archivo: por extensión, prueba de compresibilidad o defecto"""
+    defecto: Codec = field(default_factory=Codec)
+    por_extension: dict = field(default_factory=dict)
+    almacenar_incompresibles: bool = True
+    umbral: float = 0.95
+
+    @classmethod
+    def auto(cls, defecto=None):
+        """Política por defecto: guarda sin comprimir lo que ya viene comprimido"""
+        return cls(defecto=defecto or Codec(),
+                   por_extension={ext: STORED for ext in EXTENSIONES_COMPRIMIDAS})
+
+    def codec_para(self, path, size=None):
+        ext = os.path.splitext(path)[1].lower()
+        if ext in self.por_extension:
+            return self.por_extension[ext]
+        if self.defecto.metodo == "stored":
+            return self.defecto
+        if self.almacenar_incompresibles and (size is None or size >= 1024):
+            try:
+                if es_incompresible(path, self.umbral):
+                    return STORED
+            except OSError:
+                pass
+        return self.defecto
+
+    def to_dict(self):
+        return {
+            "defecto": str(self.defecto),
+            "por_extension": {ext: str(codec) for ext, codec in self.por_extension.items()},
+            "almacenar_incompresibles": self.almacenar_incompresibles,
+            "umbral": self.umbral,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            defecto=Codec.parse(data.get("defecto", "deflate")),
+            por_extension={ext.lower(): Codec.parse(c) for ext, c in data.get("por_extension", {}).items()},
+            almacenar_incompresibles=data.get("almacenar_incompresibles", True),
+            umbral=float(data.get("umbral", 0.95)),
+        )
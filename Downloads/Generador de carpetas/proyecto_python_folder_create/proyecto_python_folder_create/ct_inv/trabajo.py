@@ -0,0 +1,227 @@
+"""Trabajos de compresión reanudables
+
+Dos niveles de diario:
+
+- TrabajoCompresion (CT-x/.compresion_trabajo.json): qué ZIP corresponde a
+  cada INV del lote y cuáles ya terminaron. Al reanudar se usan los mismos
+  nombres (no aparece INV-x_1.zip) y las INV hechas se saltan.
+- PuntoControl (INV-x.zip.partial.jsonl): una línea por miembro ya escrito
+  y sincronizado en INV-x.zip.partial. Al reanudar, el .partial se corta en
+  el último punto de control y se sigue desde el archivo siguiente.
+"""
+import json
+import os
+import threading
+import time
+import zipfile
+from pathlib import Path
+
+from .persistencia import escribir_json_atomico
+
+TRABAJO_ARCHIVO = ".compresion_trabajo.json"
+PUNTO_SUFIJO = ".jsonl"
+VERSION = 1
+
+
+class TrabajoCompresion:
+    """Estado por INV de un lote de compresión de una CT"""
+    def __init__(self, carpeta_ct, policy, incremental, inversores=None):
+        self.carpeta_ct = Path(carpeta_ct)
+        self.policy = policy
+        self.incremental = incremental
+        self.inversores = inversores or {}  # INV -> {"zip", "estado", "sha256"}
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        return self.carpeta_ct / TRABAJO_ARCHIVO
+
+    @classmethod
+    def cargar(cls, carpeta_ct):
+        """Trabajo interrumpido de la CT, o None"""
+        try:
+            with open(Path(carpeta_ct) / TRABAJO_ARCHIVO, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != VERSION:
+                return None
+            return cls(carpeta_ct, data["policy"], data["incremental"], data["inversores"])
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def compatible(self, policy, incremental):
+        return self.policy == policy.to_dict() and self.incremental == incremental
+
+    def guardar(self):
+        with self._lock:
+            escribir_json_atomico(self.path, {"version": VERSION, "policy": self.policy,
+                                              "incremental": self.incremental,
+                                              "inversores": self.inversores}, indent=1)
+
+    def zip_de(self, inv_name):
+        entrada = self.inversores.get(inv_name)
+        return self.carpeta_ct / entrada["zip"] if entrada else None
+
+    def hecho(self, inv_name):
+        entrada = self.inversores.get(inv_name)
+        return bool(entrada) and entrada["estado"] == "hecho" and (self.carpeta_ct / entrada["zip"]).exists()
+
+    def marcar(self, inv_name, estado, sha256=None):
+        with self._lock:
+            self.inversores[inv_name]["estado"] = estado
+            self.inversores[inv_name]["sha256"] = sha256
+        self.guardar()
+
+    def completo(self):
+        return all(entrada["estado"] == "hecho" for entrada in self.inversores.values())
+
+    def borrar(self):
+        self.path.unlink(missing_ok=True)
+
+class PuntoControl:
+    """Diario por miembro de un INV-x.zip.partial.
+
+    anotar() guarda en memoria cada miembro terminado; confirmar() hace
+    fsync del .partial y solo entonces añade esas líneas al diario, así que
+    todo lo anotado en disco está realmente escrito en el ZIP.
+    """
+    CADA_BYTES = 64 * 1024 * 1024
+    CADA_SEGUNDOS = 5.0
+
+    def __init__(self, partial_path, policy):
+        self.partial_path = Path(partial_path)
+        self.path = self.partial_path.with_name(self.partial_path.name + PUNTO_SUFIJO)
+        self.policy = policy.to_dict()
+        self._pendientes = []
+        self._bytes = 0
+        self._ultimo = time.monotonic()
+        self._f = None
+
+    def recuperar(self, esperados):
+        """Registros reutilizables del .partial, o None.
+
+        esperados: lista ordenada de (arcname, size, mtime_ns); size y mtime
+        son None para directorios. Se conserva el prefijo de miembros que
+        coincide con el origen actual.
+        """
+        if not self.partial_path.exists():
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lineas = f.read().splitlines()
+        except OSError:
+            return None
+        if not lineas:
+            return None
+        try:
+            cabecera = json.loads(lineas[0])
+        except ValueError:
+            return None
+        if cabecera.get("version") != VERSION or cabecera.get("policy") != self.policy:
+            return None
+
+        registros = []
+        for linea, esperado in zip(lineas[1:], esperados):
+            try:
+                r = json.loads(linea)
+            except ValueError:
+                break  # última línea a medio escribir
+            if (r["n"], r["s"], r["m"]) != tuple(esperado):
+                break  # el origen cambió desde aquí
+            registros.append(r)
+        if not registros:
+            return None
+
+        with open(self.partial_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() < registros[-1]["f"]:
+                return None
+            f.seek(registros[-1]["o"])
+            cabecera_local = f.read(zipfile.sizeFileHeader)
+        if cabecera_local[:4] != zipfile.stringFileHeader:
+            return None
+        return registros
+
+    def iniciar(self, reanudado):
+        """Abrir el diario (nuevo, o a continuación de lo recuperado)"""
+        if reanudado:
+            self._f = open(self.path, "a", encoding="utf-8")
+        else:
+            self._f = open(self.path, "w", encoding="utf-8")
+            self._f.write(json.dumps({"version": VERSION, "policy": self.policy}) + "\n")
+            self._f.flush()
+
+    def reescribir(self, registros):
+        """Dejar en el diario solo los miembros conservados al reanudar"""
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"version": VERSION, "policy": self.policy}) + "\n")
+            f.write("".join(json.dumps(r) + "\n" for r in registros))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def anotar(self, zf, size=None, mtime_ns=None):
+        """Registrar el último miembro escrito en zf; confirma cada CADA_BYTES o CADA_SEGUNDOS"""
+        zinfo = zf.filelist[-1]
+        self._pendientes.append(_registro(zinfo, size, mtime_ns, zf.start_dir))
+        self._bytes += zinfo.compress_size
+        if self._bytes >= self.CADA_BYTES or time.monotonic() - self._ultimo >= self.CADA_SEGUNDOS:
+            self.confirmar(zf.fp)
+
+    def confirmar(self, fp):
+        if self._f is None or not self._pendientes:
+            return
+        fp.flush()
+        os.fsync(fp.fileno())
+        self._f.write("".join(json.dumps(r) + "\n" for r in self._pendientes))
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._pendientes.clear()
+        self._bytes = 0
+        self._ultimo = time.monotonic()
+
+    def cerrar(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+    def borrar(self):
+        self.cerrar()
+        self.path.unlink(missing_ok=True)
+
+def _registro(zinfo, size, mtime_ns, fin):
+    return {
+        "n": zinfo.filename, "s": size, "m": mtime_ns,
+        "o": zinfo.header_offset, "f": fin, "crc": zinfo.CRC,
+        "cs": zinfo.compress_size, "fs": zinfo.file_size, "ct": zinfo.compress_type,
+        "fb": zinfo.flag_bits, "dt": list(zinfo.date_time), "ea": zinfo.external_attr,
+        "ev": zinfo.extract_version, "cv": zinfo.create_version,
+    }
+
+def _zinfo_desde_registro(r):
+    zinfo = zipfile.ZipInfo(r["n"], date_time=tuple(r["dt"]))
+    zinfo.header_offset = r["o"]
+    zinfo.CRC = r["crc"]
+    zinfo.compress_size = r["cs"]
+    zinfo.file_size = r["fs"]
+    zinfo.compress_type = r["ct"]
+    zinfo.flag_bits = r["fb"]
+    zinfo.external_attr = r["ea"]
+    zinfo.extract_version = r["ev"]
+    zinfo.create_version = r["cv"]
+    return zinfo
+
+def abrir_partial_reanudado(partial_path, registros, compression, envolver=None):
+    """ZipFile en modo escritura sobre el .partial cortado tras el último registro.
+
+    envolver: función opcional aplicada al archivo antes de crear el ZipFile.
+    """
+    fp = open(partial_path, "r+b")
+    fp.seek(registros[-1]["f"])
+    fp.truncate()
+    if envolver is not None:
+        fp = envolver(fp)
+    zf = zipfile.ZipFile(fp, "w", compression=compression, allowZip64=True)
+    for r in registros:
+        zinfo = _zinfo_desde_registro(r)
+        zf.filelist.append(zinfo)
+        zf.NameToInfo[zinfo.filename] = zinfo
+    return fp, zf
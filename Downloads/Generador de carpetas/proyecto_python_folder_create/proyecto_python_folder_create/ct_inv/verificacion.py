@@ -0,0 +1,109 @@
+"""Verificación de los ZIP generados y suma SHA-256 junto a cada archivo"""
+import hashlib
+import os
+import zipfile
+import zlib
+from pathlib import Path
+
+from .incremental import crc32_archivo
+
+SHA256_SUFIJO = ".sha256"
+BLOQUE = 1024 * 1024
+
+
+class VerificacionError(Exception):
+    """El ZIP no coincide con la carpeta de origen"""
+
+def ruta_sha256(zip_path):
+    """INV-x.zip -> INV-x.zip.sha256"""
+    zip_path = Path(zip_path)
+    return zip_path.with_name(zip_path.name + SHA256_SUFIJO)
+
+def leer_sha256(zip_path):
+    """SHA-256 de INV-x.zip.sha256, o None si no existe o es anterior al ZIP"""
+    sidecar = ruta_sha256(zip_path)
+    try:
+        if sidecar.stat().st_mtime_ns < os.stat(zip_path).st_mtime_ns:
+            return None  # el ZIP se reescribió sin verificar
+        return sidecar.read_text(encoding="utf-8").split()[0]
+    except (OSError, IndexError):
+        return None
+
+def sha256_archivo(path, cancel_event=None):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                return None
+            datos = f.read(BLOQUE)
+            if not datos:
+                return h.hexdigest()
+            h.update(datos)
+
+def _comprobar_miembros(zf, manifest, crcs, cancel_event, reutilizados):
+    nombres = set(zf.NameToInfo)
+    esperados = {entry.arcname for entry in manifest.files} | set(manifest.dirs)
+    if nombres != esperados:
+        faltan = sorted(esperados - nombres)
+        sobran = sorted(nombres - esperados)
+        raise VerificacionError(f"miembros distintos al origen (faltan {faltan[:3]}, sobran {sobran[:3]})")
+
+    for entry in manifest.files:
+        if cancel_event is not None and cancel_event.is_set():
+            return False
+        zinfo = zf.NameToInfo[entry.arcname]
+        if zinfo.file_size != entry.size:
+            raise VerificacionError(f"{entry.arcname}: {zinfo.file_size} bytes en el ZIP, {entry.size} en origen")
+        origen = crcs.get(entry.arcname)
+        if origen is None:
+            # Copiado sin leer el origen (deduplicado o reanudado): se relee
+            origen = crc32_archivo(entry.path)
+        if zinfo.CRC != origen:
+            raise VerificacionError(f"{entry.arcname}: CRC del ZIP distinto al del origen")
+        if entry.arcname in reutilizados:
+            # Copia en crudo de un miembro ya verificado en el ZIP anterior
+            continue
+        # Descomprimir en streaming y recalcular el CRC de los datos
+        crc, leidos = 0, 0
+        with zf.open(zinfo) as miembro:
+            while True:
+                datos = miembro.read(BLOQUE)
+                if not datos:
+                    break
+                crc = zlib.crc32(datos, crc)
+                leidos += len(datos)
+        if crc != origen or leidos != entry.size:
+            raise VerificacionError(f"{entry.arcname}: contenido dañado (CRC {crc:08x} != {origen:08x})")
+    return True
+
+def verificar_zip(zip_path, manifest, crcs=None, cancel_event=None, reutilizados=()):
+    """Comprobar zip_path contra el manifiesto de origen y escribir INV-x.zip.sha256.
+
+    crcs: {arcname: CRC-32} del origen, calculado durante la compresión o
+    tomado del índice incremental; los archivos que no estén se releen del
+    origen. Cada miembro se descomprime y su CRC se compara con el del
+    origen, salvo los de reutilizados (copiados sin cambios del ZIP
+    anterior), en los que basta el CRC de la cabecera.
+    Devuelve el SHA-256 en hexadecimal, o None si se canceló. Lanza
+    VerificacionError si el ZIP está truncado o no coincide con el origen.
+    """
+    zip_path = Path(zip_path)
+    sidecar = ruta_sha256(zip_path)
+    # Una suma anterior ya no corresponde a este ZIP
+    sidecar.unlink(missing_ok=True)
+    try:
+        with zipfile.ZipFile(zip_path) as zf:
+            if not _comprobar_miembros(zf, manifest, crcs or {}, cancel_event, reutilizados):
+                return None
+    except (zipfile.BadZipFile, zlib.error, EOFError) as e:
+        raise VerificacionError(f"ZIP dañado o truncado: {e}") from e
+
+    digest = sha256_archivo(zip_path, cancel_event)
+    if digest is None:
+        return None
+    tmp = sidecar.with_name(sidecar.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        # Mismo formato que sha256sum: se comprueba con `sha256sum -c`
+        f.write(f"{digest}  {zip_path.name}\n")
+    os.replace(tmp, sidecar)
+    return digest
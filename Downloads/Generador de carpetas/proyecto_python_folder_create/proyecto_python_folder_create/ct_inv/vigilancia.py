@@ -0,0 +1,280 @@
+"""Vigilancia de carpetas: recomprime cada INV poco después de que lleguen archivos
+
+Detección de cambios:
+
+- Índice de mtimes de carpetas: crear, borrar o renombrar un archivo cambia
+  el mtime de su carpeta, así que cada sondeo solo hace stat de carpetas.
+- Barrido periódico de todas las INV para cambios dentro de archivos que ya
+  existían (no alteran el mtime de la carpeta).
+- Si está instalado watchdog, sus notificaciones marcan la INV al momento.
+
+Una INV se comprime (en modo incremental, con verificación) cuando su
+firma (archivos, tamaños y mtimes) lleva `espera` segundos sin cambiar, de
+modo que una copia en curso no dispara una compresión por archivo.
+"""
+import multiprocessing
+import os
+import queue
+import sqlite3
+import threading
+import zipfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+from .catalogo import Catalogo, ruta_catalogo
+from .compresion import CompressionCancelled, CompressionEvent, CompressionWorker, buscar_inv, default_workers
+from .escaneo import escanear_inv
+from .incremental import ruta_indice
+from .politica import CompressionPolicy
+from .verificacion import VerificacionError, verificar_zip
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+
+def _comprimir_inv(inv_dir, zip_path, policy, verify, cancel_event):
+    """Trabajo del pool: actualizar INV-x.zip y verificarlo"""
+    worker = CompressionWorker(inv_dir, zip_path, policy, incremental=True)
+    worker.run(cancel_event=cancel_event)
+    digest = None
+    if verify and worker.crcs is not None:
+        try:
+            digest = verificar_zip(zip_path, worker.manifest, worker.crcs, cancel_event, worker.reutilizados)
+        except VerificacionError:
+            ruta_indice(zip_path).unlink(missing_ok=True)
+            raise
+    return worker.stats, digest
+
+def _firma(inv_dir):
+    """Archivos, tamaños y mtimes de la INV, y sus subcarpetas"""
+    manifest = escanear_inv(inv_dir)
+    firma = tuple((entry.arcname, entry.size, entry.mtime_ns) for entry in manifest.files)
+    carpetas = [inv_dir] + [inv_dir.parent / arcdir for arcdir in manifest.dirs]
+    return firma, carpetas
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+class VigilanteCarpetas:
+    """Servicio en segundo plano que mantiene al día INV-x.zip de cada INV.
+
+    raiz puede ser una carpeta CT-* o una planta con varias CT-*. Publica
+    CompressionEvent en self.events: "detected", "done", "error". Con
+    catalogar=True cada ZIP actualizado se registra en el catálogo de la planta.
+    """
+    def __init__(self, raiz, policy=None, max_workers=None, espera=2.0, intervalo=1.0,
+                 barrido=30.0, use_processes=False, verify=True, catalogar=False):
+        self.raiz = Path(raiz)
+        self.policy = policy or CompressionPolicy.auto()
+        self.max_workers = max_workers or default_workers()
+        self.espera = espera
+        self.intervalo = intervalo
+        self.barrido = barrido
+        self.use_processes = use_processes
+        self.verify = verify
+        self.catalogar = catalogar
+        self.events = queue.Queue()
+        self.completed = 0
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._marcadas = set()      # INV avisadas por watchdog
+        self._cts = {}              # CT -> mtime
+        self._inversores = set()    # INV conocidas
+        self._carpetas = {}         # carpeta -> (mtime, INV)
+        self._sucias = {}           # INV -> (firma, instante del último cambio)
+        self._comprimidas = {}      # INV -> firma del último ZIP bueno
+        self._en_curso = {}         # future -> (INV, firma)
+        self._catalogos = {}        # ruta del catálogo -> Catalogo
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, name="VigilanteCarpetas", daemon=True)
+        self._thread.start()
+
+    def stop(self, wait=True):
+        """Detener; las compresiones en curso se cancelan y quedan reanudables"""
+        self._stop.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def carpetas_ct(self):
+        if self.raiz.name.startswith("CT-"):
+            return [self.raiz]
+        try:
+            return sorted(d for d in self.raiz.iterdir() if d.is_dir() and d.name.startswith("CT-"))
+        except OSError:
+            return []
+
+    def marcar(self, path):
+        """Marcar como sucia la INV que contiene path (llamado desde watchdog)"""
+        path = Path(path)
+        for parte in [path, *path.parents]:
+            # INV-x.zip y sus archivos auxiliares están en la CT: no son INV
+            if parte.name.startswith("INV-") and parte.parent.name.startswith("CT-") and parte.is_dir():
+                with self._lock:
+                    self._marcadas.add(parte)
+                return
+
+    def run(self):
+        if self.use_processes:
+            manager = multiprocessing.Manager()
+            cancel_event = manager.Event()
+            executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        else:
+            manager = None
+            cancel_event = threading.Event()
+            executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="vigilancia")
+        observer = self._iniciar_observer()
+        ultimo_barrido = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                ahora = time.monotonic()
+                self._sondear(ahora)
+                if ahora - ultimo_barrido >= self.barrido:
+                    ultimo_barrido = ahora
+                    for inv_dir in set(self._inversores):
+                        self._ensuciar(inv_dir, ahora)
+                self._recoger()
+                self._lanzar(executor, cancel_event, ahora)
+                self._stop.wait(self.intervalo)
+        finally:
+            cancel_event.set()
+            if observer is not None:
+                observer.stop()
+                observer.join()
+            executor.shutdown(wait=True, cancel_futures=True)
+            self._recoger()
+            if manager:
+                manager.shutdown()
+            for catalogo in self._catalogos.values():
+                catalogo.close()
+            self._catalogos.clear()
+            self.events.put(CompressionEvent("finished"))
+
+    def _iniciar_observer(self):
+        if Observer is None:
+            return None
+        vigilante = self
+
+        class _Aviso(FileSystemEventHandler):
+            def on_any_event(self, event):
+                vigilante.marcar(event.src_path)
+                if getattr(event, "dest_path", None):
+                    vigilante.marcar(event.dest_path)
+
+        observer = Observer()
+        observer.schedule(_Aviso(), str(self.raiz), recursive=True)
+        observer.start()
+        return observer
+
+    def _ensuciar(self, inv_dir, ahora, inmediata=False):
+        if inv_dir not in self._sucias:
+            # Una INV nueva al arrancar no necesita esperar
+            self._sucias[inv_dir] = (None, ahora - self.espera if inmediata else ahora)
+
+    def _sondear(self, ahora):
+        """Actualizar el índice de mtimes y marcar las INV con cambios"""
+        for carpeta_ct in self.carpetas_ct():
+            mtime = _mtime(carpeta_ct)
+            if self._cts.get(carpeta_ct) != mtime:
+                arranque = carpeta_ct not in self._cts
+                self._cts[carpeta_ct] = mtime
+                try:
+                    inversores = buscar_inv(carpeta_ct)
+                except OSError:
+                    inversores = []
+                # Escribir INV-x.zip también cambia el mtime de la CT: solo cuentan las INV nuevas
+                for inv_dir in inversores:
+                    if inv_dir not in self._inversores:
+                        self._inversores.add(inv_dir)
+                        self._ensuciar(inv_dir, ahora, inmediata=arranque)
+
+        for carpeta, (mtime, inv_dir) in list(self._carpetas.items()):
+            actual = _mtime(carpeta)
+            if actual != mtime:
+                self._carpetas[carpeta] = (actual, inv_dir)
+                self._ensuciar(inv_dir, ahora)
+
+        with self._lock:
+            marcadas, self._marcadas = self._marcadas, set()
+        for inv_dir in marcadas:
+            self._ensuciar(inv_dir, ahora)
+
+    def _lanzar(self, executor, cancel_event, ahora):
+        """Comprimir las INV sucias cuya firma ya no cambia"""
+        ocupadas = {inv_dir for inv_dir, _ in self._en_curso.values()}
+        for inv_dir, (firma_previa, desde) in list(self._sucias.items()):
+            if inv_dir in ocupadas:
+                continue  # se revisa de nuevo cuando termine la compresión en curso
+            if not inv_dir.is_dir():
+                del self._sucias[inv_dir]
+                self._comprimidas.pop(inv_dir, None)
+                self._inversores.discard(inv_dir)
+                continue
+            try:
+                firma, carpetas = _firma(inv_dir)
+            except OSError:
+                continue  # carpeta a medio copiar o bloqueada: se reintenta
+            for carpeta in carpetas:
+                if carpeta not in self._carpetas:
+                    self._carpetas[carpeta] = (_mtime(carpeta), inv_dir)
+            if firma == self._comprimidas.get(inv_dir):
+                del self._sucias[inv_dir]
+                continue
+            if firma != firma_previa and firma_previa is not None:
+                self._sucias[inv_dir] = (firma, ahora)
+                continue
+            if firma_previa is None:
+                self._sucias[inv_dir] = (firma, desde)
+            if ahora - desde < self.espera:
+                continue
+            del self._sucias[inv_dir]
+            nombre = f"{inv_dir.parent.name}/{inv_dir.name}"
+            self.events.put(CompressionEvent("detected", nombre, detail=f"{len(firma)} archivos"))
+            zip_path = inv_dir.parent / f"{inv_dir.name}.zip"
+            future = executor.submit(_comprimir_inv, inv_dir, zip_path, self.policy, self.verify, cancel_event)
+            self._en_curso[future] = (inv_dir, firma)
+
+    def _recoger(self):
+        for future in [f for f in self._en_curso if f.done()]:
+            inv_dir, firma = self._en_curso.pop(future)
+            nombre = f"{inv_dir.parent.name}/{inv_dir.name}"
+            if future.cancelled():
+                continue
+            try:
+                stats, digest = future.result()
+            except CompressionCancelled:
+                continue
+            except Exception as e:
+                self.errors += 1
+                self.events.put(CompressionEvent("error", nombre, detail=str(e)))
+                continue
+            self._comprimidas[inv_dir] = firma
+            self.completed += 1
+            detalle = f"{stats['comprimidos']} comprimidos, {stats['reutilizados']} reutilizados"
+            if digest:
+                detalle += f", SHA-256 {digest[:12]}"
+            if self.catalogar:
+                detalle += self._catalogar(inv_dir.parent / f"{inv_dir.name}.zip", digest)
+            self.events.put(CompressionEvent("done", nombre, 100.0, 100.0, detalle))
+
+    def _catalogar(self, zip_path, digest):
+        path = ruta_catalogo(zip_path.parent)
+        try:
+            if path not in self._catalogos:
+                self._catalogos[path] = Catalogo(path)
+            self._catalogos[path].actualizar_zip(zip_path, digest)
+        except (sqlite3.Error, OSError, zipfile.BadZipFile) as e:
+            return f" (sin catalogar: {e})"
+        return ""
@@ -0,0 +1,75 @@
+"""Lectura y escritura de miembros ZIP ya comprimidos (sin recomprimir)
+
+zipfile no expone esta operación; se replica lo que hace ZipFile._open_to_write
+para un archivo con destino seekable.
+"""
+import copy
+import struct
+import zipfile
+
+CHUNK = 1024 * 1024
+_ZIP64_EXTRA = 0x0001
+_MASK_USE_DATA_DESCRIPTOR = 0x08
+
+
+def _sin_extra_zip64(extra):
+    """Quitar el bloque ZIP64 del campo extra; FileHeader lo regenera si hace falta"""
+    resultado = b""
+    i = 0
+    while i + 4 <= len(extra):
+        tipo, largo = struct.unpack("<HH", extra[i:i + 4])
+        if tipo != _ZIP64_EXTRA:
+            resultado += extra[i:i + 4 + largo]
+        i += 4 + largo
+    return resultado
+
+def leer_miembro_crudo(origen, zinfo, chunk=CHUNK):
+    """Generador con los bytes comprimidos de un miembro, tal como están en el ZIP"""
+    with origen._lock:
+        fp = origen.fp
+        fp.seek(zinfo.header_offset)
+        cabecera = fp.read(zipfile.sizeFileHeader)
+        if len(cabecera) != zipfile.sizeFileHeader or cabecera[:4] != zipfile.stringFileHeader:
+            raise zipfile.BadZipFile(f"Cabecera local inválida: {zinfo.filename}")
+        largo_nombre, largo_extra = struct.unpack("<HH", cabecera[26:30])
+        posicion = zinfo.header_offset + zipfile.sizeFileHeader + largo_nombre + largo_extra
+
+    restante = zinfo.compress_size
+    while restante > 0:
+        with origen._lock:
+            origen.fp.seek(posicion)
+            datos = origen.fp.read(min(chunk, restante))
+        if not datos:
+            raise zipfile.BadZipFile(f"Miembro truncado: {zinfo.filename}")
+        posicion += len(datos)
+        restante -= len(datos)
+        yield datos
+
+def escribir_miembro_crudo(destino, zinfo, bloques):
+    """Escribir un miembro ya comprimido; zinfo debe traer CRC, file_size y compress_size"""
+    nuevo = copy.copy(zinfo)
+    nuevo.flag_bits &= ~_MASK_USE_DATA_DESCRIPTOR
+    nuevo.extra = _sin_extra_zip64(zinfo.extra)
+    with destino._lock:
+        if destino._writing:
+            raise ValueError("Hay otro miembro abierto para escritura en el ZIP")
+        if destino._seekable:
+            destino.fp.seek(destino.start_dir)
+        nuevo.header_offset = destino.fp.tell()
+        destino._writecheck(nuevo)
+        destino._didModify = True
+        destino.fp.write(nuevo.FileHeader(None))
+        escritos = 0
+        for datos in bloques:
+            destino.fp.write(datos)
+            escritos += len(datos)
+        if escritos != nuevo.compress_size:
+            raise zipfile.BadZipFile(f"Tamaño comprimido inesperado en {nuevo.filename}")
+        destino.start_dir = destino.fp.tell()
+        destino.filelist.append(nuevo)
+        destino.NameToInfo[nuevo.filename] = nuevo
+    return nuevo
+
+def copiar_miembro_crudo(origen, zinfo, destino):
+    """Copiar un miembro de un ZipFile a otro sin descomprimir ni recomprimir"""
+    return escribir_miembro_crudo(destino, zinfo, leer_miembro_crudo(origen, zinfo))
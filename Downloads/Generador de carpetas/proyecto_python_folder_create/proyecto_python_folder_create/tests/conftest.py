@@ -0,0 +1,39 @@
+"""Planta de prueba pequeña: CT-1 con tres INV y archivos de varios tipos"""
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ct_inv.estructura import crear_estructura  # noqa: E402
+
+CALIBRACION = b"PVPM calibracion 1.07\n" * 400  # igual en todas las INV: candidata a dedup
+
+
+def _texto(semilla, lineas):
+    rnd = random.Random(semilla)
+    return "".join(f"{i};{rnd.uniform(0, 900):.3f};{rnd.uniform(0, 12):.4f}\n" for i in range(lineas)).encode()
+
+@pytest.fixture
+def planta(tmp_path):
+    """tmp_path/CT-1/INV-{1,2,3}-PVPM con curvas CSV, binarios, vacíos, subcarpetas y archivos repetidos"""
+    for inv in (1, 2, 3):
+        carpeta_inv = crear_estructura(tmp_path, "1", inv, 3)
+        for string in (1, 2, 3):
+            carpeta = carpeta_inv / f"String-{string}"
+            (carpeta / f"curva_{string}.csv").write_bytes(_texto(inv * 10 + string, 300 * string))
+            (carpeta / "calibracion.dat").write_bytes(CALIBRACION)
+        (carpeta_inv / "String-1" / "foto.jpg").write_bytes(os.urandom(20_000))
+        (carpeta_inv / "String-2" / "vacio.txt").write_bytes(b"")
+        (carpeta_inv / "String-3" / "detalle").mkdir()
+        (carpeta_inv / "String-3" / "detalle" / "grande.bin").write_bytes(_texto(inv, 40_000))
+    return tmp_path / "CT-1"
+
+def contenido_origen(inv_dir):
+    """{arcname: bytes} de todos los archivos de una INV"""
+    inv_dir = Path(inv_dir)
+    return {f"{inv_dir.name}/{p.relative_to(inv_dir).as_posix()}": p.read_bytes()
+            for p in inv_dir.rglob("*") if p.is_file()}
@@ -0,0 +1,91 @@
+"""Índice en memoria de la planta y su actualización por partes"""
+import os
+import shutil
+import time
+
+import pytest
+
+from ct_inv.arbol import CAMBIADO, COMPRIMIDO, SIN_ZIP, ArbolPlanta
+from ct_inv.compresion import CompressionScheduler, preparar_workers
+from ct_inv.estructura import crear_estructura
+
+
+def _bytes(carpeta):
+    return sum(p.stat().st_size for p in carpeta.rglob("*") if p.is_file())
+
+def _comprimir(planta):
+    scheduler = CompressionScheduler(preparar_workers(planta, incremental=True))
+    scheduler.run()
+    assert scheduler.errors == []
+
+@pytest.fixture
+def arbol(planta):
+    arbol = ArbolPlanta(planta.parent)
+    arbol.escanear()
+    return arbol
+
+def _estados(arbol):
+    return {(ct, inv): estado for ct, inv, *_, estado in arbol.filas()}
+
+def test_escanear(planta, arbol):
+    assert arbol.listo.is_set()
+    assert arbol.filas() == [("CT-1", None, 9, 27, _bytes(planta), SIN_ZIP)] + [
+        ("CT-1", f"INV-{i}-PVPM", 3, 9, _bytes(planta / f"INV-{i}-PVPM"), SIN_ZIP) for i in (1, 2, 3)]
+    assert arbol.inversores("CT-1") == [planta / f"INV-{i}-PVPM" for i in (1, 2, 3)]
+    assert arbol.strings("CT-1", "INV-2-PVPM") == {"String-1", "String-2", "String-3"}
+    assert arbol.inversores("CT-9") is None and arbol.strings("CT-1", "INV-9-PVPM") is None
+
+def test_actualizar_solo_lo_que_cambio(planta, arbol):
+    _comprimir(planta)
+    assert arbol.actualizar()
+    assert set(_estados(arbol).values()) == {COMPRIMIDO}
+    version = arbol.version
+    assert not arbol.actualizar()
+    assert arbol.version == version
+
+    anteriores = dict(arbol.cts["CT-1"].inversores)
+    (planta / "INV-1-PVPM" / "String-3" / "detalle" / "nuevo.csv").write_bytes(b"1;2;3\n")
+    assert arbol.actualizar()
+    assert _estados(arbol) == {("CT-1", None): CAMBIADO, ("CT-1", "INV-1-PVPM"): CAMBIADO,
+                               ("CT-1", "INV-2-PVPM"): COMPRIMIDO, ("CT-1", "INV-3-PVPM"): COMPRIMIDO}
+    inversores = arbol.cts["CT-1"].inversores
+    assert inversores["INV-1-PVPM"].archivos == 10
+    # Las INV sin cambios no se vuelven a escanear
+    assert inversores["INV-2-PVPM"] is anteriores["INV-2-PVPM"]
+
+    crear_estructura(planta.parent, "2", 1, 4)
+    assert arbol.actualizar()
+    assert arbol.strings("CT-2", "INV-1-PVPM") == {f"String-{i}" for i in (1, 2, 3, 4)}
+
+def test_registrar_recoge_lo_que_actualizar_no_ve(planta, arbol):
+    _comprimir(planta)
+    arbol.actualizar()
+    curva = planta / "INV-2-PVPM" / "String-1" / "curva_1.csv"
+    mtime_carpeta = curva.parent.stat().st_mtime_ns
+    curva.write_bytes(b"otra curva\n")  # reescrito en su sitio: la carpeta no cambia
+    os.utime(curva.parent, ns=(mtime_carpeta, mtime_carpeta))
+    assert not arbol.actualizar()
+    arbol.registrar(planta / "INV-2-PVPM")
+    assert _estados(arbol)[("CT-1", "INV-2-PVPM")] == CAMBIADO
+    assert arbol.cts["CT-1"].inversores["INV-2-PVPM"].bytes == _bytes(planta / "INV-2-PVPM")
+
+def test_crear_estructura_con_un_indice_desfasado(planta, arbol):
+    existentes = arbol.strings("CT-1", "INV-3-PVPM")
+    shutil.rmtree(planta / "INV-3-PVPM")
+    crear_estructura(planta.parent, "1", 3, 3, existentes=existentes)
+    assert sorted(p.name for p in (planta / "INV-3-PVPM").iterdir()) == ["String-1", "String-2", "String-3"]
+
+def test_iniciar_en_segundo_plano(planta):
+    arbol = ArbolPlanta(planta.parent)
+    arbol.iniciar(intervalo=0.05)
+    try:
+        assert arbol.listo.wait(10)
+        version = arbol.version
+        _comprimir(planta)
+        for _ in range(200):
+            if arbol.version > version and set(_estados(arbol).values()) == {COMPRIMIDO}:
+                break
+            time.sleep(0.05)
+        assert set(_estados(arbol).values()) == {COMPRIMIDO}
+    finally:
+        arbol.detener(wait=True)
@@ -0,0 +1,30 @@
+"""Banco sintético y comparación de informes de rendimiento"""
+from ct_inv.benchmark import ArbolSintetico, comparar_informes, generar_arbol
+
+
+def _informe(*etapas):
+    return {"etapas": [{"etapa": etapa, "codec": codec, "segundos": s} for etapa, codec, s in etapas]}
+
+def test_comparar_informes():
+    anterior = _informe(("escaneo", None, 1.0), ("comprimir", "deflate", 2.0), ("comprimir", "bzip2:9", 4.0),
+                        ("verificar", None, 0.01), ("enviar", None, 0.0))
+    actual = _informe(("escaneo", None, 1.05), ("comprimir", "deflate", 2.5), ("comprimir", "bzip2:9", 3.0),
+                      ("verificar", None, 0.04), ("enviar", None, 1.0), ("nueva", None, 9.0))
+    # Solo deflate empeora más del 10 %; verificar es ruido, enviar y nueva no tienen referencia
+    assert comparar_informes(anterior, actual) == [
+        {"etapa": "comprimir deflate", "antes_s": 2.0, "ahora_s": 2.5, "cambio": 0.25},
+    ]
+    assert [r["etapa"] for r in comparar_informes(anterior, actual, tolerancia=0.01, minimo=0.0)] == [
+        "escaneo", "comprimir deflate", "verificar"]
+
+def test_generar_arbol_es_reproducible(tmp_path):
+    arbol = ArbolSintetico(invs=2, strings=3, archivos=4, tamano_kb=8, semilla=7)
+    cts, metricas = generar_arbol(tmp_path / "a", arbol)
+    otro, _ = generar_arbol(tmp_path / "b", arbol)
+    assert [ct.name for ct in cts] == ["CT-1"]
+    archivos = sorted(p.relative_to(cts[0]) for p in cts[0].rglob("*.txt"))
+    assert len(archivos) == 2 * 3 * 4
+    assert all((cts[0] / p).read_bytes() == (otro[0] / p).read_bytes() for p in archivos)
+    escritura = {m["etapa"]: m for m in metricas}["escribir_datos"]
+    assert escritura["archivos"] == 24
+    assert escritura["bytes_in"] == sum((cts[0] / p).stat().st_size for p in archivos)
@@ -0,0 +1,72 @@
+"""Caché columnar de los .txt ya parseados"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Python_StepFuntions" / "Scripts"))
+
+import cache_frecuencias  # noqa: E402
+import frecuencias  # noqa: E402
+from cache_frecuencias import EXTENSION, INDICE, cargar_df, guardar_df  # noqa: E402
+
+
+def _registro(valor):
+    return f"Hora      Frecuencia\n10:00:00  {valor}\n10:00:01  60.00\n"
+
+@pytest.fixture
+def carpeta(tmp_path):
+    entrada = tmp_path / "txt"
+    entrada.mkdir()
+    for i in (1, 2, 3):
+        (entrada / f"inv{i}.txt").write_text(_registro(59.9 + i / 100), encoding="utf-8")
+    return entrada
+
+def _convertir(carpeta, cache_dir):
+    origenes = {}
+    frames = frecuencias._frames_desde_cache(frecuencias.listar_txt(carpeta), 2, "utf-8", cache_dir, carpeta)
+    for file_path, df, origen in frames:
+        origenes[os.path.basename(file_path)] = (origen, df)
+    return origenes
+
+def test_solo_parsea_lo_nuevo_o_modificado(carpeta, tmp_path):
+    cache_dir = tmp_path / "cache"
+    primera = _convertir(carpeta, cache_dir)
+    assert {n: o for n, (o, _) in primera.items()} == dict.fromkeys(("inv1.txt", "inv2.txt", "inv3.txt"), "parseado")
+
+    (carpeta / "inv2.txt").write_text(_registro(61.5), encoding="utf-8")
+    # Tocado sin cambiar el contenido: se reconoce por el hash sin volver a parsear
+    os.utime(carpeta / "inv3.txt", ns=(0, 0))
+    segunda = _convertir(carpeta, cache_dir)
+    assert {n: o for n, (o, _) in segunda.items()} == {"inv1.txt": "caché", "inv2.txt": "parseado",
+                                                      "inv3.txt": "caché"}
+    assert segunda["inv2.txt"][1]["Frecuencia"].tolist() == [61.5, 60.0]
+    for nombre in ("inv1.txt", "inv3.txt"):
+        pd.testing.assert_frame_equal(segunda[nombre][1], primera[nombre][1])
+
+def test_podar_borra_los_huerfanos(carpeta, tmp_path):
+    cache_dir = tmp_path / "cache"
+    _convertir(carpeta, cache_dir)
+    assert len(list(cache_dir.glob("*" + EXTENSION))) == 3
+    (carpeta / "inv1.txt").unlink()
+    (carpeta / "inv2.txt").write_text(_registro(61.5), encoding="utf-8")
+    _convertir(carpeta, cache_dir)
+    # inv3 y el nuevo contenido de inv2; sin .tmp ni serializaciones de otro formato
+    blobs = [p.name for p in cache_dir.iterdir() if p.name != INDICE]
+    assert len(blobs) == 2 and all(nombre.endswith(EXTENSION) for nombre in blobs)
+
+def test_indice_de_otra_version_se_ignora(carpeta, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    _convertir(carpeta, cache_dir)
+    monkeypatch.setattr(cache_frecuencias, "PARSER_VERSION", cache_frecuencias.PARSER_VERSION + 1)
+    assert set(o for o, _ in _convertir(carpeta, cache_dir).values()) == {"parseado"}
+
+def test_guardar_columnas_de_tipos_mezclados(tmp_path):
+    df = pd.DataFrame({"Hora": ["10:00:00", "10:00:01", "10:00:02"], "Valor": [60.0, "sin dato", 59.9]})
+    blob = guardar_df(df, str(tmp_path / "mezcla"))
+    assert blob.endswith(EXTENSION)
+    leido = cargar_df(blob)
+    assert [str(v) for v in leido["Valor"]] == ["60.0", "sin dato", "59.9"]
+    assert leido["Hora"].tolist() == ["10:00:00", "10:00:01", "10:00:02"]
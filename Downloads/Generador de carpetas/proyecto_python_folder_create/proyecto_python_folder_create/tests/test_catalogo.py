@@ -0,0 +1,57 @@
+"""Buscar, leer y extraer miembros de los ZIP catalogados"""
+import dataclasses
+
+import pytest
+
+from ct_inv.catalogo import Catalogo, CatalogoError, ruta_catalogo
+from ct_inv.compresion import CompressionScheduler, preparar_workers
+
+
+@pytest.fixture
+def catalogo(planta):
+    scheduler = CompressionScheduler(preparar_workers(planta, incremental=True), catalogar=True)
+    scheduler.run()
+    assert scheduler.errors == []
+    catalogo = Catalogo(ruta_catalogo(planta))
+    yield catalogo
+    catalogo.close()
+
+def test_buscar_por_nombre_y_por_glob(planta, catalogo):
+    assert len(catalogo.buscar("calibracion.dat")) == 9
+    assert [m.inv for m in catalogo.buscar("calibracion.dat", inv="INV-2-PVPM")] == ["INV-2-PVPM"] * 3
+    encontrados = catalogo.buscar("*/String-3/detalle/*", ct="CT-1")
+    assert [m.nombre for m in encontrados] == [f"INV-{i}-PVPM/String-3/detalle/grande.bin" for i in (1, 2, 3)]
+    assert catalogo.buscar("no_existe.csv") == []
+
+def test_leer_devuelve_el_contenido_del_origen(planta, catalogo):
+    for miembro in catalogo.buscar("*", limite=1000):
+        assert b"".join(catalogo.leer(miembro)) == (planta / miembro.nombre).read_bytes()
+
+def test_extraer_escribe_bajo_destino_ct(planta, catalogo, tmp_path):
+    miembro, = catalogo.buscar("grande.bin", inv="INV-3-PVPM")
+    salida = catalogo.extraer(miembro, tmp_path / "extraidos")
+    assert salida == (tmp_path / "extraidos" / "CT-1" / miembro.nombre).resolve()
+    assert salida.read_bytes() == (planta / "INV-3-PVPM" / "String-3" / "detalle" / "grande.bin").read_bytes()
+    assert not list(salida.parent.glob("*.tmp"))
+
+@pytest.mark.parametrize("nombre", ["../../fuera.txt", "INV-1-PVPM/../../../fuera.txt", "/tmp/fuera.txt"])
+def test_extraer_no_sale_de_destino(catalogo, tmp_path, nombre):
+    miembro = dataclasses.replace(catalogo.buscar("vacio.txt")[0], nombre=nombre)
+    with pytest.raises(CatalogoError):
+        catalogo.extraer(miembro, tmp_path / "extraidos")
+    assert not (tmp_path / "fuera.txt").exists()
+
+def test_leer_reindexa_un_zip_que_cambio(planta, catalogo):
+    miembro, = catalogo.buscar("curva_1.csv", inv="INV-1-PVPM")
+    curva = planta / "INV-1-PVPM" / "String-1" / "curva_1.csv"
+    curva.write_bytes(b"0;0;0\n" * 5000 + curva.read_bytes())
+    # Sin catalogar: el catálogo guarda el ZIP anterior y debe darse cuenta solo
+    scheduler = CompressionScheduler(preparar_workers(planta, incremental=True))
+    scheduler.run()
+    assert scheduler.errors == []
+    assert b"".join(catalogo.leer(miembro)) == curva.read_bytes()
+
+def test_leer_detecta_un_miembro_danado(planta, catalogo):
+    miembro, = catalogo.buscar("curva_2.csv", inv="INV-1-PVPM")
+    with pytest.raises(CatalogoError):
+        b"".join(catalogo.leer(dataclasses.replace(miembro, crc=miembro.crc ^ 1)))
@@ -0,0 +1,93 @@
+"""Ida y vuelta por zipfile de cada camino de escritura de los ZIP"""
+import hashlib
+import zipfile
+
+import pytest
+
+from conftest import contenido_origen
+from ct_inv import verificacion
+from ct_inv.compresion import CompressionScheduler, preparar_workers
+from ct_inv.verificacion import leer_sha256
+
+
+def comprimir(carpeta_ct, incremental=False, **opciones):
+    scheduler = CompressionScheduler(preparar_workers(carpeta_ct, incremental=incremental), **opciones)
+    scheduler.run()
+    assert scheduler.errors == []
+    return scheduler
+
+def comprobar_zips(scheduler):
+    """Cada ZIP pasa testzip, tiene exactamente los archivos del origen y su .sha256 es el del archivo"""
+    assert len(scheduler.completed) == len(scheduler.workers)
+    for worker in scheduler.workers:
+        with zipfile.ZipFile(worker.zip_path) as zf:
+            assert zf.testzip() is None
+            archivos = {n: zf.read(n) for n in zf.namelist() if not n.endswith("/")}
+        assert archivos == contenido_origen(worker.inv_dir)
+        digest = hashlib.sha256(worker.zip_path.read_bytes()).hexdigest()
+        assert leer_sha256(worker.zip_path) == digest
+
+@pytest.mark.parametrize("opciones", [
+    {},
+    {"use_processes": True},
+    {"hilos_inv": 4},
+    {"dedup": True},
+    {"dedup": True, "hilos_inv": 4},
+], ids=["hilos", "procesos", "hilos-inv", "dedup", "dedup-hilos-inv"])
+def test_ida_y_vuelta(planta, opciones):
+    scheduler = comprimir(planta, **opciones)
+    comprobar_zips(scheduler)
+    if opciones.get("dedup"):
+        assert all(w.stats["deduplicados"] == 3 for w in scheduler.workers)
+
+def test_incremental_reutiliza_lo_que_no_cambio(planta):
+    comprobar_zips(comprimir(planta, incremental=True))
+
+    curva = planta / "INV-2-PVPM" / "String-1" / "curva_1.csv"
+    curva.write_bytes(curva.read_bytes() + b"999;1.000;2.0000\n")
+    (planta / "INV-2-PVPM" / "String-2" / "nuevo.csv").write_bytes(b"0;0;0\n")
+    scheduler = comprimir(planta, incremental=True)
+    comprobar_zips(scheduler)
+
+    stats = {w.inv_dir.name: w.stats for w in scheduler.workers}
+    assert stats["INV-2-PVPM"]["comprimidos"] == 2
+    assert stats["INV-2-PVPM"]["reutilizados"] == len(contenido_origen(planta / "INV-2-PVPM")) - 2
+    # Las INV sin cambios ni se reescriben
+    assert stats["INV-1-PVPM"]["comprimidos"] == 0
+
+def test_verificacion_no_relee_los_miembros_reutilizados(planta, monkeypatch):
+    comprimir(planta, incremental=True)
+    (planta / "INV-1-PVPM" / "String-2" / "nuevo.csv").write_bytes(b"0;0;0\n")
+
+    releidos, descomprimidos = [], []
+    crc32_archivo, abrir = verificacion.crc32_archivo, zipfile.ZipFile.open
+    monkeypatch.setattr(verificacion, "crc32_archivo", lambda path: releidos.append(path) or crc32_archivo(path))
+
+    def abrir_contando(self, name, mode="r", *args, **kwargs):
+        if mode == "r":
+            descomprimidos.append(getattr(name, "filename", name))
+        return abrir(self, name, mode, *args, **kwargs)
+
+    monkeypatch.setattr(zipfile.ZipFile, "open", abrir_contando)
+    scheduler = comprimir(planta, incremental=True)
+    # Solo el archivo nuevo se descomprime; los reutilizados se comprueban con el CRC del índice
+    assert releidos == []
+    assert descomprimidos == ["INV-1-PVPM/String-2/nuevo.csv"]
+    monkeypatch.undo()
+    comprobar_zips(scheduler)
+
+def test_dedup_descarta_un_blob_que_cambio_tras_el_hash(planta, monkeypatch):
+    from ct_inv import dedup
+
+    original = dedup.comprimir_blob
+
+    def cambia_antes(path, destino, codec, sha256):
+        # Mismo tamaño y otro contenido entre el hash y la compresión del blob
+        with open(path, "r+b") as f:
+            f.write(b"modificado")
+        return original(path, destino, codec, sha256)
+
+    monkeypatch.setattr(dedup, "comprimir_blob", cambia_antes)
+    scheduler = comprimir(planta, dedup=True)
+    comprobar_zips(scheduler)
+    assert all(w.stats["deduplicados"] == 0 for w in scheduler.workers)
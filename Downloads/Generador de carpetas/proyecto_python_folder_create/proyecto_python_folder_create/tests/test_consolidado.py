@@ -0,0 +1,60 @@
+"""Tabla larga, estadísticas por archivo y globales y remuestreo de los registros de frecuencia"""
+import sys
+from pathlib import Path
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Python_StepFuntions" / "Scripts"))
+
+from consolidado import GLOBAL, Consolidador, estadisticas, remuestrear  # noqa: E402
+
+
+@pytest.fixture
+def tabla():
+    consolidador = Consolidador()
+    consolidador.agregar("/datos/inv1.txt", pd.DataFrame({
+        "Fecha": ["01/02/2024"] * 4,
+        "Hora": ["10:00:00", "10:00:30", "10:01:00", "10:01:30"],
+        "Frecuencia Hz": ["60,00", "59,70", "60,10", "60,30"],  # coma decimal
+        "Tension": [230.0, 231.0, None, 229.0],
+        "Estado": ["en red"] * 4,
+    }))
+    consolidador.agregar("/datos/inv2.txt", pd.DataFrame({"Frecuencia Hz": [60.0, 60.05]}))
+    return consolidador.tabla()
+
+def test_tabla_larga_tipada(tabla):
+    assert list(tabla.columns) == ["archivo", "instante", "variable", "valor"]
+    assert list(tabla["archivo"].cat.categories) == ["inv1.txt", "inv2.txt"]
+    # El texto no numérico (Estado) y la celda vacía no entran
+    assert list(tabla["variable"].cat.categories) == ["Frecuencia Hz", "Tension"]
+    assert len(tabla) == 4 + 3 + 2
+    assert tabla["valor"].dtype == "float64"
+    assert tabla["instante"].iloc[0] == pd.Timestamp("2024-02-01 10:00:00")
+    assert tabla.loc[tabla["archivo"] == "inv2.txt", "instante"].isna().all()
+
+def test_estadisticas(tabla):
+    resumen = estadisticas(tabla, banda=(59.8, 60.2)).set_index(["archivo", "variable"])
+    fila = resumen.loc[("inv1.txt", "Frecuencia Hz")]
+    assert (fila["count"], fila["min"], fila["max"]) == (4, 59.7, 60.3)
+    assert (fila["fuera_banda"], fila["pct_fuera_banda"]) == (2, 50.0)
+    assert fila["desde"] == pd.Timestamp("2024-02-01 10:00:00")
+    total = resumen.loc[(GLOBAL, "Frecuencia Hz")]
+    assert (total["count"], total["fuera_banda"]) == (6, 2)
+    assert total["p50"] == pytest.approx(60.025)
+    # La banda solo se aplica a las variables de frecuencia
+    assert pd.isna(resumen.loc[("inv1.txt", "Tension"), "fuera_banda"])
+
+def test_estadisticas_con_variables_indicadas(tabla):
+    resumen = estadisticas(tabla, banda=(229.5, 230.5), frecuencias=["Tension"]).set_index(["archivo", "variable"])
+    assert resumen.loc[(GLOBAL, "Tension"), "fuera_banda"] == 2
+    assert pd.isna(resumen.loc[(GLOBAL, "Frecuencia Hz"), "fuera_banda"])
+
+def test_remuestrear(tabla):
+    remuestreo = remuestrear(tabla, "1min")
+    frecuencia = remuestreo[remuestreo["variable"] == "Frecuencia Hz"]
+    assert frecuencia["intervalo"].tolist() == [pd.Timestamp("2024-02-01 10:00"), pd.Timestamp("2024-02-01 10:01")]
+    assert frecuencia["count"].tolist() == [2, 2]
+    assert frecuencia["mean"].tolist() == pytest.approx([59.85, 60.2])
+    # inv2 no tiene marca de tiempo: no se remuestrea
+    assert set(remuestreo["archivo"]) == {"inv1.txt"}
@@ -0,0 +1,54 @@
+"""Diario de operaciones: paginación por clave y filtros"""
+import pytest
+
+from ct_inv.diario import DiarioOperaciones, FiltroDiario
+
+
+@pytest.fixture
+def diario(tmp_path):
+    diario = DiarioOperaciones(tmp_path / "operaciones.db")
+    filas = []
+    for i in range(1, 251):
+        tipo = ("Crear CT", "Comprimir", "Enviar")[i % 3]
+        estado = "ERROR: Validación" if i % 10 == 0 else "OK"
+        filas.append((f"2025-11-{10 + i // 100:02d} 10:{i // 60 % 60:02d}:{i % 60:02d}", tipo,
+                      f"operación {i} al 50%" if i == 125 else f"operación {i}", estado))
+    diario.registrar_varias(filas)
+    yield diario
+    diario.close()
+
+def _ids(filas):
+    return [fila[0] for fila in filas]
+
+def test_pagina_hacia_atras_y_hacia_delante(diario):
+    primera = diario.pagina(limite=100)
+    assert _ids(primera) == list(range(250, 150, -1))
+    segunda = diario.pagina(limite=100, antes_de=primera[-1][0])
+    assert _ids(segunda) == list(range(150, 50, -1))
+    tercera = diario.pagina(limite=100, antes_de=segunda[-1][0])
+    assert _ids(tercera) == list(range(50, 0, -1))
+    assert diario.pagina(limite=100, antes_de=tercera[-1][0]) == []
+    # Volver a la página anterior mantiene el orden de más reciente a más antigua
+    assert diario.pagina(limite=100, despues_de=segunda[0][0]) == primera
+
+def test_filtros(diario):
+    errores = FiltroDiario(estado="ERROR")
+    assert diario.contar(errores) == 25
+    assert _ids(diario.pagina(errores, limite=3)) == [250, 240, 230]
+    comprimir = FiltroDiario(tipo="Comprimir", estado="ERROR")
+    assert all(fila[2] == "Comprimir" and fila[4].startswith("ERROR") for fila in diario.pagina(comprimir))
+    assert diario.contar(FiltroDiario(estado="error")) == 0  # el estado distingue mayúsculas
+    # % y _ se buscan literalmente
+    assert _ids(diario.pagina(FiltroDiario(texto="50%"))) == [125]
+    assert diario.contar(FiltroDiario(texto="_")) == 0
+    assert diario.contar(FiltroDiario(desde="2025-11-11", hasta="2025-11-11")) == 100
+    assert diario.contar() == 250
+
+def test_ultimas_tipos_y_vacio(tmp_path, diario):
+    assert _ids(diario.ultimas(3)) == [250, 249, 248]
+    assert diario.tipos() == ["Comprimir", "Crear CT", "Enviar"]
+    assert not diario.vacio()
+    nuevo = DiarioOperaciones(tmp_path / "nuevo.db")
+    assert nuevo.vacio()
+    assert nuevo.registrar("2025-11-19 09:00:00", "Crear CT", "CT-1", "OK") == 1
+    nuevo.close()
@@ -0,0 +1,68 @@
+"""Lectura por bloques (directa, adelantada y con mmap) y escritura diferida"""
+import io
+import mmap
+import os
+
+import pytest
+
+from ct_inv import flujo
+from ct_inv.flujo import EscrituraDiferida, LectorBloques, necesita_zip64
+
+BLOQUE = mmap.ALLOCATIONGRANULARITY
+
+
+@pytest.mark.parametrize("size, usar_mmap", [
+    (BLOQUE, False),            # un solo bloque: lectura directa
+    (10 * BLOQUE + 7, False),   # hilo que lee por delante
+    (10 * BLOQUE + 7, True),    # ventanas de mmap
+    (0, False),
+], ids=["directo", "adelantado", "mmap", "vacio"])
+def test_lector_bloques_devuelve_el_archivo_entero(tmp_path, monkeypatch, size, usar_mmap):
+    monkeypatch.setattr(flujo, "VENTANA", 3 * BLOQUE)  # varias ventanas, la última parcial
+    path = tmp_path / "curva.bin"
+    path.write_bytes(os.urandom(size))
+    with open(path, "rb") as f, LectorBloques(f, size, bloque=BLOQUE, profundidad=2, usar_mmap=usar_mmap) as lector:
+        # Los bloques se copian antes de pedir el siguiente, como hace el compresor
+        bloques = [bytes(bloque) for bloque in lector]
+    assert b"".join(bloques) == path.read_bytes()
+    assert all(0 < len(bloque) <= BLOQUE for bloque in bloques)
+
+def test_lector_bloques_cerrado_a_medias(tmp_path):
+    path = tmp_path / "curva.bin"
+    path.write_bytes(os.urandom(20 * BLOQUE))
+    with open(path, "rb") as f:
+        lector = LectorBloques(f, 20 * BLOQUE, bloque=BLOQUE, profundidad=2)
+        primero = next(iter(lector))
+        assert len(primero) == BLOQUE
+        lector.close()  # no se queda esperando al hilo lector
+
+def test_escritura_diferida_respeta_el_orden_y_los_seek(tmp_path):
+    path = tmp_path / "salida.bin"
+    datos = [os.urandom(n) for n in (10, 5000, 1, 12000, 300)]
+    with EscrituraDiferida(open(path, "wb"), en_vuelo=4096) as salida:
+        salida.write(b"cabecera")
+        for trozo in datos:
+            assert salida.write(memoryview(trozo)) == len(trozo)
+        assert salida.tell() == 8 + sum(map(len, datos))
+        # Como zipfile al completar una cabecera local
+        salida.seek(0)
+        salida.write(b"CABECERA")
+        salida.seek(0, io.SEEK_END)
+        salida.write(b"fin")
+    assert path.read_bytes() == b"CABECERA" + b"".join(datos) + b"fin"
+
+def test_escritura_diferida_relanza_el_error_del_hilo():
+    class Llena(io.BytesIO):
+        def write(self, datos):
+            raise OSError(28, "No queda espacio en el dispositivo")
+
+    salida = EscrituraDiferida(Llena())
+    salida.write(b"x" * 100)
+    with pytest.raises(OSError):
+        salida.flush()
+    with pytest.raises(OSError):
+        salida.write(b"y")
+
+def test_necesita_zip64():
+    assert not necesita_zip64(1024 ** 3 - 1)
+    assert necesita_zip64(1024 ** 3)
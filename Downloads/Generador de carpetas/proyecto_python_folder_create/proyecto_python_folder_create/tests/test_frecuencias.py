@@ -0,0 +1,57 @@
+"""Conversor de registros de frecuencia .txt a Excel (Python_StepFuntions/Scripts)"""
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("pandas")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Python_StepFuntions" / "Scripts"))
+
+import frecuencias  # noqa: E402
+
+REGISTRO = (
+    "Fecha       Hora      Frecuencia Hz  Estado\n"
+    "01/02/2024  10:00:00  60.01          en red\n"
+    "\n"
+    "01/02/2024  10:00:01  59.70          en red\n"
+)
+
+
+def test_leer_txt_separa_por_dos_o_mas_espacios(tmp_path):
+    txt = tmp_path / "registro.txt"
+    txt.write_text(REGISTRO, encoding="utf-8")
+    df = frecuencias.leer_txt(txt)
+    # Un solo espacio no separa columnas: "Frecuencia Hz" y "en red" se conservan
+    assert list(df.columns) == ["Fecha", "Hora", "Frecuencia Hz", "Estado"]
+    assert df["Frecuencia Hz"].tolist() == [60.01, 59.70]
+    assert df["Estado"].tolist() == ["en red", "en red"]
+
+def test_nombre_hoja_valido_y_unico():
+    usados = set()
+    assert frecuencias.nombre_hoja("/datos/ct1:inv[2].txt", usados) == "ct1_inv_2_"
+    largo = "registro_de_frecuencia_del_inversor_12"
+    assert frecuencias.nombre_hoja(f"{largo}.txt", usados) == largo[:31]
+    assert frecuencias.nombre_hoja(f"{largo}_bis.TXT", usados) == largo[:29] + "~2"
+    assert frecuencias.nombre_hoja("CT1_INV_2_.txt", usados) == "CT1_INV_2_~2"
+
+def test_convertir_escribe_una_hoja_por_archivo(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    entrada = tmp_path / "txt"
+    entrada.mkdir()
+    for nombre in ("b", "a"):
+        (entrada / f"{nombre}.txt").write_text(REGISTRO, encoding="utf-8")
+    (entrada / "notas.csv").write_text("no es un registro", encoding="utf-8")
+
+    salida = tmp_path / "frecuencias.xlsx"
+    vistos = []
+    assert frecuencias.convertir(str(entrada), str(salida), jobs=2,
+                                 on_file=lambda name, origen: vistos.append(name)) == 2
+    assert vistos == ["a.txt", "b.txt"]
+    wb = openpyxl.load_workbook(salida, read_only=True)
+    assert wb.sheetnames == ["a", "b"]
+    assert list(wb["a"].values) == [
+        ("Fecha", "Hora", "Frecuencia Hz", "Estado"),
+        ("01/02/2024", "10:00:00", 60.01, "en red"),
+        ("01/02/2024", "10:00:01", 59.7, "en red"),
+    ]
+    wb.close()
@@ -0,0 +1,74 @@
+"""Métricas por fase de un lote y su exportación (JSON por líneas y Prometheus)"""
+import json
+import re
+
+from ct_inv.compresion import CompressionScheduler, preparar_workers
+from ct_inv.metricas import FASES, MetricasTrabajo, RegistroMetricas
+
+_MUESTRA = re.compile(r"^([a-z_]+)(\{[^}]*\})? (\S+)$")
+
+
+def test_el_lote_reune_las_metricas_de_cada_inv(planta):
+    avisadas = []
+    scheduler = CompressionScheduler(preparar_workers(planta), on_metricas=avisadas.append, detalle=True)
+    scheduler.run()
+    assert scheduler.errors == []
+    assert sorted(m.inv for m in avisadas) == [f"CT-1/INV-{i}-PVPM" for i in (1, 2, 3)]
+
+    totales = scheduler.metricas.totales()
+    assert (totales["trabajos"], totales["errores"], totales["archivos"]) == (3, 0, 27)
+    assert totales["bytes_in"] == sum(p.stat().st_size for p in planta.glob("INV-*-PVPM/**/*") if p.is_file())
+    assert 0 < totales["ratio"] < 1
+    for fase in ("scan", "read", "compress", "write", "verify"):
+        assert totales["fases"][fase] > 0, fase
+    assert all(len(m.archivos_detalle) == 9 for m in avisadas)
+
+def test_escribir_jsonl(tmp_path):
+    registro = RegistroMetricas()
+    trabajo = MetricasTrabajo("CT-1/INV-1-PVPM", "INV-1-PVPM.zip", bytes_in=1000, bytes_out=250, archivos=2)
+    trabajo.archivos_detalle = [{"arcname": "a.csv"}, {"arcname": "b.csv"}]
+    registro.agregar(trabajo)
+    log = tmp_path / "metricas.jsonl"
+    registro.escribir_jsonl(log)
+    registro.escribir_jsonl(log, detalle=True)
+    lineas = [json.loads(linea) for linea in log.read_text(encoding="utf-8").splitlines()]
+    assert [linea["tipo"] for linea in lineas] == ["inv", "lote", "inv", "archivo", "archivo", "lote"]
+    assert lineas[0]["ratio"] == 0.25 and "archivos_detalle" not in lineas[0]
+    assert lineas[-1]["bytes_in"] == 1000
+
+def test_prometheus_solo_gauges_documentados(tmp_path):
+    registro = RegistroMetricas()
+    for inv, estado in (("CT-1/INV-1-PVPM", "ok"), ('CT-1/INV-"2"', "error")):
+        trabajo = MetricasTrabajo(inv, estado=estado, segundos=1.5, bytes_in=100, bytes_out=40, archivos=3)
+        trabajo.fases["compress"] = 0.75
+        registro.agregar(trabajo)
+    registro.registrar_ui(0.01)
+
+    path = tmp_path / "ct_inv.prom"
+    registro.escribir_prometheus(path)
+    texto = path.read_text(encoding="utf-8")
+    assert not list(tmp_path.glob("*.tmp"))
+
+    ayudas, tipos, muestras = set(), {}, {}
+    for linea in texto.splitlines():
+        if linea.startswith("# HELP "):
+            ayudas.add(linea.split()[2])
+        elif linea.startswith("# TYPE "):
+            _, _, nombre, tipo = linea.split()
+            tipos[nombre] = tipo
+        else:
+            nombre, etiquetas, valor = _MUESTRA.match(linea).groups()
+            # Cada métrica documentada antes de su primera muestra
+            assert nombre in ayudas and nombre in tipos, nombre
+            muestras[nombre + (etiquetas or "")] = float(valor)
+    # Se reescribe en cada lote: nada de contadores
+    assert set(tipos.values()) == {"gauge"}
+    assert not any(nombre.endswith("_total") for nombre in tipos)
+
+    assert muestras['ct_inv_ultimo_lote_bytes{sentido="entrada"}'] == 200
+    assert muestras['ct_inv_ultimo_lote_trabajos{estado="error"}'] == 1
+    assert muestras['ct_inv_ultimo_lote_fase_segundos{fase="compress"}'] == 1.5
+    assert muestras['ct_inv_inv_segundos{inv="CT-1/INV-\\"2\\""}'] == 1.5
+    assert muestras["ct_inv_ratio"] == 0.4
+    assert len([m for m in muestras if m.startswith("ct_inv_ultimo_lote_fase_segundos")]) == len(FASES)
+    assert "ct_inv_ultimo_lote_timestamp_segundos" in muestras
@@ -0,0 +1,58 @@
+"""Compresión en paralelo dentro de una INV: progreso por bloque y cancelación de los archivos en curso"""
+import threading
+import zipfile
+
+import pytest
+
+from ct_inv import paralelo
+from ct_inv.compresion import CompressionCancelled, CompressionWorker
+from ct_inv.flujo import BLOQUE
+
+
+@pytest.fixture
+def inv_grande(tmp_path):
+    """Tres curvas de 6 bloques cada una"""
+    inv_dir = tmp_path / "CT-1" / "INV-1-PVPM"
+    curva = b"".join(b"%05d;229.871;8.1234\n" % i for i in range(200))
+    for string in (1, 2, 3):
+        carpeta = inv_dir / f"String-{string}"
+        carpeta.mkdir(parents=True)
+        (carpeta / "curva.csv").write_bytes(curva * (6 * BLOQUE // len(curva)))
+    return inv_dir
+
+def _worker(inv_dir):
+    worker = CompressionWorker(inv_dir, inv_dir.parent / f"{inv_dir.name}.zip")
+    worker.hilos = 3
+    return worker
+
+def test_avisa_el_progreso_por_bloque(inv_grande):
+    worker = _worker(inv_grande)
+    avisos = []
+    worker.run(lambda processed, total, name: avisos.append(processed))
+
+    total = worker.manifest.total_bytes
+    primero = worker.manifest.files[0].size
+    assert max(avisos) == avisos[-1] == total
+    # Avisos antes de que el primer archivo llegue al ZIP, y más de uno por archivo
+    assert min(avisos) < primero
+    assert len(set(avisos)) > len(worker.manifest.files)
+    with zipfile.ZipFile(worker.zip_path) as zf:
+        assert zf.testzip() is None
+
+def test_cancelar_corta_los_archivos_en_curso(inv_grande, monkeypatch):
+    resultados = {}
+    comprimir_miembro = paralelo.comprimir_miembro
+
+    def registrando(entry, *args):
+        resultados[entry.arcname] = miembro = comprimir_miembro(entry, *args)
+        return miembro
+
+    monkeypatch.setattr(paralelo, "comprimir_miembro", registrando)
+    worker = _worker(inv_grande)
+    cancel_event = threading.Event()
+    with pytest.raises(CompressionCancelled):
+        worker.run(lambda *aviso: cancel_event.set(), cancel_event)
+    # El primer bloque leído ya cancela: ningún archivo se termina de comprimir
+    assert len(resultados) == 3
+    assert all(miembro is None for miembro in resultados.values())
+    assert worker.partial_path.exists()
@@ -0,0 +1,64 @@
+"""config.json: escritura atómica y agrupada en segundo plano"""
+import json
+import time
+
+import pytest
+
+from ct_inv import persistencia
+from ct_inv.persistencia import ConfigStore
+
+
+@pytest.fixture
+def escrituras(monkeypatch):
+    """Instantáneas escritas a disco, en orden"""
+    escritas = []
+    escribir = persistencia.escribir_json_atomico
+
+    def registrando(path, data, indent=None):
+        escritas.append(data)
+        escribir(path, data, indent)
+
+    monkeypatch.setattr(persistencia, "escribir_json_atomico", registrando)
+    return escritas
+
+def test_agrupa_los_cambios_seguidos(tmp_path, escrituras):
+    store = ConfigStore(tmp_path / "config.json", delay=0.2, max_delay=5.0)
+    for i in range(20):
+        store.save({"n": i})
+    assert escrituras == []
+    time.sleep(0.6)
+    assert escrituras == [{"n": 19}]
+    assert store.load() == {"n": 19}
+    store.close()
+
+def test_max_delay_acota_la_espera(tmp_path, escrituras):
+    store = ConfigStore(tmp_path / "config.json", delay=0.3, max_delay=0.4)
+    fin = time.monotonic() + 1.5
+    i = 0
+    while time.monotonic() < fin:  # cambios cada 0,05 s: delay nunca se cumple
+        store.save({"n": i})
+        i += 1
+        time.sleep(0.05)
+    assert len(escrituras) >= 2
+    store.close()
+    assert escrituras[-1] == {"n": i - 1}
+
+def test_close_escribe_lo_pendiente(tmp_path, escrituras):
+    path = tmp_path / "config.json"
+    store = ConfigStore(path, delay=10)
+    store.save({"tema": "oscuro"})
+    store.close()
+    assert json.loads(path.read_text(encoding="utf-8")) == {"tema": "oscuro"}
+    store.save({"tema": "claro"})  # tras close no se programa nada
+    store.flush()
+    assert escrituras == [{"tema": "oscuro"}]
+    assert not list(tmp_path.glob("*.tmp"))
+
+@pytest.mark.parametrize("contenido", ["", "{dañado", "[1, 2]"])
+def test_load_de_un_archivo_invalido(tmp_path, contenido):
+    path = tmp_path / "config.json"
+    path.write_text(contenido, encoding="utf-8")
+    store = ConfigStore(path)
+    assert store.load() == {}
+    store.close()
+    assert ConfigStore(tmp_path / "no_existe.json").load() == {}
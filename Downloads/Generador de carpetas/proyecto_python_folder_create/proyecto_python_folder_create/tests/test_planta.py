@@ -0,0 +1,70 @@
+"""Lectura de planos y generación de la planta en una pasada"""
+import json
+
+import pytest
+
+from ct_inv.planta import FilaPlanta, generar_planta, leer_plano
+
+
+def test_leer_plano_csv(tmp_path):
+    plano = tmp_path / "plano.csv"
+    plano.write_text("CT,Inv,Dispositivo,Strings\n1,1,pvpm,12\n1,2,,8\n2,1,METREL,4\n", encoding="utf-8")
+    assert leer_plano(plano) == [
+        FilaPlanta("1", "1", "PVPM", 12),
+        FilaPlanta("1", "2", "PVPM", 8),
+        FilaPlanta("2", "1", "METREL", 4),
+    ]
+
+def test_leer_plano_json_anidado(tmp_path):
+    plano = tmp_path / "plano.json"
+    plano.write_text(json.dumps({"cts": [
+        {"ct": "1", "dispositivo": "METREL", "inversores": [{"inv": 1, "strings": 3}, {"inv": 2, "strings": 5}]},
+        {"ct": "2", "inversores": [{"inv": 1, "strings": 2, "dispositivo": "METREL"}]},
+    ]}), encoding="utf-8")
+    assert leer_plano(plano) == [
+        FilaPlanta("1", "1", "METREL", 3),
+        FilaPlanta("1", "2", "METREL", 5),
+        FilaPlanta("2", "1", "METREL", 2),
+    ]
+
+def test_leer_plano_informa_de_todas_las_filas_invalidas(tmp_path):
+    plano = tmp_path / "plano.csv"
+    plano.write_text("ct,inv,strings\n1,1,12\n,2,8\n1,99,4\n1,3,abc\n", encoding="utf-8")
+    with pytest.raises(ValueError) as error:
+        leer_plano(plano)
+    mensaje = str(error.value)
+    assert "Fila 1" not in mensaje
+    assert all(f"Fila {n}" in mensaje for n in (2, 3, 4))
+
+def test_leer_plano_rechaza_otros_formatos(tmp_path):
+    plano = tmp_path / "plano.txt"
+    plano.write_text("1,1,12\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        leer_plano(plano)
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_generar_planta(tmp_path, max_workers):
+    filas = [FilaPlanta("1", "1", "PVPM", 3), FilaPlanta("1", "2", "PVPM", 2), FilaPlanta("2", "1", "METREL", 4)]
+    resumen = generar_planta(tmp_path, filas, max_workers)
+    assert (resumen.cts, resumen.inversores, resumen.strings) == (2, 3, 9)
+    assert (resumen.creadas, resumen.existentes, resumen.errores) == (2 + 3 + 9, 0, [])
+    assert sorted(p.relative_to(tmp_path).as_posix() for p in tmp_path.glob("CT-*/INV-*/String-*")) == [
+        "CT-1/INV-1-PVPM/String-1", "CT-1/INV-1-PVPM/String-2", "CT-1/INV-1-PVPM/String-3",
+        "CT-1/INV-2-PVPM/String-1", "CT-1/INV-2-PVPM/String-2",
+        "CT-2/INV-1-METREL/String-1", "CT-2/INV-1-METREL/String-2",
+        "CT-2/INV-1-METREL/String-3", "CT-2/INV-1-METREL/String-4",
+    ]
+
+    # Segunda pasada: todo existe ya
+    resumen = generar_planta(tmp_path, filas, max_workers)
+    assert (resumen.creadas, resumen.existentes, resumen.errores) == (0, 14, [])
+
+def test_generar_planta_anota_el_padre_que_falla_y_sigue(tmp_path):
+    (tmp_path / "CT-2").write_text("no es una carpeta")
+    filas = [FilaPlanta("2", "1", "PVPM", 50), FilaPlanta("1", "1", "PVPM", 2)]
+    resumen = generar_planta(tmp_path, filas)
+    # Un solo error (la INV bajo el archivo CT-2), sin uno por cada String
+    assert len(resumen.errores) == 1
+    assert "INV-1-PVPM" in resumen.errores[0]
+    assert resumen.creadas == 1 + 1 + 2
+    assert sorted(p.name for p in (tmp_path / "CT-1" / "INV-1-PVPM").iterdir()) == ["String-1", "String-2"]
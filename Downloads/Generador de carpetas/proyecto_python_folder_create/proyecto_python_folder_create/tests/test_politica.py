@@ -0,0 +1,50 @@
+"""Codec y CompressionPolicy: validación de niveles y elección por extensión o por prueba"""
+import os
+
+import pytest
+
+from ct_inv.politica import STORED, Codec, CompressionPolicy
+
+
+@pytest.mark.parametrize("texto, esperado", [
+    ("deflate", Codec("deflate")),
+    (" Deflate:6 ", Codec("deflate", 6)),
+    ("bzip2:9", Codec("bzip2", 9)),
+    ("stored", STORED),
+])
+def test_parse(texto, esperado):
+    codec = Codec.parse(texto)
+    assert codec == esperado
+    assert Codec.parse(str(codec)) == codec
+
+@pytest.mark.parametrize("texto", ["lzma:9", "stored:3", "deflate:10", "bzip2:0", "rar", "deflate:x"])
+def test_parse_rechaza_metodos_y_niveles_invalidos(texto):
+    with pytest.raises(ValueError):
+        Codec.parse(texto)
+
+def test_auto_guarda_sin_comprimir_por_extension(tmp_path):
+    foto = tmp_path / "foto.JPG"
+    foto.write_bytes(b"a" * 4096)  # compresible, pero la extensión manda
+    assert CompressionPolicy.auto().codec_para(str(foto)) == STORED
+
+def test_auto_prueba_la_compresibilidad(tmp_path):
+    aleatorio = tmp_path / "medida.bin"
+    aleatorio.write_bytes(os.urandom(100_000))
+    texto = tmp_path / "curva.csv"
+    texto.write_bytes(b"1;229.871;8.1234\n" * 5000)
+    pequeno = tmp_path / "pequeno.bin"
+    pequeno.write_bytes(os.urandom(500))
+
+    policy = CompressionPolicy.auto(Codec("bzip2", 9))
+    assert policy.codec_para(str(aleatorio)) == STORED
+    assert policy.codec_para(str(texto)) == Codec("bzip2", 9)
+    # Por debajo de 1 KiB no se prueba
+    assert policy.codec_para(str(pequeno), size=500) == Codec("bzip2", 9)
+    policy.almacenar_incompresibles = False
+    assert policy.codec_para(str(aleatorio)) == Codec("bzip2", 9)
+
+def test_to_dict_from_dict():
+    policy = CompressionPolicy.auto(Codec("deflate", 1))
+    policy.por_extension[".log"] = Codec("bzip2", 9)
+    policy.umbral = 0.9
+    assert CompressionPolicy.from_dict(policy.to_dict()) == policy
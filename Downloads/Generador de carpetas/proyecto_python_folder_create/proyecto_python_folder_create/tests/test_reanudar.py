@@ -0,0 +1,72 @@
+"""Reanudar una INV interrumpida a partir de su .partial y su punto de control"""
+import threading
+import zipfile
+
+import pytest
+
+from conftest import contenido_origen
+from ct_inv.compresion import CompressionCancelled, CompressionScheduler, CompressionWorker, preparar_workers
+from ct_inv.trabajo import TrabajoCompresion
+
+
+def interrumpir(inv_dir, zip_path, tras_archivos):
+    """Comprimir inv_dir y cancelar cuando ya hay tras_archivos archivos escritos"""
+    worker = CompressionWorker(inv_dir, zip_path)
+    cancel_event = threading.Event()
+    escritos = []
+
+    def on_progress(processed, total, name):
+        escritos.append(processed)
+        if len(escritos) >= tras_archivos:
+            cancel_event.set()
+
+    with pytest.raises(CompressionCancelled):
+        worker.run(on_progress, cancel_event)
+    return worker
+
+def test_reanuda_desde_el_ultimo_punto_de_control(planta):
+    inv_dir = planta / "INV-1-PVPM"
+    zip_path = planta / "INV-1-PVPM.zip"
+    interrumpido = interrumpir(inv_dir, zip_path, tras_archivos=4)
+    assert not zip_path.exists()
+    assert interrumpido.partial_path.exists()
+
+    worker = CompressionWorker(inv_dir, zip_path)
+    worker.run()
+    assert worker.stats["reanudados"] == 4
+    assert worker.stats["reanudados"] + worker.stats["comprimidos"] == len(worker.manifest.files)
+    assert not worker.partial_path.exists()
+    with zipfile.ZipFile(zip_path) as zf:
+        assert zf.testzip() is None
+        assert {n: zf.read(n) for n in zf.namelist() if not n.endswith("/")} == contenido_origen(inv_dir)
+
+def test_no_reutiliza_lo_que_cambio_tras_la_interrupcion(planta):
+    inv_dir = planta / "INV-1-PVPM"
+    zip_path = planta / "INV-1-PVPM.zip"
+    interrumpir(inv_dir, zip_path, tras_archivos=4)
+    # Primer archivo del manifiesto (orden alfabético en profundidad): String-1/calibracion.dat
+    (inv_dir / "String-1" / "calibracion.dat").write_bytes(b"otra calibracion")
+
+    worker = CompressionWorker(inv_dir, zip_path)
+    worker.run()
+    assert worker.stats["reanudados"] == 0
+    with zipfile.ZipFile(zip_path) as zf:
+        assert zf.testzip() is None
+        assert zf.read("INV-1-PVPM/String-1/calibracion.dat") == b"otra calibracion"
+
+def test_el_lote_reanudado_mantiene_nombres_y_salta_lo_hecho(planta):
+    scheduler = CompressionScheduler(preparar_workers(planta))
+    # El lote se corta después de la primera INV
+    scheduler.on_metricas = lambda metricas: scheduler.cancel()
+    scheduler.run()
+    hechos = {p.name for p in scheduler.completed}
+    assert TrabajoCompresion.cargar(planta) is not None
+
+    workers = preparar_workers(planta)
+    assert {w.zip_path.name for w in workers}.isdisjoint(hechos)
+    assert all(w.zip_path.name == f"{w.inv_dir.name}.zip" for w in workers)  # sin INV-x_1.zip
+    reanudado = CompressionScheduler(workers)
+    reanudado.run()
+    assert reanudado.errors == []
+    assert {p.name for p in planta.glob("*.zip")} == {f"INV-{i}-PVPM.zip" for i in (1, 2, 3)}
+    assert TrabajoCompresion.cargar(planta) is None
@@ -0,0 +1,67 @@
+"""Vigilancia de carpetas: las INV se recomprimen cuando cambian (por sondeo si no hay watchdog)"""
+import queue
+import time
+import zipfile
+
+import pytest
+
+from conftest import contenido_origen
+from ct_inv.vigilancia import VigilanteCarpetas
+
+
+def esperar(vigilante, n, timeout=30):
+    """Los siguientes n eventos "done" (falla con el primer "error")"""
+    hechos = []
+    limite = time.monotonic() + timeout
+    while len(hechos) < n:
+        try:
+            evento = vigilante.events.get(timeout=max(0.0, limite - time.monotonic()))
+        except queue.Empty:
+            pytest.fail(f"solo {len(hechos)} de {n} INV comprimidas")
+        assert evento.kind != "error", evento.detail
+        if evento.kind == "done":
+            hechos.append(evento)
+    return hechos
+
+@pytest.fixture
+def vigilante(planta):
+    vigilante = VigilanteCarpetas(planta, max_workers=2, espera=0.3, intervalo=0.05, barrido=0.5)
+    vigilante.start()
+    yield vigilante
+    vigilante.stop()
+
+def _comprobar(zip_path, inv_dir):
+    with zipfile.ZipFile(zip_path) as zf:
+        assert zf.testzip() is None
+        assert {n: zf.read(n) for n in zf.namelist() if not n.endswith("/")} == contenido_origen(inv_dir)
+
+def test_comprime_al_arrancar_y_tras_cada_cambio(planta, vigilante):
+    hechos = esperar(vigilante, 3)
+    assert sorted(e.name for e in hechos) == [f"CT-1/INV-{i}-PVPM" for i in (1, 2, 3)]
+    for i in (1, 2, 3):
+        _comprobar(planta / f"INV-{i}-PVPM.zip", planta / f"INV-{i}-PVPM")
+
+    # Archivo nuevo: cambia el mtime de su carpeta
+    (planta / "INV-2-PVPM" / "String-1" / "nueva.csv").write_bytes(b"1;2;3\n" * 100)
+    hecho, = esperar(vigilante, 1)
+    assert hecho.name == "CT-1/INV-2-PVPM"
+    assert hecho.detail.startswith("1 comprimidos, 9 reutilizados")
+    _comprobar(planta / "INV-2-PVPM.zip", planta / "INV-2-PVPM")
+
+    # Contenido cambiado en un archivo que ya existía: lo encuentra el barrido
+    (planta / "INV-3-PVPM" / "String-2" / "curva_2.csv").write_bytes(b"otra curva\n" * 50)
+    hecho, = esperar(vigilante, 1)
+    assert hecho.name == "CT-1/INV-3-PVPM"
+    _comprobar(planta / "INV-3-PVPM.zip", planta / "INV-3-PVPM")
+
+def test_sin_cambios_no_recomprime(planta, vigilante):
+    esperar(vigilante, 3)
+    zips = {p: p.stat().st_mtime_ns for p in planta.glob("*.zip")}
+    time.sleep(1.5)  # varios barridos
+    vigilante.stop()
+    eventos = []
+    while not vigilante.events.empty():
+        eventos.append(vigilante.events.get().kind)
+    assert eventos == ["finished"]
+    assert vigilante.completed == 3 and vigilante.errors == 0
+    assert {p: p.stat().st_mtime_ns for p in planta.glob("*.zip")} == zips